@@ -0,0 +1,48 @@
+import math
+
+class RateBaseline:
+    """
+    单个群的自适应基线: 热度速率 (分/分钟) 的指数加权均值与方差。
+
+    每个样本 O(1) 更新、常数内存；长时间空闲 (连续 k 个零样本) 用闭式解一次衰减，无需逐个样本迭代。
+    z-score = (当前速率 - 均值) / 标准差，使触发条件随群的日常活跃度自动缩放:
+    大群需要远超平时的热度才算爆发，小群只要比平时明显热闹即可。
+    """
+    __slots__ = ("mean", "var", "samples")
+
+    def __init__(self, mean: float = 0.0, var: float = 0.0, samples: int = 0):
+        self.mean = mean
+        self.var = var
+        self.samples = samples
+
+    def update(self, x: float, alpha: float):
+        """EWMA 均值/方差 (West 增量形式)"""
+        diff = x - self.mean
+        incr = alpha * diff
+        self.mean += incr
+        self.var = (1.0 - alpha) * (self.var + diff * incr)
+        self.samples += 1
+
+    def decay(self, k: int, alpha: float):
+        """
+        连续 k 个零样本的闭式更新:
+        mean_k = b^k * mean, var_k = b^k * (var + mean^2 * (1 - b^k)), 其中 b = 1 - alpha。
+        """
+        if k <= 0:
+            return
+        bk = (1.0 - alpha) ** k
+        self.var = bk * (self.var + self.mean * self.mean * (1.0 - bk))
+        self.mean *= bk
+        self.samples += k
+
+    def std(self, floor: float = 0.0) -> float:
+        return max(math.sqrt(max(self.var, 0.0)), floor)
+
+    def zscore(self, x: float, std_floor: float = 1.0) -> float:
+        return (x - self.mean) / self.std(std_floor)
+
+    def to_record(self) -> list:
+        return [round(self.mean, 4), round(self.var, 4), self.samples]
+
+    def load_record(self, record: list):
+        self.mean, self.var, self.samples = record[0], record[1], record[2]
@@ -0,0 +1,170 @@
+import asyncio
+import re
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional
+
+try:
+    from .sampler import cjk_token_estimator
+except ImportError:
+    from sampler import cjk_token_estimator
+
+logger = logging.getLogger("astrbot")
+
+# Section markers of a batched prompt / response: [[G1]], [[G2]], ... (tolerates markdown decoration)
+_MARKER_RE = re.compile(r"^[#*\s]*\[\[\s*G(\d+)\s*\]\][*:：\s]*$", re.M)
+
+BATCH_INSTRUCTIONS = (
+    "下面是 {count} 个群各自的聊天记录，按上面的要求为每个群分别写一段总结，群与群之间互不相干。\n"
+    "严格按以下格式输出，每个群一段、不要遗漏，标记单独占一行：\n"
+    "{markers}\n"
+)
+
+def split_sections(text: str, count: int) -> List[Optional[str]]:
+    """把批量回复按 [[Gn]] 标记拆回各群，缺失或为空的段落为 None"""
+    parts: List[Optional[str]] = [None] * count
+    matches = list(_MARKER_RE.finditer(text or ""))
+    for i, match in enumerate(matches):
+        idx = int(match.group(1)) - 1
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        body = text[match.end():end].strip()
+        if 0 <= idx < count and body and parts[idx] is None:
+            parts[idx] = body
+    return parts
+
+class _Item:
+    __slots__ = ("group_id", "umo", "prompt", "section", "tokens", "future")
+
+    def __init__(self, group_id: str, umo: str, prompt: str, section: str, tokens: int, future: asyncio.Future):
+        self.group_id = group_id
+        self.umo = umo
+        self.prompt = prompt # the group's own prompt, used when it ends up alone or the split fails
+        self.section = section # the group's chat log (+ hot terms) inside a batched prompt
+        self.tokens = tokens
+        self.future = future
+
+class _Batch:
+    __slots__ = ("frame", "items", "tokens", "timer")
+
+    def __init__(self, frame: Callable[[str], str]):
+        self.frame = frame
+        self.items: List[_Item] = []
+        self.tokens = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class SummaryBatcher:
+    """
+    跨群批量总结 (可选)。
+
+    同一 key (通常是 (provider, 人格)) 下 window 秒内到达的总结请求合并成一次 LLM 调用:
+    人格 Prompt 只出现一次 (frame(body) 把各群段落放进人格模板的 context 位置)，各群的聊天记录
+    以 [[G1]]、[[G2]]... 分段，回复再按同样的标记拆回各群。
+    攒满 max_groups 个群、或再加一个群会超过 max_tokens 时立即发出。
+    批次里只有一个群时照常用它自己的 Prompt；某个群的段落没能从回复里拆出来时，单独为它补一次调用。
+    """
+    def __init__(self, call: Callable[[str, str], Awaitable[Optional[str]]], window: float = 3.0,
+                 max_groups: int = 5, max_tokens: int = 6000, estimator: Optional[Callable[[str], int]] = None):
+        self.call = call # (umo, prompt) -> completion text
+        self.window = max(0.0, float(window))
+        self.max_groups = max(1, int(max_groups))
+        self.max_tokens = max(1, int(max_tokens))
+        self.estimator = estimator or cjk_token_estimator
+        # per-group overhead: its line in the format example plus the marker above its chat log
+        self._marker_cost = self.estimator("[[G1]]\n(群 1 的总结)\n[[G1]]\n")
+        self._open: Dict[Hashable, _Batch] = {}
+        self._tasks = set()
+
+        # Stats
+        self.batches = 0
+        self.batched_groups = 0
+        self.singles = 0
+        self.fallbacks = 0
+
+    async def submit(self, key: Hashable, group_id: str, umo: str, prompt: str, section: str,
+                     frame: Callable[[str], str]) -> Optional[str]:
+        """加入 key 对应的批次并等待该群的总结文本"""
+        loop = asyncio.get_running_loop()
+        item = _Item(group_id, umo, prompt, section, self.estimator(section) + self._marker_cost, loop.create_future())
+        batch = self._open.get(key)
+        if batch is not None and batch.tokens + item.tokens > self.max_tokens:
+            self._flush(key) # token budget: this group starts the next batch
+            batch = None
+        if batch is None:
+            batch = self._open[key] = _Batch(frame)
+            batch.tokens = self.estimator(frame(BATCH_INSTRUCTIONS.format(count=0, markers="")))
+            batch.timer = loop.call_later(self.window, self._flush, key)
+        batch.items.append(item)
+        batch.tokens += item.tokens
+        if len(batch.items) >= self.max_groups:
+            self._flush(key)
+        return await item.future
+
+    def _flush(self, key: Hashable):
+        batch = self._open.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _single(self, item: _Item):
+        try:
+            result = await self.call(item.umo, item.prompt)
+        except Exception as e:
+            if not item.future.done():
+                item.future.set_exception(e)
+            return
+        if not item.future.done():
+            item.future.set_result(result)
+
+    async def _run(self, batch: _Batch):
+        items = batch.items
+        if len(items) == 1:
+            self.singles += 1
+            await self._single(items[0])
+            return
+
+        markers = "\n".join(f"[[G{i}]]\n(群 {i} 的总结)" for i in range(1, len(items) + 1))
+        body = BATCH_INSTRUCTIONS.format(count=len(items), markers=markers) + "\n".join(
+            f"[[G{i}]]\n{item.section}" for i, item in enumerate(items, 1)
+        )
+        self.batches += 1
+        self.batched_groups += len(items)
+        logger.info(f"[BuzzRadar] 批量总结: {len(items)} 个群合并为一次 LLM 调用 (约 {batch.tokens} tokens)")
+        try:
+            text = await self.call(items[0].umo, batch.frame(body))
+        except Exception as e:
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        missing = []
+        for item, part in zip(items, split_sections(text, len(items))):
+            if part is None:
+                missing.append(item)
+            elif not item.future.done():
+                item.future.set_result(part)
+        if missing:
+            self.fallbacks += len(missing)
+            logger.warning(f"[BuzzRadar] 批量总结缺少 {len(missing)} 个群的段落，改为单独调用。")
+            await asyncio.gather(*(self._single(item) for item in missing))
+
+    async def close(self):
+        """立即发出所有未满的批次并等待完成"""
+        for key in list(self._open):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": sum(len(b.items) for b in self._open.values()),
+            "batches": self.batches,
+            "batched_groups": self.batched_groups,
+            # provider calls avoided: n groups in one call instead of n
+            "saved_calls": self.batched_groups - self.batches - self.fallbacks,
+            "singles": self.singles,
+            "fallbacks": self.fallbacks,
+        }
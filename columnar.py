@@ -0,0 +1,220 @@
+import time
+import heapq
+import logging
+from array import array
+from collections.abc import Mapping
+
+try:
+    import numpy as np
+except ImportError: # optional: fall back to plain Python loops over the columns
+    np = None
+
+try:
+    from .state import GroupLogic, MessageRing
+    from .velocity import DEFAULT_SPEC, VelocitySpec, VelocityTracker
+except ImportError:
+    from state import GroupLogic, MessageRing
+    from velocity import DEFAULT_SPEC, VelocitySpec, VelocityTracker
+
+logger = logging.getLogger("astrbot")
+
+COLUMNS = (
+    "current_score", "max_score_cap", "trigger_threshold",
+    "last_update_time", "last_decay_time", "last_trigger_time",
+)
+
+def _column(name: str) -> property:
+    def fget(self):
+        return self._store.columns[name][self._slot]
+
+    def fset(self, value):
+        self._store.columns[name][self._slot] = value
+
+    return property(fget, fset)
+
+class GroupView(GroupLogic):
+    """
+    列式存储中某个群的轻量视图，属性直接读写对应列的槽位。
+    对外表现与 GroupState 一致，用完即弃，不常驻内存。
+    """
+    __slots__ = ("_store", "_slot")
+
+    def __init__(self, store: "ColumnarGroupStore", slot: int):
+        self._store = store
+        self._slot = slot
+
+    @property
+    def group_id(self) -> str:
+        return self._store.ids[self._slot]
+
+    @property
+    def history(self) -> MessageRing:
+        return self._store.histories[self._slot]
+
+    @property
+    def velocity(self) -> VelocityTracker:
+        return self._store.velocities[self._slot]
+
+    current_score = _column("current_score")
+    max_score_cap = _column("max_score_cap")
+    trigger_threshold = _column("trigger_threshold")
+    last_update_time = _column("last_update_time")
+    last_decay_time = _column("last_decay_time")
+    last_trigger_time = _column("last_trigger_time")
+
+class ColumnarGroupStore(Mapping):
+    """
+    面向 10 万+ 群的列式 (struct-of-arrays) 存储。
+
+    标量状态存放在并行的 array('d') 列中，通过 group_id -> slot 映射访问；释放的槽位进入空闲链表复用。
+    批量操作 (衰减、僵尸清理、Top-N) 对整列执行：安装了 numpy 时零拷贝地包装成 ndarray 向量化计算，
+    否则退化为逐槽位循环。
+    """
+    def __init__(self):
+        self.index = {} # group_id -> slot
+        self.ids = [] # slot -> group_id (None when free)
+        self.histories = [] # slot -> MessageRing
+        self.velocities = [] # slot -> VelocityTracker (its bucket ring is only allocated while active)
+        self.columns = {name: array("d") for name in COLUMNS}
+        self.alive = array("b")
+        self.free = []
+
+    # --- Mapping protocol ---
+    def __getitem__(self, group_id: str) -> GroupView:
+        return GroupView(self, self.index[group_id])
+
+    def __contains__(self, group_id) -> bool:
+        return group_id in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __delitem__(self, group_id: str):
+        self._release(self.index.pop(group_id))
+
+    # --- Slot management ---
+    def create(self, group_id: str, max_score_cap: int = 1000, trigger_threshold: int = 80,
+               history_size: int = 20, velocity_spec: VelocitySpec = DEFAULT_SPEC) -> GroupView:
+        if group_id in self.index:
+            del self[group_id]
+        now = time.time()
+        values = {
+            "current_score": 0.0,
+            "max_score_cap": max_score_cap,
+            "trigger_threshold": trigger_threshold,
+            "last_update_time": now,
+            "last_decay_time": now,
+            "last_trigger_time": 0.0,
+        }
+        ring = MessageRing(history_size)
+        velocity = VelocityTracker(velocity_spec)
+        if self.free:
+            slot = self.free.pop()
+            for name, col in self.columns.items():
+                col[slot] = values[name]
+            self.ids[slot] = group_id
+            self.histories[slot] = ring
+            self.velocities[slot] = velocity
+            self.alive[slot] = 1
+        else:
+            slot = len(self.ids)
+            for name, col in self.columns.items():
+                col.append(values[name])
+            self.ids.append(group_id)
+            self.histories.append(ring)
+            self.velocities.append(velocity)
+            self.alive.append(1)
+        self.index[group_id] = slot
+        return GroupView(self, slot)
+
+    def _release(self, slot: int):
+        self.ids[slot] = None
+        self.histories[slot] = None
+        self.velocities[slot] = None
+        self.alive[slot] = 0
+        self.columns["current_score"][slot] = 0.0
+        self.free.append(slot)
+
+    def _vec(self, name: str):
+        # Zero-copy ndarray over the column; must not outlive the current call (the array cannot grow while exported)
+        return np.frombuffer(self.columns[name], dtype=np.float64)
+
+    def _alive_mask(self):
+        return np.frombuffer(self.alive, dtype=np.int8) != 0
+
+    # --- Column-wide passes ---
+    def decay_all(self, now: float, rate_per_minute: float = 5, min_idle_seconds: float = 0) -> int:
+        """对空闲超过 min_idle_seconds 的群执行一次衰减，返回被更新的群数量。"""
+        if not self.index:
+            return 0
+        if np is not None:
+            score = self._vec("current_score")
+            last = self._vec("last_decay_time")
+            mask = self._alive_mask() & (now - last > min_idle_seconds)
+            decayed = score[mask] - (now - last[mask]) / 60.0 * rate_per_minute
+            score[mask] = np.maximum(decayed, 0.0)
+            last[mask] = now
+            return int(mask.sum())
+
+        score = self.columns["current_score"]
+        last = self.columns["last_decay_time"]
+        updated = 0
+        for slot in self.index.values():
+            elapsed = now - last[slot]
+            if elapsed > min_idle_seconds:
+                score[slot] = max(0.0, score[slot] - elapsed / 60.0 * rate_per_minute)
+                last[slot] = now
+                updated += 1
+        return updated
+
+    def decay_chunks(self, now: float, rate_per_minute: float = 5, min_idle_seconds: float = 0, chunk_size: int = 1000):
+        # A whole-column pass is already cheap enough to run in one go
+        yield self.decay_all(now, rate_per_minute, min_idle_seconds)
+
+    def sweep_chunks(self, now: float, max_idle_seconds: float, chunk_size: int = 1000):
+        yield self.sweep_idle(now, max_idle_seconds)
+
+    def sweep_idle(self, now: float, max_idle_seconds: float) -> list:
+        """移除超过 max_idle_seconds 未活动的群，槽位进入空闲链表。返回被移除的 group_id。"""
+        if not self.index:
+            return []
+        if np is not None:
+            last = self._vec("last_update_time")
+            slots = np.nonzero(self._alive_mask() & (now - last > max_idle_seconds))[0].tolist()
+            del last
+        else:
+            last = self.columns["last_update_time"]
+            slots = [slot for slot in self.index.values() if now - last[slot] > max_idle_seconds]
+        zombies = []
+        for slot in slots:
+            gid = self.ids[slot]
+            del self.index[gid]
+            self._release(slot)
+            zombies.append(gid)
+        return zombies
+
+    def top_n(self, n: int, now: float, rate_per_minute: float = 5) -> list:
+        """按 (计入衰减后的) 当前热度返回最热的 n 个群 [(group_id, score), ...]。"""
+        live = len(self.index)
+        n = min(n, live)
+        if n <= 0:
+            return []
+        if np is not None:
+            score = self._vec("current_score")
+            last = self._vec("last_decay_time")
+            effective = np.maximum(score - np.maximum(now - last, 0.0) / 60.0 * rate_per_minute, 0.0)
+            effective[~self._alive_mask()] = -np.inf
+            top = np.argpartition(-effective, n - 1)[:n]
+            top = top[np.argsort(-effective[top])]
+            return [(self.ids[slot], float(effective[slot])) for slot in top.tolist()]
+
+        score = self.columns["current_score"]
+        last = self.columns["last_decay_time"]
+
+        def effective(slot):
+            return max(0.0, score[slot] - max(0.0, now - last[slot]) / 60.0 * rate_per_minute)
+        ranked = heapq.nlargest(n, self.index.values(), key=effective)
+        return [(self.ids[slot], effective(slot)) for slot in ranked]
@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+class ContributorTracker:
+    """
+    单个群的发言者贡献统计: 防止一个人刷屏就把整个群的热度顶上去。
+
+    - 每个用户一个按 half_life 指数衰减的贡献计数 (惰性衰减，只在该用户再次发言时结算)，
+      全群总贡献用同一衰减率维护，因此都是 O(1)。
+    - credit(): 用户的贡献上限为 max(share_cap * 全群总贡献, allowance)，超出部分不计分。
+      allowance 让冷清的小群和刚开口的用户不受比例限制；一个人独自刷屏最多只能攒到 allowance。
+    - 计数表按最近发言排序 (LRU)，超过 max_users 时淘汰最久未发言的用户，内存有界。
+    - active(): 最近 window 秒内发过言的不同用户数 (另一个按时间排序的表，过期项从头部弹出，均摊 O(1))。
+    """
+    __slots__ = ("half_life", "window", "share_cap", "allowance", "max_users", "users", "recent", "total", "stamp")
+
+    def __init__(self, half_life: float = 60.0, window: float = 60.0, share_cap: float = 0.5,
+                 allowance: float = 10.0, max_users: int = 256):
+        self.half_life = max(1.0, float(half_life))
+        self.window = float(window)
+        self.share_cap = share_cap
+        self.allowance = allowance
+        self.max_users = max(1, int(max_users))
+        self.users = OrderedDict() # user -> [decayed contribution, last update]
+        self.recent = OrderedDict() # user -> last seen, oldest first
+        self.total = 0.0 # decayed sum of credited contributions
+        self.stamp = 0.0 # time `total` was last decayed to
+
+    def _decayed(self, value: float, since: float, now: float) -> float:
+        return value * 0.5 ** ((now - since) / self.half_life) if now > since else value
+
+    def credit(self, user: str, score: float, now: Optional[float] = None) -> float:
+        """记录一次发言，返回实际计入群热度的分数 (超出个人上限的部分被截掉)"""
+        now = time.time() if now is None else now
+        self.total = self._decayed(self.total, self.stamp, now)
+        self.stamp = max(self.stamp, now)
+
+        users = self.users
+        entry = users.get(user)
+        if entry is None:
+            if len(users) >= self.max_users:
+                users.popitem(last=False) # least recently active
+            entry = users[user] = [0.0, now]
+        else:
+            users.move_to_end(user)
+            entry[0] = self._decayed(entry[0], entry[1], now)
+            entry[1] = max(entry[1], now)
+
+        limit = max(self.share_cap * (self.total + score), self.allowance)
+        credited = min(score, max(0.0, limit - entry[0]))
+        entry[0] += credited
+        self.total += credited
+
+        recent = self.recent
+        recent[user] = now
+        recent.move_to_end(user)
+        self._expire(now)
+        return credited
+
+    def resize(self, max_users: int):
+        """修改跟踪人数上限 (重新加载配置时)，超出的最久未发言用户立即淘汰"""
+        self.max_users = max(1, int(max_users))
+        while len(self.users) > self.max_users:
+            self.users.popitem(last=False)
+        while len(self.recent) > self.max_users:
+            self.recent.popitem(last=False)
+
+    def _expire(self, now: float):
+        recent = self.recent
+        cutoff = now - self.window
+        while recent:
+            user, seen = next(iter(recent.items()))
+            if seen >= cutoff and len(recent) <= self.max_users:
+                break
+            del recent[user]
+
+    def active(self, now: Optional[float] = None) -> int:
+        """最近 window 秒内发言的不同用户数"""
+        self._expire(time.time() if now is None else now)
+        return len(self.recent)
+
+    def top(self, n: int = 3, now: Optional[float] = None) -> list:
+        """贡献最多的 n 个用户 [(user, 衰减后贡献), ...]，用于状态展示"""
+        now = time.time() if now is None else now
+        ranked = sorted(((u, self._decayed(v, t, now)) for u, (v, t) in self.users.items()),
+                        key=lambda item: item[1], reverse=True)
+        return [(u, round(v, 1)) for u, v in ranked[:n]]
@@ -0,0 +1,118 @@
+import time
+import logging
+from array import array
+from collections import OrderedDict
+from typing import Callable
+
+logger = logging.getLogger("astrbot")
+
+_MASK64 = (1 << 64) - 1
+
+def content_hash(content: str) -> int:
+    """
+    64 位内容指纹。只在进程内比较，不落盘，因此直接使用 str 自带 (且已缓存) 的 hash。
+    0 被保留为“空槽位”，故结果至少为 1。
+    """
+    return (hash(content) & _MASK64) or 1
+
+class _DedupEntry:
+    __slots__ = ("last_hash", "repeat", "recent", "pos", "touched")
+
+    def __init__(self, window: int, now: float):
+        self.last_hash = 0
+        self.repeat = 0
+        self.recent = array("Q", bytes(8 * window)) if window else None
+        self.pos = 0
+        self.touched = now
+
+class DedupStore:
+    """
+    有界、可过期的复读检测状态。
+
+    - 每个群只保存内容的 64 位哈希，不保留原文；
+    - 按最近使用顺序 (LRU) 淘汰，最多保留 max_groups 个群；超过 ttl 秒未活动的群视为过期；
+    - window > 0 时额外保留最近 window 条消息的哈希环，可识别 "666 / 777 / 666" 这类交替刷屏。
+    """
+    def __init__(self, max_groups: int = 5000, ttl: float = 3600, window: int = 0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._entries: "OrderedDict[str, _DedupEntry]" = OrderedDict()
+        self.evicted = 0
+        self.expired = 0
+        self.configure(max_groups, ttl, window)
+
+    def configure(self, max_groups: int, ttl: float, window: int):
+        self.max_groups = max(1, int(max_groups))
+        self.ttl = max(0.0, float(ttl))
+        self.window = max(0, int(window))
+        while len(self._entries) > self.max_groups:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _entry(self, group_id: str, now: float) -> _DedupEntry:
+        entries = self._entries
+        entry = entries.get(group_id)
+        if entry is not None:
+            stale = self.ttl and now - entry.touched > self.ttl
+            resized = (len(entry.recent) if entry.recent is not None else 0) != self.window
+            if stale or resized:
+                entry = None
+            else:
+                entries.move_to_end(group_id)
+        if entry is None:
+            entry = entries[group_id] = _DedupEntry(self.window, now)
+            entries.move_to_end(group_id)
+            if len(entries) > self.max_groups:
+                entries.popitem(last=False)
+                self.evicted += 1
+        entry.touched = now
+        self._expire_head(now)
+        return entry
+
+    def _expire_head(self, now: float):
+        # 最久未用的群在队头，过期的从头部弹出 (均摊 O(1))
+        if not self.ttl:
+            return
+        entries = self._entries
+        while entries:
+            head = next(iter(entries.values()))
+            if now - head.touched <= self.ttl:
+                break
+            entries.popitem(last=False)
+            self.expired += 1
+
+    def purge(self) -> int:
+        """主动清理所有过期的群，返回清理数量。"""
+        before = self.expired
+        self._expire_head(self.clock())
+        return self.expired - before
+
+    def is_repeat(self, group_id: str, content: str, threshold: int) -> bool:
+        """
+        记录一条消息并判断它是否为复读:
+        连续第 threshold 次及以后出现，或 (窗口模式下) 最近 window 条里已出现 threshold - 1 次。
+        首次出现的内容总是放行 (threshold <= 2 时即从第一次重复开始过滤)。
+        """
+        entry = self._entry(group_id, self.clock())
+        h = content_hash(content)
+
+        if h == entry.last_hash:
+            entry.repeat += 1
+        else:
+            entry.last_hash = h
+            entry.repeat = 1
+        noisy = entry.repeat >= max(2, threshold)
+
+        recent = entry.recent
+        if recent is not None:
+            if not noisy and recent.count(h) >= max(1, threshold - 1):
+                noisy = True
+            recent[entry.pos] = h
+            entry.pos = (entry.pos + 1) % len(recent)
+        return noisy
+
+    def stats(self) -> dict:
+        return {"groups": len(self._entries), "evicted": self.evicted, "expired": self.expired}
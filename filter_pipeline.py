@@ -0,0 +1,176 @@
+import re
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable, Iterable, List, Optional
+
+logger = logging.getLogger("astrbot")
+
+class AhoCorasick:
+    """
+    多关键词匹配自动机。构建一次后，对任意长度文本只需单次线性扫描即可判断是否命中任一关键词。
+    匹配不区分大小写。
+    """
+    def __init__(self, keywords: Iterable[str]):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [False]
+        self.size = 0
+        for kw in keywords:
+            kw = kw.strip().lower()
+            if kw:
+                self._insert(kw)
+                self.size += 1
+        self._build()
+
+    def _insert(self, word: str):
+        node = 0
+        for ch in word:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(False)
+            node = nxt
+        self._out[node] = True
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] or self._out[self._fail[nxt]]
+
+    def search(self, text: str) -> bool:
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text.lower():
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                return True
+        return False
+
+class FilterStage(ABC):
+    """
+    过滤流水线中的一级 (抽象基类，子类必须实现 check)。check 返回 True 表示该消息是噪音。
+    cost 越小越先执行；stateful 的阶段 (会修改内部状态) 总是排在最后，保证只有前面都放行的消息才会影响其状态。
+    """
+    name = "stage"
+    cost = 0
+    stateful = False
+
+    def __init__(self):
+        self.checked = 0
+        self.hits = 0
+
+    @abstractmethod
+    def check(self, content: str, group_id: str) -> bool:
+        ...
+
+class LengthStage(FilterStage):
+    name = "length"
+    cost = 0
+
+    def __init__(self, min_len: int):
+        super().__init__()
+        self.min_len = min_len
+
+    def check(self, content, group_id):
+        return len(content.strip()) < self.min_len
+
+class RegexStage(FilterStage):
+    name = "regex"
+    cost = 1
+
+    def __init__(self, pattern: "re.Pattern"):
+        super().__init__()
+        self.pattern = pattern
+
+    def check(self, content, group_id):
+        return self.pattern.search(content) is not None
+
+class KeywordStage(FilterStage):
+    name = "keyword"
+    cost = 2
+
+    def __init__(self, automaton: AhoCorasick):
+        super().__init__()
+        self.automaton = automaton
+
+    def check(self, content, group_id):
+        return self.automaton.search(content)
+
+class CallableStage(FilterStage):
+    """包装外部状态 (如复读检测) 的阶段。"""
+    stateful = True
+
+    def __init__(self, name: str, func: Callable[[str, str], bool], cost: int = 10):
+        super().__init__()
+        self.name = name
+        self.cost = cost
+        self.func = func
+
+    def check(self, content, group_id):
+        return self.func(content, group_id)
+
+def compile_patterns(patterns: Iterable[str]) -> Optional["re.Pattern"]:
+    """
+    将多个正则合并为一个交替分支 (?:a)|(?:b)，只编译一次。非法的正则会被跳过并记录日志。
+    """
+    valid = []
+    for p in patterns:
+        if not p:
+            continue
+        try:
+            re.compile(p)
+            valid.append(f"(?:{p})")
+        except re.error as e:
+            logger.error(f"[BuzzRadar] 忽略非法正则 {p!r}: {e}")
+    if not valid:
+        return None
+    return re.compile("|".join(valid))
+
+class FilterPipeline:
+    """
+    由清洗配置编译出的过滤流水线。按 cost 升序执行，第一个命中的阶段即拒绝该消息。
+    """
+    def __init__(self, stages: List[FilterStage]):
+        self.stages = sorted(stages, key=lambda s: (s.stateful, s.cost))
+
+    @classmethod
+    def from_config(cls, cleaning_conf: dict, extra_stages: Iterable[FilterStage] = ()) -> "FilterPipeline":
+        stages: List[FilterStage] = [LengthStage(cleaning_conf.get("min_text_length", 2))]
+
+        patterns = [cleaning_conf.get("ignore_regex", "^[#/!]")]
+        patterns.extend(cleaning_conf.get("ignore_patterns", []) or [])
+        pattern = compile_patterns(patterns)
+        if pattern is not None:
+            stages.append(RegexStage(pattern))
+
+        automaton = AhoCorasick(cleaning_conf.get("keyword_blocklist", []) or [])
+        if automaton.size:
+            stages.append(KeywordStage(automaton))
+
+        stages.extend(extra_stages)
+        return cls(stages)
+
+    def check(self, content: str, group_id: str) -> Optional[str]:
+        """返回拒绝该消息的阶段名，放行时返回 None。"""
+        for stage in self.stages:
+            stage.checked += 1
+            if stage.check(content, group_id):
+                stage.hits += 1
+                return stage.name
+        return None
+
+    def stats(self) -> List[dict]:
+        return [{"stage": s.name, "checked": s.checked, "hits": s.hits} for s in self.stages]
@@ -0,0 +1,213 @@
+import asyncio
+import time
+import logging
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+try:
+    from .streaming import LatencyStats, complete, supports_streaming
+except ImportError:
+    from streaming import LatencyStats, complete, supports_streaming
+
+logger = logging.getLogger("astrbot")
+
+class LLMGateway:
+    """
+    所有总结请求的 LLM 出口。
+
+    - provider 解析缓存: 按会话 (umo) 缓存 get_current_chat_provider_id / get_using_provider 的结果，
+      ttl 过期或调用失败后重新解析；invalidate() 手动清除 (例如管理员切换了模型)。
+    - 每次调用有截止时间 (timeout)，超时视为失败；失败按指数退避重试 retries 次。
+      流式输出已经发出内容后不再重试，避免重复发送。
+    - 对冲请求 (hedge): 主 provider 的耗时超过其 p95 (来自 LatencyStats 的直方图) 仍未返回、
+      也还没开始流式输出时，同时向备用 provider 发同一请求，先返回者胜出，另一个被取消。
+      对冲期间主 provider 的流式增量先缓存，主 provider 胜出时再一次性交给 on_delta。
+    """
+    def __init__(self, context, latency: Optional[LatencyStats] = None, timeout: float = 60,
+                 retries: int = 1, backoff: float = 2.0, cache_ttl: float = 600, max_sessions: int = 1024,
+                 hedge_provider_id: str = "", hedge_quantile: float = 0.95, hedge_min_samples: int = 20,
+                 clock: Callable[[], float] = time.monotonic):
+        self.context = context
+        self.latency = latency or LatencyStats()
+        self.timeout = max(0.0, float(timeout))
+        self.retries = max(0, int(retries))
+        self.backoff = max(0.0, float(backoff))
+        self.cache_ttl = max(0.0, float(cache_ttl))
+        self.max_sessions = max(1, int(max_sessions))
+        self.hedge_provider_id = hedge_provider_id
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.clock = clock
+        self._resolved: "OrderedDict[str, Tuple[str, object, float]]" = OrderedDict() # umo -> (provider_id, provider, expires)
+
+        # Stats
+        self.resolutions = 0
+        self.cache_hits = 0
+        self.timeouts = 0
+        self.retried = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def from_config(cls, context, conf, **kwargs) -> "LLMGateway":
+        return cls(
+            context,
+            timeout=conf.get("timeout_seconds", 60),
+            retries=conf.get("retries", 1),
+            backoff=conf.get("retry_backoff_seconds", 2),
+            cache_ttl=conf.get("provider_cache_minutes", 10) * 60,
+            hedge_provider_id=conf.get("hedge_provider_id", "") if conf.get("hedge", False) else "",
+            hedge_quantile=conf.get("hedge_quantile", 0.95),
+            hedge_min_samples=conf.get("hedge_min_samples", 20),
+            **kwargs
+        )
+
+    # --- Provider resolution ---
+    def _lookup(self, provider_id: str):
+        """provider_id -> provider 对象 (不支持按 id 获取时返回 None，改走 context.llm_generate)"""
+        getter = getattr(self.context, "get_provider_by_id", None)
+        return getter(provider_id) if getter is not None and provider_id else None
+
+    async def resolve(self, umo: str) -> Tuple[Optional[str], object]:
+        """返回会话当前使用的 (provider_id, provider 对象或 None)"""
+        now = self.clock()
+        cached = self._resolved.get(umo)
+        if cached is not None and cached[2] > now:
+            self._resolved.move_to_end(umo)
+            self.cache_hits += 1
+            return cached[0], cached[1]
+
+        self.resolutions += 1
+        if hasattr(self.context, "get_current_chat_provider_id"):
+            # AstrBot v4.5.7+
+            provider_id = await self.context.get_current_chat_provider_id(umo)
+            provider = self._lookup(provider_id)
+        else:
+            # Fallback for older versions
+            provider = self.context.get_using_provider(umo=umo)
+            if not provider:
+                raise Exception("No LLM Provider found")
+            try:
+                provider_id = provider.meta().id
+            except Exception:
+                provider_id = None
+
+        if self.cache_ttl:
+            self._resolved[umo] = (provider_id, provider, now + self.cache_ttl)
+            self._resolved.move_to_end(umo)
+            while len(self._resolved) > self.max_sessions:
+                self._resolved.popitem(last=False)
+        return provider_id, provider
+
+    def invalidate(self, umo: str = None):
+        """清除某个会话 (或全部) 的 provider 解析缓存"""
+        if umo is None:
+            self._resolved.clear()
+        else:
+            self._resolved.pop(umo, None)
+
+    # --- Calls ---
+    async def _invoke(self, provider_id: Optional[str], provider, prompt: str, on_delta=None) -> Optional[str]:
+        streamed = on_delta is not None and supports_streaming(provider)
+        if streamed or not (provider_id and hasattr(self.context, "llm_generate")):
+            if provider is None:
+                raise Exception("No LLM Provider found")
+            return await complete(provider, prompt, on_delta, self.latency, provider_id, self.clock)
+        start = self.clock()
+        try:
+            response = await self.context.llm_generate(chat_provider_id=provider_id, prompt=prompt)
+        except Exception:
+            self.latency.record_failure(provider_id)
+            raise
+        self.latency.record(provider_id, None, self.clock() - start)
+        return response.completion_text if response else None
+
+    async def _hedged(self, provider_id: Optional[str], provider, prompt: str, on_delta=None) -> Optional[str]:
+        secondary_id = self.hedge_provider_id
+        delay = None
+        if secondary_id and secondary_id != provider_id:
+            delay = self.latency.quantile(provider_id, self.hedge_quantile, self.hedge_min_samples)
+        if delay is None:
+            return await self._invoke(provider_id, provider, prompt, on_delta)
+
+        held = [] # primary deltas received after the hedge started
+        started = hedging = False
+
+        def forward(delta: str):
+            nonlocal started
+            started = True
+            if hedging:
+                held.append(delta)
+            else:
+                on_delta(delta)
+
+        primary = asyncio.ensure_future(self._invoke(provider_id, provider, prompt, forward if on_delta else None))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done or started:
+                return await primary # finished, or already streaming: no point in hedging
+
+            hedging = True
+            self.hedged += 1
+            logger.info(f"[BuzzRadar] LLM {provider_id} 超过 p{int(self.hedge_quantile * 100)} ({delay:.1f}s)，对冲请求 {secondary_id}")
+            secondary = asyncio.ensure_future(self._invoke(secondary_id, self._lookup(secondary_id), prompt))
+            pending = {primary, secondary}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is secondary:
+                        self.hedge_wins += 1
+                    else:
+                        for delta in held:
+                            on_delta(delta)
+                    return task.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel() # the losing (or abandoned) request
+
+    async def call(self, umo: str, prompt: str, on_delta: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """向会话的 provider 发送 prompt，返回完整回复文本；超时 / 失败时重试，最终失败抛出异常。"""
+        emitted = False
+
+        def emit(delta: str):
+            nonlocal emitted
+            emitted = True
+            on_delta(delta)
+
+        attempt = 0
+        while True:
+            provider_id, provider = await self.resolve(umo)
+            try:
+                coro = self._hedged(provider_id, provider, prompt, emit if on_delta else None)
+                return await (asyncio.wait_for(coro, self.timeout) if self.timeout else coro)
+            except Exception as e:
+                error = e
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                    self.latency.record_failure(provider_id)
+                    error = TimeoutError(f"LLM 调用超时 ({self.timeout:g}s)")
+                self.invalidate(umo) # the session may have switched providers
+                if attempt >= self.retries or emitted:
+                    raise error
+                delay = self.backoff * 2 ** attempt
+                attempt += 1
+                self.retried += 1
+                logger.warning(f"[BuzzRadar] LLM 调用失败 ({provider_id}): {error}，{delay:.1f}s 后重试 ({attempt}/{self.retries})")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._resolved),
+            "resolutions": self.resolutions,
+            "cache_hits": self.cache_hits,
+            "timeouts": self.timeouts,
+            "retried": self.retried,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
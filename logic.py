@@ -1,82 +1,163 @@
-import re
 import logging
+from typing import Optional
+
+try:
+    from .filter_pipeline import FilterPipeline, CallableStage
+    from .dedup import DedupStore
+    from .settings import as_store
+except ImportError:
+    from filter_pipeline import FilterPipeline, CallableStage
+    from dedup import DedupStore
+    from settings import as_store
 
 logger = logging.getLogger("astrbot")
 
 class MessageFilter:
-    def __init__(self, config: dict):
-        self.config = config
-        self.last_content = {} # group_id -> content string (for deduplication)
-        self.dedup_counter = {} # group_id -> count of consecutive dupes
+    def __init__(self, config):
+        self.settings = as_store(config)
+        self.dedup = DedupStore() # group_id -> 64-bit content hashes (bounded LRU/TTL)
+        
+        # Compiled pipeline, rebuilt only when the cleaning_settings snapshot changes
+        self._conf_ref = None
+        self._applied = None
+        self._dedup_limit = 3
+        self.pipeline = None
+        self._get_pipeline()
+
+    def _get_pipeline(self) -> FilterPipeline:
+        cleaning_conf = self.settings.current.cleaning_settings
+        if cleaning_conf is not self._conf_ref:
+            self._conf_ref = cleaning_conf
+            # A reload that leaves this section unchanged keeps the compiled pipeline and dedup state
+            if cleaning_conf != self._applied:
+                self._applied = cleaning_conf
+                self._dedup_limit = cleaning_conf.deduplicate_threshold
+                self.dedup.configure(
+                    max_groups=cleaning_conf.dedup_max_groups,
+                    ttl=cleaning_conf.dedup_ttl_minutes * 60,
+                    window=cleaning_conf.dedup_window
+                )
+                self.pipeline = FilterPipeline.from_config(
+                    cleaning_conf,
+                    extra_stages=[CallableStage("dedup", self._is_repeat)]
+                )
+                logger.debug(f"[BuzzRadar] 过滤流水线已重建: {[s.name for s in self.pipeline.stages]}")
+        return self.pipeline
+
+    def reload(self):
+        """原始配置被修改后调用: 重新构建配置快照并按需重建流水线。"""
+        self.settings.reload()
+        self._get_pipeline()
+
+    def check(self, content: str, group_id: str) -> Optional[str]:
+        """返回拦截该消息的过滤阶段名；有效信号返回 None"""
+        stage = self._get_pipeline().check(content, group_id)
+        if stage is not None:
+            logger.debug(f"[BuzzRadar] 过滤 ({stage}): {content}")
+        return stage
 
     def is_noise(self, content: str, group_id: str) -> bool:
         """
         判断消息是否为噪音。
         返回 True 表示是噪音（应被忽略），False 表示是有效信号。
         """
-        cleaning_conf = self.config.get("cleaning_settings", {})
-        
-        # 1. 长度过滤
-        min_len = cleaning_conf.get("min_text_length", 2)
-        if len(content.strip()) < min_len:
-            logger.debug(f"[BuzzRadar] 过滤短文本: {content}")
-            return True
-
-        # 2. 正则过滤 (指令等)
-        ignore_regex = cleaning_conf.get("ignore_regex", "^[#/!]")
-        if re.search(ignore_regex, content):
-            logger.debug(f"[BuzzRadar] 过滤正则匹配: {content}")
-            return True
-
-        # 3. 复读机过滤
-        dedup_limit = cleaning_conf.get("deduplicate_threshold", 3)
-        last = self.last_content.get(group_id, "")
-        if content == last:
-            self.dedup_counter[group_id] = self.dedup_counter.get(group_id, 0) + 1
-            if self.dedup_counter[group_id] >= dedup_limit:
-                logger.debug(f"[BuzzRadar] 过滤复读机: {content} (x{self.dedup_counter[group_id]})")
-                return True
-        else:
-            self.last_content[group_id] = content
-            self.dedup_counter[group_id] = 1
-            
-        return False
+        return self.check(content, group_id) is not None
+
+    def _is_repeat(self, content: str, group_id: str) -> bool:
+        # 复读机过滤
+        return self.dedup.is_repeat(group_id, content, self._dedup_limit)
+
+    def stats(self) -> list:
+        """各过滤阶段的检查数 / 命中数"""
+        return self.pipeline.stats()
+
+# AstrBot component class name -> (weight key in score_weights, is_media)
+# Media is what the message *is* (a picture is worth image_score instead of base_score);
+# interactions (reply / @) are bonuses on top.
+COMPONENT_RULES = {
+    "Image": ("image_score", True),
+    "Video": ("video_score", True),
+    "Record": ("record_score", True),
+    "Face": ("face_score", True),
+    "Forward": ("forward_score", True),
+    "Node": ("forward_score", True),
+    "Nodes": ("forward_score", True),
+    "Reply": ("reply_bonus", False),
+    "At": ("at_bonus", False),
+    "AtAll": ("at_bonus", False),
+}
+
+LONG_TEXT_LENGTH = 15
 
 class ScoreEngine:
-    def __init__(self, config: dict):
-        self.config = config
+    """
+    单次遍历消息链计算热度分，按组件类型查表分派 (type -> (权重, 是否媒体, 权重键))。
+
+    - 类型只在首次出现时按类名 (含父类) 解析一次，之后都是一次 dict 查找。
+    - 同一条消息里同类组件 (同一权重键) 重复出现时收益递减: 第 k 个 (从 0 计) 记 weight * repeat_decay^k。
+    - 分数 = max(base_score, 媒体分之和) + 互动加分 (回复 / @) + 长文加分。
+    - 规则表随 score_weights 配置快照重建；register() 可为新的组件类型添加规则。
+    """
+    def __init__(self, config):
+        self.settings = as_store(config)
+        self.rules = dict(COMPONENT_RULES)
+        self._conf_ref = None
+        self._weights = {} # class name -> (weight, is_media, weight_key), from the current snapshot
+        self._dispatch = {} # component type -> rule or None
+
+    def register(self, type_name: str, weight_key: str, media: bool = False):
+        """为组件类名添加计分规则 (权重取自 score_weights 中的 weight_key)"""
+        self.rules[type_name] = (weight_key, media)
+        self._conf_ref = None
+
+    def _table(self) -> dict:
+        score_conf = self.settings.current.score_weights
+        if score_conf is not self._conf_ref:
+            self._conf_ref = score_conf
+            self._weights = {name: (float(score_conf.get(key, 0) or 0), media, key)
+                             for name, (key, media) in self.rules.items()}
+            self._dispatch = {}
+        return self._dispatch
+
+    def _resolve(self, component_type: type):
+        for klass in component_type.__mro__:
+            rule = self._weights.get(klass.__name__)
+            if rule is not None:
+                return rule if rule[0] else None # zero weight: skip the type entirely
+        return None
     
-    def calculate_score(self, event) -> int:
+    def calculate_score(self, event) -> float:
         """
         计算单条消息的热度分。
         """
-        score_conf = self.config.get("score_weights", {})
-        base_score = score_conf.get("base_score", 1)
-        score = base_score
+        dispatch = self._table()
+        score_conf = self._conf_ref
+        decay = score_conf.repeat_decay
         
-        # 获取消息链和纯文本
-        message_chain = event.get_messages()
-        text_content = event.message_str or ""
+        media = 0.0
+        bonus = 0.0
+        seen = {} # weight key -> occurrences so far in this message
+        for component in event.get_messages():
+            component_type = type(component)
+            try:
+                rule = dispatch[component_type]
+            except KeyError:
+                rule = dispatch[component_type] = self._resolve(component_type)
+            if rule is None:
+                continue
+            weight, is_media, kind = rule
+            n = seen.get(kind, 0)
+            seen[kind] = n + 1
+            value = weight * decay ** n if n else weight
+            if is_media:
+                media += value
+            else:
+                bonus += value
         
-        # 1. 图片/表情包加分
-        has_image = False
-        for component in message_chain:
-            # 简单判断: 如果是图片组件 (实际需根据 AstrBot 组件类型判断，这里假设 type name)
-            # Adapt to actual AstrBot component types later
-            if type(component).__name__ in ["Image", "Face", "Record", "Video"]:
-                has_image = True
-                break
-        
-        if has_image:
-            score = max(score, score_conf.get("image_score", 2))
-
-        # 2. 长文本加分
-        if len(text_content) > 15:
-            score += score_conf.get("long_text_bonus", 1)
+        score = max(score_conf.base_score, media) + bonus
 
-        # 3. 回复/引用加分 (Need to check event structure for reply)
-        # 暂时留空，待确认 AstrBot 回复判断逻辑
-        # if event.is_reply:
-            # score += score_conf.get("reply_bonus", 2)
+        # 长文加分
+        if len(event.message_str or "") > LONG_TEXT_LENGTH:
+            score += score_conf.long_text_bonus
             
         return score
@@ -1,4 +1,8 @@
 import os
+import time
+import random
+import asyncio
+from dataclasses import fields
 
 from astrbot.api.event import filter, AstrMessageEvent, MessageEventResult
 from astrbot.api.star import Context, Star, register, StarTools
@@ -10,37 +14,166 @@ try:
     from .logic import MessageFilter, ScoreEngine
     from .radar import RadarSystem
     from .sampler import ContentSampler
+    from .salience import SalienceRanker
     from .persona import PersonaManager
+    from .summary_queue import SummaryQueue, SummaryJob
+    from .ratelimit import HierarchicalRateLimiter
+    from .scheduler import MaintenanceScheduler
+    from .settings import ConfigStore
+    from .singleflight import SingleFlight
+    from .streaming import LatencyStats, StreamChunker
+    from .llm_gateway import LLMGateway
+    from .batcher import SummaryBatcher
+    from .metrics import Metrics
 except ImportError:
     from logic import MessageFilter, ScoreEngine
     from radar import RadarSystem
     from sampler import ContentSampler
+    from salience import SalienceRanker
     from persona import PersonaManager
+    from summary_queue import SummaryQueue, SummaryJob
+    from ratelimit import HierarchicalRateLimiter
+    from scheduler import MaintenanceScheduler
+    from settings import ConfigStore
+    from singleflight import SingleFlight
+    from streaming import LatencyStats, StreamChunker
+    from llm_gateway import LLMGateway
+    from batcher import SummaryBatcher
+    from metrics import Metrics
+
+# Settings read only when a component or a group's state is created: /radar reload can't apply them.
+# section -> keys (None: the whole section)
+RESTART_REQUIRED = {
+    "storage_settings": None,
+    "summary_settings": ("queue_size", "worker_count", "history_size"),
+    "trigger_settings": ("velocity_bucket_seconds", "velocity_baseline_minutes", "velocity_baseline_floor",
+                         "max_score_cap", "trigger_threshold"),
+}
+
+def restart_required(old, new) -> list:
+    """两个配置快照之间变化了、但需要重启插件才会生效的设置项 (section.key)"""
+    changed = []
+    for section, keys in RESTART_REQUIRED.items():
+        before, after = getattr(old, section), getattr(new, section)
+        if before == after:
+            continue
+        for key in keys or [f.name for f in fields(before)]:
+            if getattr(before, key) != getattr(after, key):
+                changed.append(f"{section}.{key}")
+    return changed
 
 @register("buzz_radar", "YourName", "智能群聊热度雷达", "2.0.0")
 class BuzzRadarPlugin(Star):
     def __init__(self, context: Context, config: AstrBotConfig):
         super().__init__(context)
         self.config = config
+        # Validated, immutable snapshot of the config shared by all components; swapped on /radar reload
+        self.settings = ConfigStore(self.config)
+        settings = self.settings.current
         
         # Initialize Components
-        self.msg_filter = MessageFilter(self.config)
-        self.score_engine = ScoreEngine(self.config)
+        self.msg_filter = MessageFilter(self.settings)
+        self.score_engine = ScoreEngine(self.settings)
+        # Hot-path stage timers (sampled) + counters; /radar metrics and the optional Prometheus text file
+        self.metrics = Metrics.from_config(settings.metrics_settings)
         
         # Use StarTools for correct data path
         plugin_data_dir = StarTools.get_data_dir("buzz_radar")
+        self.data_dir = plugin_data_dir
         persistence_file = os.path.join(plugin_data_dir, "persistence.json")
-        self.radar = RadarSystem(self.config, persistence_path=persistence_file)
+        self.radar = RadarSystem(self.settings, persistence_path=persistence_file)
+        
+        summary_conf = settings.summary_settings
+        self.sampler = self._build_sampler(summary_conf)
+        # Per-provider time-to-first-token / total latency of summary calls
+        self.llm_latency = LatencyStats()
+        # Provider resolution cache + deadlines / retries / hedging for every LLM call
+        self.llm_gateway = LLMGateway.from_config(self.context, settings.llm_settings, latency=self.llm_latency)
+        # Single-flight + short-lived cache for LLM summaries
+        self.summary_flight = SingleFlight(
+            ttl=summary_conf.cache_ttl_minutes * 60,
+            min_similarity=summary_conf.cache_similarity
+        )
+        # Opt-in cross-group batching: groups triggering within a short window share one LLM call
+        self.summary_batcher = SummaryBatcher(
+            lambda umo, prompt: self.llm_gateway.call(umo, prompt),
+            window=summary_conf.batch_window_seconds,
+            max_groups=summary_conf.batch_max_groups,
+            max_tokens=summary_conf.batch_token_budget
+        )
+        self.persona_manager = PersonaManager(self.settings)
+        
+        # Circuit Breaker: global / per-group / per-provider token buckets
+        rate_conf = settings.rate_limit_settings
+        self.rate_limiter = HierarchicalRateLimiter.from_config(rate_conf)
+        
+        # Summary job queue: keeps the delay + LLM round-trip off the message handler
+        self.summary_queue = SummaryQueue(
+            self._run_summary_job,
+            max_size=summary_conf.queue_size,
+            workers=summary_conf.worker_count,
+            delay_range=(summary_conf.min_delay_seconds, summary_conf.max_delay_seconds),
+            gate=self._acquire_llm_slot,
+            max_defer=rate_conf.max_defer_seconds,
+            # Batch mode: workers don't wait on the batcher, and the humanization delay runs in _run_summary_job
+            detach=summary_conf.batch
+        )
         
-        self.sampler = ContentSampler()
-        self.persona_manager = PersonaManager(self.config)
+        # Drops already counted by the queue, reported as circuit-breaker outcomes
+        self.metrics.add_collector(lambda: {"breaker_total": {
+            "queue_full": self.summary_queue.dropped,
+            "abandoned": self.summary_queue.rate_limited,
+        }})
         
-        # Circuit Breaker state
-        self.last_llm_call = 0
-        self.llm_call_count = 0 
+        # Background maintenance: zombie sweeps, batched persistence flushes, idle pre-decay
+        self.scheduler = self._build_scheduler()
+        self._start_background()
         
         logger.info("[BuzzRadar] 插件已加载。智能热度监控启动。")
 
+    @staticmethod
+    def _build_sampler(summary_conf) -> ContentSampler:
+        """Context selection: salience ranking (default) or positional head/middle/tail sampling"""
+        ranker = None
+        if summary_conf.context_strategy == "salience":
+            ranker = SalienceRanker(top_k=summary_conf.context_top_k)
+        return ContentSampler(max_length=summary_conf.context_token_budget, ranker=ranker)
+
+    def _build_scheduler(self) -> MaintenanceScheduler:
+        conf = self.settings.current.maintenance_settings
+        jitter = conf.jitter_ratio
+        chunk_size = conf.chunk_size
+        scheduler = MaintenanceScheduler()
+
+        async def sweep_zombies():
+            await self.radar.sweep_zombies(conf.zombie_idle_days, chunk_size)
+            self.msg_filter.dedup.purge()
+
+        async def predecay():
+            await self.radar.predecay_idle(conf.predecay_idle_seconds, chunk_size)
+
+        scheduler.add_job("zombie_sweep", sweep_zombies, conf.zombie_sweep_minutes * 60, jitter)
+        scheduler.add_job("persistence_flush", self.radar.persistence.flush_async, conf.flush_interval_seconds, jitter)
+        scheduler.add_job("predecay", predecay, conf.predecay_interval_seconds, jitter)
+
+        metrics_conf = self.settings.current.metrics_settings
+        if metrics_conf.prometheus_file:
+            path = os.path.join(self.data_dir, metrics_conf.prometheus_file) # absolute paths are kept as-is
+
+            async def dump_metrics():
+                await self.metrics.dump_async(path)
+
+            scheduler.add_job("metrics_dump", dump_metrics, metrics_conf.dump_interval_seconds, jitter)
+        return scheduler
+
+    def _start_background(self):
+        """Start background tasks once an event loop is available"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return # not inside a loop yet (e.g. tests); handle_message retries
+        self.scheduler.start()
+
     def _draw_progress_bar(self, current: float, total: int, length: int = 10) -> str:
         """Helper to draw ASCII progress bar"""
         if total <= 0: return "[]"
@@ -91,27 +224,109 @@ class BuzzRadarPlugin(Star):
         threshold = state['threshold']
         cap = state['max_score']
         cooldown = state['remaining_cooldown']
+        rate_1m, rate_5m, rate_15m = state['rates']
         
         bar_trigger = self._draw_progress_bar(score, threshold, 10)
         bar_cap = self._draw_progress_bar(score, cap, 10)
         
         cooldown_text = f"❄️ 冷却中 ({int(cooldown)}s)" if cooldown > 0 else "✅ 监控中"
         
-        current_persona = self.persona_manager.get_persona()
+        current_persona = self.persona_manager.get_persona(group_id)
+        q = self.summary_queue.stats()
+        filter_hits = " | ".join(f"{s['stage']} {s['hits']}" for s in self.msg_filter.stats())
+        keywords = "、".join(self.radar.hot_keywords(group_id)) or "暂无"
+        top_users = "、".join(f"{user} {share}" for user, share in state['top_users']) or "暂无"
         
         msg = (
             f"📊 BuzzRadar 实时监控\n"
             f"-----------------------\n"
             f"🔥 当前热度: {score} 分\n"
+            f"🚀 速率: {rate_1m:.1f} / {rate_5m:.1f} / {rate_15m:.1f} 分/分钟 (1/5/15m) | 基线 {state['baseline']:.1f} (z={state['zscore']:.1f})\n"
+            f"💬 正在聊: {keywords}\n"
+            f"👥 活跃: {state['active_users']} 人 (1m) | 贡献最多: {top_users}\n"
             f"-----------------------\n"
             f"[触发阈值]: {bar_trigger}\n"
             f"[热度封顶]: {bar_cap}\n"
             f"-----------------------\n"
             f"Status: {cooldown_text}\n"
-            f"Persona: {current_persona['name']}"
+            f"Persona: {current_persona['name']}\n"
+            f"Queue: {q['depth']}/{q['capacity']} | 平均等待 {q['avg_wait']:.1f}s | 丢弃 {q['dropped']}\n"
+            f"限流: 延后 {q['deferred']} (待重试 {q['deferred_pending']}) | 超时放弃 {q['rate_limited']}\n"
+            f"过滤命中: {filter_hits}"
         )
         yield event.plain_result(msg)
 
+    @radar_cmd.command("top")
+    async def show_top(self, event: AstrMessageEvent):
+        """显示全局最热的群"""
+        if not self._is_admin(event):
+             yield event.plain_result("🚫 权限不足")
+             return
+
+        top = self.radar.hottest_groups(5)
+        if not top:
+            yield event.plain_result("❄️ 暂无热度记录。")
+            return
+
+        lines = [f"{i}. {gid}: {score:.1f} 分" for i, (gid, score) in enumerate(top, 1)]
+        yield event.plain_result("🏆 热度排行\n-----------------------\n" + "\n".join(lines))
+
+    @radar_cmd.command("jobs")
+    async def show_jobs(self, event: AstrMessageEvent):
+        """显示后台维护任务状态"""
+        if not self._is_admin(event):
+             yield event.plain_result("🚫 权限不足")
+             return
+
+        now = time.time()
+        lines = []
+        for job in self.scheduler.stats():
+            last = f"{int(now - job['last_run'])}s 前" if job['last_run'] else "未运行"
+            lines.append(
+                f"{job['name']}: 每 {int(job['interval'])}s | 上次 {last} | "
+                f"耗时 {job['last_duration'] * 1000:.1f}ms (max {job['max_duration'] * 1000:.1f}ms) | "
+                f"运行 {job['runs']} 次, 失败 {job['failures']}"
+            )
+        p = self.radar.persistence.stats()
+        lines.append(
+            f"持久化: 写入 {p['flushes']} 次 (失败 {p['failures']}, 待写 {p['pending']}) | "
+            f"上次 {p['last_latency'] * 1000:.1f}ms / {p['last_bytes']} B | 累计 {p['total_bytes']} B\n"
+            f"Journal {p['journal_bytes']} B | 快照 {p['snapshot_bytes']} B (压缩 {p['compactions']} 次) | 索引 {p['indexed']} 个群, 已载入 {p['hydrated']}"
+        )
+        c = self.summary_flight.stats()
+        lines.append(
+            f"总结缓存: {c['entries']} 条 | LLM 调用 {c['calls']} | 命中 {c['hits']} (近似 {c['near_hits']}) | 合并 {c['coalesced']}"
+        )
+        for stat in self.llm_latency.stats():
+            lines.append(
+                f"LLM {stat['provider']}: {stat['calls']} 次 (流式 {stat['streamed']}, 失败 {stat['failures']}) | "
+                f"首字 {stat['avg_ttft']:.2f}s (max {stat['max_ttft']:.2f}s) | 总耗时 {stat['avg_latency']:.2f}s "
+                f"(p95 {stat['p95_latency']:.2f}s, max {stat['max_latency']:.2f}s)"
+            )
+        b = self.summary_batcher.stats()
+        lines.append(
+            f"批量总结: {b['batches']} 批 / {b['batched_groups']} 个群 (节省 {b['saved_calls']} 次调用) | "
+            f"单独 {b['singles']} | 拆分失败补调 {b['fallbacks']} | 等待中 {b['pending']}"
+        )
+        g = self.llm_gateway.stats()
+        lines.append(
+            f"LLM 网关: 缓存 {g['sessions']} 个会话 (解析 {g['resolutions']}, 命中 {g['cache_hits']}) | "
+            f"超时 {g['timeouts']} | 重试 {g['retried']} | 对冲 {g['hedged']} (备用胜出 {g['hedge_wins']})"
+        )
+        status = "运行中" if self.scheduler.running else "未启动"
+        yield event.plain_result(f"🛠️ 后台任务 ({status})\n-----------------------\n" + "\n".join(lines))
+
+    @radar_cmd.command("metrics")
+    async def show_metrics(self, event: AstrMessageEvent):
+        """显示消息处理各阶段耗时与计数"""
+        if not self._is_admin(event):
+             yield event.plain_result("🚫 权限不足")
+             return
+
+        every = self.metrics.sample_every
+        sampling = f"每 {every} 条采样 1 条" if every else "采样关闭"
+        yield event.plain_result(f"📈 运行指标 ({sampling})\n-----------------------\n" + "\n".join(self.metrics.report()))
+
     @radar_cmd.command("calm")
     @radar_cmd.command("降温")
     async def calm_down(self, event: AstrMessageEvent):
@@ -124,6 +339,50 @@ class BuzzRadarPlugin(Star):
         self.radar.force_reset(group_id)
         yield event.plain_result("🌊 已执行强制降温，热度归零。")
 
+    @radar_cmd.command("reload")
+    async def reload_config(self, event: AstrMessageEvent):
+        """重新加载配置 (原子替换配置快照，并让各组件改用新配置)"""
+        if not self._is_admin(event):
+             yield event.plain_result("🚫 权限不足")
+             return
+
+        previous = self.settings.current
+        self.msg_filter.reload() # rebuilds the shared snapshot and, if cleaning_settings changed, the pipeline
+        self._apply_settings()
+        pending = restart_required(previous, self.settings.current)
+        message = f"🔄 配置已重新加载 (版本 {self.settings.version})。"
+        if pending:
+            message += "\n⚠️ 以下设置需重启插件后才会生效: " + "、".join(pending)
+        yield event.plain_result(message)
+
+    def _apply_settings(self):
+        """Point the long-lived components at the current snapshot (see RESTART_REQUIRED for what can't be)"""
+        settings = self.settings.current
+        summary_conf = settings.summary_settings
+        rate_conf = settings.rate_limit_settings
+
+        # New deadlines / hedge target; also drops cached provider resolutions
+        self.llm_gateway = LLMGateway.from_config(self.context, settings.llm_settings, latency=self.llm_latency)
+        # Fresh buckets with the new limits (the counters carry over)
+        limiter = HierarchicalRateLimiter.from_config(rate_conf, clock=self.rate_limiter.clock)
+        limiter.granted, limiter.denied = self.rate_limiter.granted, self.rate_limiter.denied
+        self.rate_limiter = limiter
+        self.summary_queue.reconfigure(
+            (summary_conf.min_delay_seconds, summary_conf.max_delay_seconds),
+            rate_conf.max_defer_seconds,
+            detach=summary_conf.batch
+        )
+        self.sampler = self._build_sampler(summary_conf)
+        self.summary_flight.ttl = max(0.0, float(summary_conf.cache_ttl_minutes * 60))
+        self.summary_flight.min_similarity = summary_conf.cache_similarity
+        self.summary_batcher.window = max(0.0, float(summary_conf.batch_window_seconds))
+        self.summary_batcher.max_groups = max(1, int(summary_conf.batch_max_groups))
+        self.summary_batcher.max_tokens = max(1, int(summary_conf.batch_token_budget))
+        self.metrics.sample_every = max(0, int(settings.metrics_settings.sample_every))
+        self.radar.apply_settings()
+        # Intervals, idle limits and the metrics dump file; job stats carry over
+        self.scheduler.replace_jobs(self._build_scheduler().jobs)
+
     @radar_cmd.command("test")
     async def debug_test(self, event: AstrMessageEvent, level: str = "1"):
         """调试触发: /radar test"""
@@ -144,47 +403,115 @@ class BuzzRadarPlugin(Star):
         ]
         
         # Reuse the summary generation logic
-        async for result in self._generate_summary(group_id, mock_context):
+        keywords = self.radar.hot_keywords(group_id) or ["AstrBot", "热度雷达"]
+        async for result in self._generate_summary(group_id, mock_context, umo=event.unified_msg_origin, keywords=keywords):
             yield result
     
-    async def _generate_summary(self, group_id: str, context_msgs: list):
+    async def _resolve_provider_id(self, umo: str):
+        """Best-effort lookup of the chat provider used by a session (cached by the gateway)"""
+        try:
+            return (await self.llm_gateway.resolve(umo))[0]
+        except Exception:
+            return None
+    
+    async def _acquire_llm_slot(self, job: SummaryJob):
+        """Queue gate: take a token from the global/group/provider buckets"""
+        provider_id = await self._resolve_provider_id(job.umo)
+        ok, retry_after = self.rate_limiter.try_acquire(job.group_id, provider_id)
+        if not ok:
+            self.metrics.inc("breaker_total", "deferred")
+        return ok, retry_after
+    
+    async def _run_summary_job(self, job: SummaryJob):
+        """Worker callback: generate the summary and push it proactively"""
+        logger.info(f"[BuzzRadar] 开始生成总结: Group {job.group_id} (触发原因: {job.reason or '未知'})")
+        start = time.perf_counter_ns()
+        ready_at = None
+        if self.summary_queue.detach:
+            # Detached (batch mode): the humanization delay overlaps the batch window and the LLM call
+            # instead of running before the job reaches the batcher
+            ready_at = time.monotonic() + random.uniform(*self.summary_queue.delay_range)
+        try:
+            async for result in self._generate_summary(job.group_id, list(job.context), umo=job.umo, keywords=job.keywords):
+                if ready_at is not None and ready_at > time.monotonic():
+                    await asyncio.sleep(ready_at - time.monotonic())
+                await self.context.send_message(job.umo, result)
+        finally:
+            self.metrics.record("summary_seconds", time.perf_counter_ns() - start)
+    
+    async def _generate_summary(self, group_id: str, context_msgs: list, umo: str = None, keywords=()):
         """Shared summary generation logic"""
         # Sampling
         sampled_context = self.sampler.sample(context_msgs)
-        context_str = "\n".join(sampled_context)
+        context_str = chat_log = "\n".join(sampled_context)
+        keywords_str = "、".join(keywords)
         
-        # Generate Prompt via Persona Manager
-        persona = self.persona_manager.get_persona()
-        prompt_tmpl = persona['prompt']
-        final_prompt = prompt_tmpl.replace("{{context}}", context_str)
+        # Generate Prompt via Persona Manager (templates are compiled once per config version)
+        persona = self.persona_manager.get_persona(group_id)
+        template = persona.template
+        if keywords_str and "keywords" not in template.fields:
+            # Templates without a slot still get the hot terms, right above the chat log
+            context_str = f"当前热词: {keywords_str}\n{context_str}"
+        now_str = time.strftime("%Y-%m-%d %H:%M")
+        final_prompt = template.render(
+            context=context_str,
+            keywords=keywords_str,
+            group=group_id,
+            time=now_str
+        )
         
+        # Call LLM (coalesced with identical / near-identical in-flight or recent requests for this group + persona).
+        # The call starts before the notice below is sent (and possibly held back), so batches can form meanwhile.
+        summary_conf = self.settings.current.summary_settings
+        header = f"🔥 ({persona['name']}视角) 热度总结：\n"
+        if summary_conf.batch:
+            # Batched replies are split per group only once complete, so there is nothing to stream
+            deltas = None
+            section = f"当前热词: {keywords_str}\n{chat_log}" if keywords_str else chat_log
+            key = (await self._resolve_provider_id(umo or group_id), persona.id)
+            frame = lambda body: template.render(context=body, keywords="(见各群)", group="多个群", time=now_str)
+            call = asyncio.ensure_future(self.summary_flight.run(
+                (group_id, persona.id), sampled_context,
+                lambda: self.summary_batcher.submit(key, group_id, umo or group_id, final_prompt, section, frame)
+            ))
+        else:
+            deltas = asyncio.Queue() if summary_conf.stream else None
+            call = asyncio.ensure_future(self.summary_flight.run(
+                (group_id, persona.id), sampled_context,
+                lambda: self.llm_gateway.call(umo or group_id, final_prompt, on_delta=deltas.put_nowait if deltas else None)
+            ))
+
         logger.info(f"[BuzzRadar] 正在生成总结... Group: {group_id} | Persona: {persona['name']}")
         yield MessageEventResult(event=None, message_chain=[Plain(f"🔥 检测到高热度！正在通灵 {persona['name']} 进行总结...")])
-
-        # Call LLM
         try:
-            # Try to get provider ID (AstrBot v4.5.7+)
-            if hasattr(self.context, 'get_current_chat_provider_id'):
-                provider_id = await self.context.get_current_chat_provider_id(group_id)
-                response = await self.context.llm_generate(
-                    chat_provider_id=provider_id,
-                    prompt=final_prompt
-                )
+            if deltas is None:
+                completion = await call
             else:
-                # Fallback for older versions
-                provider = self.context.get_using_provider(umo=group_id)
-                if provider:
-                    response = await provider.text_chat(prompt=final_prompt)
-                else:
-                    raise Exception("No LLM Provider found")
+                # Streaming: forward the summary in sentence-aligned chunks while the provider is still writing.
+                # Cache hits and coalesced requests get no deltas and fall through to the one-shot reply below.
+                call.add_done_callback(lambda _: deltas.put_nowait(None))
+                chunker = StreamChunker(summary_conf.stream_chunk_chars)
+                sent = False
+                while (delta := await deltas.get()) is not None:
+                    for piece in chunker.feed(delta):
+                        yield MessageEventResult(event=None, message_chain=[Plain(piece if sent else header + piece)])
+                        sent = True
+                completion = await call
+                if sent:
+                    rest = chunker.flush()
+                    if rest:
+                        yield MessageEventResult(event=None, message_chain=[Plain(rest)])
+                    return
             
-            if response and response.completion_text:
-                result_text = f"🔥 ({persona['name']}视角) 热度总结：\n{response.completion_text}"
+            if completion:
+                result_text = f"{header}{completion}"
                 yield MessageEventResult(event=None, message_chain=[Plain(result_text)])
             else:
+                 self.metrics.inc("llm_errors_total", "empty")
                  yield MessageEventResult(event=None, message_chain=[Plain("⚠️ 总结生成失败：LLM 返回为空。")])
                  
         except Exception as e:
+            self.metrics.inc("llm_errors_total", type(e).__name__)
             logger.error(f"[BuzzRadar] LLM Error: {e}")
             yield MessageEventResult(event=None, message_chain=[Plain(f"⚠️ 总结生成出错: {str(e)}")])
 
@@ -193,54 +520,57 @@ class BuzzRadarPlugin(Star):
         """
         核心消息处理逻辑
         """
-        if not self.config.get("enable_plugin", True):
+        if not self.settings.current.enable_plugin:
             return
 
         if not hasattr(event, "message_obj"):
             return
+        
+        if not self.scheduler.running:
+            self._start_background()
             
         group_id = event.message_obj.group_id
         user_id = event.message_obj.sender.user_id
         content = event.message_str
+        metrics = self.metrics
+        metrics.inc("messages_total")
+        span = metrics.span() # no-op unless this message is sampled
         
         # 2. Filter Noise
-        if self.msg_filter.is_noise(content, group_id):
+        stage = self.msg_filter.check(content, group_id)
+        span.mark("filter")
+        if stage is not None:
+            metrics.inc("filtered_total", stage)
+            span.end()
             return 
             
         # 3. Calculate Score
         score = self.score_engine.calculate_score(event)
+        span.mark("score")
         
-        # 4. Radar System Processing
-        import time
+        # 4. Radar System Processing (state update + trigger check)
         ts = getattr(event, 'timestamp', None) or time.time()
         is_triggered, context_msgs = await self.radar.on_message(group_id, score, user_id, content, timestamp=ts)
+        span.mark("radar")
         
         # 6. Trigger Action
         if is_triggered:
-            # Circuit Breaker Check
-            import time
-            now = time.time()
-            if now - self.last_llm_call < 60: # 1 minute window
-                if self.llm_call_count >= 5: # Max 5 calls per minute global
-                    logger.warning("[BuzzRadar] 熔断保护: LLM 调用频率过高，跳过此次总结。")
-                    return
-                self.llm_call_count += 1
-            else:
-                self.llm_call_count = 1
-                self.last_llm_call = now
-
-            # Random Delay (Debounce/Humanization)
-            import random
-            import asyncio
-            delay = random.uniform(5, 15)
-            logger.info(f"[BuzzRadar] 拟人化延迟: {delay:.1f}s")
-            await asyncio.sleep(delay)
-            
-            # Use shared logic
-            async for result in self._generate_summary(group_id, context_msgs):
-                yield result
+            metrics.inc("triggers_total", self.radar.last_trigger_reason)
+            # Hand off to the summary queue; workers apply the rate limit, the delay and call the LLM
+            self.summary_queue.submit(SummaryJob(
+                group_id=group_id,
+                umo=event.unified_msg_origin,
+                context=tuple(context_msgs),
+                reason=self.radar.last_trigger_reason,
+                keywords=tuple(self.radar.hot_keywords(group_id, now=ts))
+            ))
+            span.mark("dispatch")
+        span.end()
 
     async def terminate(self):
         """Plugin shutdown cleanup."""
-        self.radar.persistence.save()
+        await self.scheduler.stop()
+        await self.summary_queue.stop()
+        await self.summary_batcher.close()
+        await self.radar.persistence.close()
         logger.info("[BuzzRadar] 数据已保存，插件卸载。")
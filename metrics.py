@@ -0,0 +1,220 @@
+import os
+import time
+import asyncio
+import logging
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("astrbot")
+
+PREFIX = "buzz_radar_"
+
+# Per-message stages of handle_message, in order; "total" is the whole call
+STAGES = ("filter", "score", "radar", "dispatch", "total")
+
+# counter name -> (label name or "", help text)
+COUNTERS = {
+    "messages_total": ("", "进入 handle_message 的群消息数"),
+    "filtered_total": ("reason", "被过滤的消息数 (按过滤阶段)"),
+    "triggers_total": ("reason", "触发的总结数 (按触发原因)"),
+    "breaker_total": ("outcome", "限流/熔断拦截的总结任务数"),
+    "llm_errors_total": ("type", "总结生成失败数 (按异常类型)"),
+}
+
+# Histograms outside the per-message stages: name -> help text (values observed in ns, exported in seconds)
+HISTOGRAMS = {
+    "summary_seconds": "总结任务耗时 (生成 + 发送，含失败的任务)",
+}
+
+class Histogram:
+    """
+    固定分桶的延迟直方图 (纳秒，1-2-5 序列，100ns ~ 10s)，累计计数，不衰减 (对应 Prometheus histogram)。
+    """
+    __slots__ = ("counts", "total", "sum")
+
+    BOUNDS = tuple(m * 10 ** e for e in range(2, 10) for m in (1, 2, 5)) + (10 ** 10,) # upper bounds in ns
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1) # last bucket: +Inf
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, ns: int):
+        self.counts[bisect_left(self.BOUNDS, ns)] += 1
+        self.total += 1
+        self.sum += ns
+
+    def quantile(self, q: float) -> Optional[int]:
+        """q 分位数 (所在桶的上界，ns)，无样本时返回 None"""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.BOUNDS[i] if i < len(self.BOUNDS) else self.BOUNDS[-1]
+        return self.BOUNDS[-1]
+
+class _Span:
+    """一条被采样消息的计时: mark(stage) 记录距上一个 mark 的耗时"""
+    __slots__ = ("stages", "clock", "start", "last")
+
+    def __init__(self, stages: Dict[str, Histogram], clock: Callable[[], int]):
+        self.stages = stages
+        self.clock = clock
+        self.start = self.last = clock()
+
+    def mark(self, stage: str):
+        now = self.clock()
+        self.stages[stage].observe(now - self.last)
+        self.last = now
+
+    def end(self):
+        self.stages["total"].observe(self.clock() - self.start)
+
+class _NullSpan:
+    """未采样的消息: 所有计时都是空操作"""
+    __slots__ = ()
+
+    def mark(self, stage: str):
+        pass
+
+    def end(self):
+        pass
+
+NULL_SPAN = _NullSpan()
+
+class Metrics:
+    """
+    热路径指标: 各阶段耗时直方图 (time.perf_counter_ns，每 sample_every 条消息采样一条，0 为关闭)
+    与按标签计数的计数器。collector 在输出时提供其他组件已有的计数 (例如总结队列的丢弃数)，
+    热路径上不必重复计数。
+    """
+    def __init__(self, sample_every: int = 16, clock: Callable[[], int] = time.perf_counter_ns):
+        self.sample_every = max(0, int(sample_every))
+        self.clock = clock
+        self.stages: Dict[str, Histogram] = {stage: Histogram() for stage in STAGES}
+        self.counters: Dict[str, Dict[str, int]] = {name: {} for name in COUNTERS}
+        self.histograms: Dict[str, Histogram] = {name: Histogram() for name in HISTOGRAMS}
+        self._collectors: List[Callable[[], Dict[str, Dict[str, int]]]] = []
+        self._tick = 0
+
+    @classmethod
+    def from_config(cls, conf, **kwargs) -> "Metrics":
+        return cls(sample_every=conf.get("sample_every", 16), **kwargs)
+
+    def span(self):
+        """开始一条消息的计时；未被采样时返回 NULL_SPAN"""
+        if not self.sample_every:
+            return NULL_SPAN
+        self._tick += 1
+        if self._tick < self.sample_every:
+            return NULL_SPAN
+        self._tick = 0
+        return _Span(self.stages, self.clock)
+
+    def observe(self, stage: str, ns: int):
+        self.stages[stage].observe(ns)
+
+    def record(self, name: str, ns: int):
+        """记录一次 HISTOGRAMS 中的耗时 (不受 sample_every 影响)"""
+        self.histograms[name].observe(ns)
+
+    def inc(self, name: str, label: str = "", n: int = 1):
+        counter = self.counters[name]
+        counter[label] = counter.get(label, 0) + n
+
+    def add_collector(self, collector: Callable[[], Dict[str, Dict[str, int]]]):
+        """collector() -> {counter name: {label: 累计值}}，输出时与计数器合并"""
+        self._collectors.append(collector)
+
+    def counter_values(self) -> Dict[str, Dict[str, int]]:
+        values = {name: dict(counter) for name, counter in self.counters.items()}
+        for collector in self._collectors:
+            try:
+                for name, labels in collector().items():
+                    target = values.setdefault(name, {})
+                    for label, value in labels.items():
+                        target[label] = target.get(label, 0) + value
+            except Exception as e:
+                logger.warning(f"[BuzzRadar] 指标采集失败: {e}")
+        return values
+
+    def report(self) -> List[str]:
+        """/radar metrics 的文本行"""
+        lines = []
+        for stage, h in self.stages.items():
+            if not h.total:
+                continue
+            lines.append(
+                f"{stage:<8} n={h.total} | 平均 {h.sum / h.total / 1000:.1f}µs | "
+                f"p50 ≤{h.quantile(0.5) / 1000:g}µs | p99 ≤{h.quantile(0.99) / 1000:g}µs"
+            )
+        if not lines:
+            lines.append("阶段耗时: 暂无采样" if self.sample_every else "阶段耗时: 采样已关闭")
+        for name, h in self.histograms.items():
+            if h.total:
+                lines.append(
+                    f"{name}: n={h.total} | 平均 {h.sum / h.total / 1e9:.2f}s | "
+                    f"p50 ≤{h.quantile(0.5) / 1e9:g}s | p99 ≤{h.quantile(0.99) / 1e9:g}s"
+                )
+        for name, labels in self.counter_values().items():
+            if not labels:
+                continue
+            total = sum(labels.values())
+            detail = ", ".join(f"{label} {value}" for label, value in sorted(labels.items()) if label)
+            lines.append(f"{name}: {total}" + (f" ({detail})" if detail else ""))
+        return lines
+
+    def prometheus(self) -> str:
+        """Prometheus 文本格式 (exposition format 0.0.4)"""
+        out = []
+        for name, labels in self.counter_values().items():
+            label_name, help_text = COUNTERS.get(name, ("reason", name))
+            metric = PREFIX + name
+            out.append(f"# HELP {metric} {help_text}")
+            out.append(f"# TYPE {metric} counter")
+            if not labels:
+                labels = {"": 0}
+            for label, value in sorted(labels.items()):
+                selector = f'{{{label_name}="{_escape(label)}"}}' if label_name and label else ""
+                out.append(f"{metric}{selector} {value}")
+
+        metric = PREFIX + "stage_seconds"
+        out.append(f"# HELP {metric} handle_message 各阶段耗时 (采样)")
+        out.append(f"# TYPE {metric} histogram")
+        for stage, h in self.stages.items():
+            _histogram_lines(out, metric, h, f'stage="{stage}"')
+        for name, h in self.histograms.items():
+            metric = PREFIX + name
+            out.append(f"# HELP {metric} {HISTOGRAMS[name]}")
+            out.append(f"# TYPE {metric} histogram")
+            _histogram_lines(out, metric, h)
+        return "\n".join(out) + "\n"
+
+    def dump(self, path: str, text: Optional[str] = None):
+        """原子写入 Prometheus 文本文件 (供 node_exporter textfile collector 等读取)"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus() if text is None else text)
+        os.replace(tmp, path)
+
+    async def dump_async(self, path: str):
+        """在事件循环中渲染 (计数器只在循环里修改)，在线程池中写文件"""
+        text = self.prometheus()
+        await asyncio.get_running_loop().run_in_executor(None, self.dump, path, text)
+
+def _histogram_lines(out: List[str], metric: str, h: Histogram, labels: str = ""):
+    prefix = labels + "," if labels else ""
+    selector = f"{{{labels}}}" if labels else ""
+    cumulative = 0
+    for bound, count in zip(Histogram.BOUNDS, h.counts):
+        cumulative += count
+        out.append(f'{metric}_bucket{{{prefix}le="{bound / 1e9:g}"}} {cumulative}')
+    out.append(f'{metric}_bucket{{{prefix}le="+Inf"}} {h.total}')
+    out.append(f"{metric}_sum{selector} {h.sum / 1e9:.9f}")
+    out.append(f"{metric}_count{selector} {h.total}")
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,473 @@
+import os
+import json
+import mmap
+import time
+import asyncio
+import hashlib
+import logging
+from array import array
+from typing import Callable, Iterable, Optional, Tuple
+
+logger = logging.getLogger("astrbot")
+
+FORMAT_VERSION = 2
+INDEX_MAGIC = 0x3158444952414442 # b"BDRADIX1" little-endian
+INDEX_HEADER = 4 # magic, seq, snapshot size, entry count
+INDEX_STRIDE = 3 # key hash, offset, length
+
+def _key(group_id: str) -> int:
+    """进程无关的 64 位群 ID 哈希 (内置 hash 对字符串加盐，不能写入磁盘)"""
+    return int.from_bytes(hashlib.blake2b(group_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+def _dump(entry: dict) -> bytes:
+    return (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+class PersistenceLayer:
+    """
+    群状态的持久化: 快照 (snapshot) + 索引 (index) + 追加日志 (journal)。
+
+    - <base>.snapshot: JSON Lines，首行为头部 {"v": 2, "seq": S, "created": ts}，之后每行一个群 {"g": gid, "r": record}。
+    - <base>.index: 按群 ID 哈希排序的定长二进制表 (hash, offset, length)，与快照一起在压缩时生成。
+    - <base>.journal: JSON Lines，每行 {"q": seq, "g": gid, "r": record | null}，null 表示该群已被删除。
+
+    启动时只 mmap 快照与索引并重放 journal (其大小受 journal_limit 限制)，不解析快照内容，
+    因此加载耗时与历史群数量无关；某个群的记录在 take() 首次请求时才通过索引二分查找并解析。
+
+    写入路径: mark_dirty 只把群标记为脏并安排一次防抖 (debounce 秒) 的后台刷盘；刷盘时只把脏群的最新记录
+    追加到 journal 并 fsync，防抖窗口内的多次修改合并为一条。journal 超过 journal_limit 字节后自动压缩:
+    在线程池中流式合并 内存状态 + journal + 旧快照，生成新快照与索引，再原子替换并清空 journal。
+    旧版 persistence.json ({gid: {"last_trigger_time": ts}}) 会在首次加载时迁移。
+    """
+    def __init__(self, filepath: str, debounce: float = 2.0, journal_limit: int = 8 * 1024 * 1024):
+        self.filepath = filepath
+        base = os.path.splitext(filepath)[0]
+        self.snapshot_path = f"{base}.snapshot"
+        self.index_path = f"{base}.index"
+        self.journal_path = f"{base}.journal"
+        self.debounce = max(0.0, float(debounce))
+        self.journal_limit = max(0, int(journal_limit))
+        # Overlay on top of the snapshot: gid -> record from the journal, or None once the group was
+        # hydrated into memory (the live state is authoritative) or deleted
+        self.data = {}
+        self.seq = 0
+        self.expire_before = 0.0 # cold records last updated before this are treated as gone
+        self._snapshot: Optional[mmap.mmap] = None
+        self._index: Optional[memoryview] = None
+        self._index_map: Optional[mmap.mmap] = None
+        self._source: Callable[[str], Optional[dict]] = lambda gid: None
+        self._live: Callable[[], Iterable[Tuple[str, dict]]] = lambda: ()
+        self._dirty = set()
+        self._compact_pending = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock() # one writer at a time (debounced task, scheduler, close)
+
+        # Stats
+        self.flushes = 0
+        self.failures = 0
+        self.compactions = 0
+        self.hydrated = 0
+        self.last_flush_at = 0.0
+        self.last_flush_latency = 0.0 # seconds spent serializing + writing
+        self.last_bytes = 0
+        self.total_bytes = 0
+        self.journal_bytes = 0
+        self.snapshot_bytes = 0
+        self.load()
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty)
+
+    @property
+    def indexed(self) -> int:
+        return self._index[3] if self._index is not None else 0
+
+    def attach(self, source: Callable[[str], Optional[dict]], live: Callable[[], Iterable[Tuple[str, dict]]]):
+        """
+        绑定内存状态: source(gid) 返回该群当前记录 (不在内存中时返回 None)，
+        live() 遍历所有内存中的 (gid, record)，用于压缩时生成完整快照。
+        """
+        self._source = source
+        self._live = live
+
+    # --- Recovery ---
+    def load(self):
+        self._close_snapshot()
+        self.data = {}
+        self.seq = 0
+        if os.path.exists(self.snapshot_path):
+            try:
+                self._open_snapshot()
+            except Exception as e:
+                logger.error(f"[BuzzRadar] 加载持久化快照失败: {e}")
+                self._close_snapshot()
+                self.seq = 0
+        elif os.path.exists(self.filepath):
+            self._load_legacy()
+        if os.path.exists(self.journal_path):
+            self._replay_journal()
+
+    def _open_snapshot(self):
+        with open(self.snapshot_path, 'rb') as f:
+            self._snapshot = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = json.loads(self._snapshot.readline() or b"{}")
+        if header.get("v") != FORMAT_VERSION:
+            raise ValueError(f"unsupported snapshot version {header.get('v')}")
+        self.seq = header.get("seq", 0)
+        self.snapshot_bytes = len(self._snapshot)
+        if not self._open_index():
+            # Missing or stale index (e.g. crash between the two renames): rebuild it once from the snapshot
+            logger.warning("[BuzzRadar] 快照索引缺失或过期，正在重建")
+            self._write_index(self.index_path, self._scan_snapshot(self.snapshot_path), self.seq, self.snapshot_bytes)
+            if not self._open_index():
+                raise ValueError("snapshot index rebuild failed")
+
+    def _open_index(self) -> bool:
+        if not os.path.exists(self.index_path):
+            return False
+        with open(self.index_path, 'rb') as f:
+            index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        index = memoryview(index_map).cast("Q")
+        if (len(index) < INDEX_HEADER or index[0] != INDEX_MAGIC or index[1] != self.seq
+                or index[2] != self.snapshot_bytes or len(index) != INDEX_HEADER + INDEX_STRIDE * index[3]):
+            index.release()
+            index_map.close()
+            return False
+        self._index, self._index_map = index, index_map
+        return True
+
+    def _close_snapshot(self):
+        if self._index is not None:
+            self._index.release()
+            self._index_map.close()
+            self._index = self._index_map = None
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+
+    def _load_legacy(self):
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            logger.error(f"[BuzzRadar] 加载持久化数据失败: {e}")
+            return
+        for gid, entry in legacy.items():
+            self.data[gid] = {"t": entry.get("last_trigger_time", 0)}
+        self._compact_pending = bool(self.data) # write the new format on the first flush
+        logger.info(f"[BuzzRadar] 已迁移旧版持久化数据: {len(self.data)} 个群")
+
+    def _replay_journal(self):
+        replayed = 0
+        good = 0 # end of the last complete record
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("missing newline")
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                good += len(line)
+                if entry["q"] <= self.seq:
+                    continue # already folded into the snapshot
+                self.seq = entry["q"]
+                self.data[entry["g"]] = entry["r"]
+                replayed += 1
+        if good < os.path.getsize(self.journal_path):
+            # Torn tail from a crash: cut it off so later appends start on a fresh line
+            logger.warning("[BuzzRadar] journal 尾部记录不完整，已截断")
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good)
+                os.fsync(f.fileno())
+        self.journal_bytes = good
+        if replayed:
+            logger.info(f"[BuzzRadar] 已重放 journal 记录 {replayed} 条")
+
+    # --- Lookup ---
+    def _lookup(self, group_id: str) -> Optional[dict]:
+        index = self._index
+        if index is None:
+            return None
+        key = _key(group_id)
+        lo, hi = 0, index[3]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if index[INDEX_HEADER + INDEX_STRIDE * mid] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        # Walk the (rare) run of equal hashes and confirm the id
+        while lo < index[3] and index[INDEX_HEADER + INDEX_STRIDE * lo] == key:
+            offset = index[INDEX_HEADER + INDEX_STRIDE * lo + 1]
+            length = index[INDEX_HEADER + INDEX_STRIDE * lo + 2]
+            entry = json.loads(self._snapshot[offset:offset + length])
+            if entry["g"] == group_id:
+                return entry["r"]
+            lo += 1
+        return None
+
+    def has(self, group_id: str) -> bool:
+        """是否有尚未载入、且未过期的群记录 (不取出)"""
+        if group_id in self.data:
+            record = self.data[group_id]
+        else:
+            try:
+                record = self._lookup(group_id)
+            except Exception as e:
+                logger.error(f"[BuzzRadar] 读取群 {group_id} 的持久化状态失败: {e}")
+                record = None
+        return record is not None and record.get("u", 0) >= self.expire_before
+
+    def take(self, group_id: str) -> Optional[dict]:
+        """
+        取出尚未载入内存的群记录 (journal 优先，其次快照索引)。
+        之后该群以内存状态为准 (由 source 回调提供)，再次调用返回 None。
+        """
+        if group_id in self.data:
+            record = self.data[group_id]
+        else:
+            try:
+                record = self._lookup(group_id)
+            except Exception as e:
+                logger.error(f"[BuzzRadar] 读取群 {group_id} 的持久化状态失败: {e}")
+                record = None
+        self.data[group_id] = None
+        if record is not None and record.get("u", 0) < self.expire_before:
+            record = None
+        if record is not None:
+            self.hydrated += 1
+        return record
+
+    def drop_idle(self, now: float, max_idle_seconds: float) -> int:
+        """
+        让长期未载入且已空闲超过 max_idle_seconds 的记录失效。
+        快照中的记录不逐条扫描: take() 不再返回它们，下次压缩时被丢弃。返回 journal 中被删除的记录数。
+        """
+        self.expire_before = max(self.expire_before, now - max_idle_seconds)
+        stale = [gid for gid, rec in self.data.items() if rec is not None and rec.get("u", 0) < self.expire_before]
+        for gid in stale:
+            self.data[gid] = None
+            self._dirty.add(gid)
+        if stale:
+            self.schedule_flush()
+        return len(stale)
+
+    # --- Write path ---
+    def mark_dirty(self, group_id: str):
+        self._dirty.add(group_id)
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        """在 debounce 秒后刷盘；已有待执行的刷盘时不重复安排。"""
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return # no loop (tests / shutdown): the next flush()/close() writes it
+        self._flush_handle = loop.call_later(self.debounce, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush_async())
+
+    def _take_batch(self) -> list:
+        # Records are fresh dicts (to_record copies the history), so the writer thread never sees live state
+        batch = []
+        for gid in self._dirty:
+            record = self._source(gid)
+            if record is None:
+                record = self.data.get(gid)
+            self.seq += 1
+            batch.append((self.seq, gid, record))
+        self._dirty.clear()
+        return batch
+
+    def _append_journal(self, batch: list) -> int:
+        payload = b"".join(_dump({"q": q, "g": gid, "r": rec}) for q, gid, rec in batch)
+        self._ensure_dir()
+        with open(self.journal_path, 'ab') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(payload)
+
+    # --- Compaction ---
+    def _scan_snapshot(self, path: str):
+        """遍历快照，产出 (hash, offset, length, entry)"""
+        with open(path, 'rb') as f:
+            offset = len(f.readline())
+            for line in f:
+                entry = json.loads(line)
+                yield _key(entry["g"]), offset, len(line), entry
+                offset += len(line)
+
+    def _write_index(self, path: str, entries: Iterable, seq: int, snapshot_size: int):
+        keys = sorted((key, offset, length) for key, offset, length, _ in entries)
+        table = array("Q", (INDEX_MAGIC, seq, snapshot_size, len(keys)))
+        for item in keys:
+            table.extend(item)
+        with open(path, 'wb') as f:
+            table.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _prepare_compaction(self) -> tuple:
+        # Collected on the event loop; everything after this runs on plain copies
+        return self.seq, list(self._live()), dict(self.data), self.expire_before
+
+    def _write_compaction(self, seq: int, live: list, overlay: dict, expire_before: float) -> int:
+        """在线程池中流式生成新快照与索引 (写入 .tmp 文件)"""
+        self._ensure_dir()
+        seen = set()
+        entries = []
+        offset = 0
+        with open(f"{self.snapshot_path}.tmp", 'wb') as f:
+            def emit(gid, rec):
+                nonlocal offset
+                line = _dump({"g": gid, "r": rec})
+                f.write(line)
+                entries.append((_key(gid), offset, len(line), None))
+                offset += len(line)
+                seen.add(gid)
+
+            offset += f.write(_dump({"v": FORMAT_VERSION, "seq": seq, "created": time.time()}))
+            for gid, rec in live:
+                emit(gid, rec)
+            for gid, rec in overlay.items():
+                if rec is not None and gid not in seen and rec.get("u", 0) >= expire_before:
+                    emit(gid, rec)
+            if os.path.exists(self.snapshot_path):
+                for _, _, _, entry in self._scan_snapshot(self.snapshot_path):
+                    gid, rec = entry["g"], entry["r"]
+                    if gid not in seen and gid not in overlay and rec.get("u", 0) >= expire_before:
+                        emit(gid, rec)
+            f.flush()
+            os.fsync(f.fileno())
+        self._write_index(f"{self.index_path}.tmp", entries, seq, offset)
+        return offset
+
+    def _install_compaction(self, overlay: dict):
+        # Unmap before replacing (required on Windows), then swap snapshot first: a stale index is detected and rebuilt
+        self._close_snapshot()
+        os.replace(f"{self.snapshot_path}.tmp", self.snapshot_path)
+        os.replace(f"{self.index_path}.tmp", self.index_path)
+        # Everything up to seq is in the snapshot now; replay skips older journal entries even if this truncate is lost
+        with open(self.journal_path, 'wb') as f:
+            os.fsync(f.fileno())
+        self._open_snapshot()
+        # Journal records folded into the snapshot no longer need the overlay, nor do tombstones of deleted groups
+        for gid, rec in overlay.items():
+            if self.data.get(gid, False) is rec and (rec is not None or self._source(gid) is None):
+                del self.data[gid]
+        self.compactions += 1
+        self.journal_bytes = 0
+        self._compact_pending = False
+        logger.info(f"[BuzzRadar] 持久化已压缩为快照: {self.snapshot_bytes} 字节, {self.indexed} 个群")
+
+    def _ensure_dir(self):
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _needs_compaction(self) -> bool:
+        return self._compact_pending or (self.journal_limit and self.journal_bytes >= self.journal_limit)
+
+    def _record(self, started: float, written: int):
+        self.flushes += 1
+        self.last_flush_at = time.time()
+        self.last_flush_latency = time.perf_counter() - started
+        self.last_bytes = written
+        self.total_bytes += written
+
+    async def flush_async(self) -> bool:
+        """
+        把脏群追加到 journal (线程池中执行)，必要时压缩为快照。
+        并发调用依次执行，后来者发现已无脏数据则直接返回。
+        """
+        async with self._lock:
+            if not self._dirty and not self._compact_pending:
+                return False
+            loop = asyncio.get_running_loop()
+            batch = self._take_batch()
+            started = time.perf_counter()
+            written = 0
+            try:
+                if batch:
+                    written = await loop.run_in_executor(None, self._append_journal, batch)
+                    self.journal_bytes += written
+            except Exception as e:
+                self.failures += 1
+                self._dirty.update(gid for _, gid, _ in batch)
+                logger.error(f"[BuzzRadar] 保存持久化数据失败: {e}")
+                return False
+            self._record(started, written)
+            if self._needs_compaction():
+                try:
+                    prepared = self._prepare_compaction()
+                    await loop.run_in_executor(None, self._write_compaction, *prepared)
+                    self._install_compaction(prepared[2])
+                except Exception as e:
+                    self.failures += 1
+                    logger.error(f"[BuzzRadar] 持久化压缩失败: {e}")
+            return True
+
+    def save(self):
+        """同步写入全部脏数据 (用于卸载时的最终刷盘)。"""
+        batch = self._take_batch()
+        started = time.perf_counter()
+        try:
+            written = self._append_journal(batch) if batch else 0
+            self.journal_bytes += written
+            self._record(started, written)
+            if self._needs_compaction():
+                self.compact()
+        except Exception as e:
+            self.failures += 1
+            self._dirty.update(gid for _, gid, _ in batch)
+            logger.error(f"[BuzzRadar] 保存持久化数据失败: {e}")
+
+    def flush(self) -> bool:
+        """Save only if something changed since the last save"""
+        if not self._dirty and not self._compact_pending:
+            return False
+        self.save()
+        return True
+
+    def compact(self):
+        """立即把全部记录压缩为快照 (同步)。"""
+        if self._dirty:
+            self.save()
+        prepared = self._prepare_compaction()
+        self._write_compaction(*prepared)
+        self._install_compaction(prepared[2])
+
+    async def close(self):
+        """取消待执行的防抖刷盘，等待进行中的写入完成，并保证最终写入一次。"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_task is not None and not self._flush_task.done():
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        async with self._lock:
+            self.flush()
+        self._close_snapshot()
+
+    def stats(self) -> dict:
+        return {
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "pending": len(self._dirty),
+            "last_flush_at": self.last_flush_at,
+            "last_latency": self.last_flush_latency,
+            "last_bytes": self.last_bytes,
+            "total_bytes": self.total_bytes,
+            "journal_bytes": self.journal_bytes,
+            "snapshot_bytes": self.snapshot_bytes,
+            "compactions": self.compactions,
+            "indexed": self.indexed,
+            "hydrated": self.hydrated,
+        }
@@ -1,52 +1,128 @@
+import re
+import time
 import random
+import hashlib
 import logging
-from typing import Dict, Any
+from bisect import bisect_right
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional
+
+try:
+    from .settings import as_store
+except ImportError:
+    from settings import as_store
 
 logger = logging.getLogger("astrbot")
 
+_PLACEHOLDER_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+class PromptTemplate:
+    """
+    预编译的提示词模板: 加载配置时把文本切分为 [字面量, 占位符名, 字面量, ...]，
+    渲染时只做一次 join，不再对整段文本逐个 replace。
+    支持的占位符: {{context}} 群聊记录、{{group}} 群号、{{keywords}} 当前热词、{{time}} 当前时间；
+    未知占位符原样保留。
+    """
+    __slots__ = ("source", "parts", "fields")
+
+    def __init__(self, source: str):
+        self.source = source
+        # Even indices are literals, odd indices placeholder names
+        self.parts: List[str] = _PLACEHOLDER_RE.split(source)
+        self.fields = frozenset(self.parts[1::2])
+
+    def render(self, **values) -> str:
+        parts = self.parts[:]
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            parts[i] = str(values[name]) if name in values else "{{" + name + "}}"
+        return "".join(parts)
+
+@dataclass(frozen=True)
+class Persona:
+    id: str
+    name: str
+    template: PromptTemplate
+    weight: float = 1.0
+
+    @property
+    def prompt(self) -> str:
+        return self.template.source
+
+    def __getitem__(self, key: str):
+        # Dict-style access ('id' / 'name' / 'prompt') kept for existing callers
+        return getattr(self, key)
+
 class PersonaManager:
-    def __init__(self, config: dict):
-        self.config = config
+    """
+    人格注册表: 每个配置快照版本只构建一次 (模板预编译、id -> 人格索引、随机模式的累积权重表)。
+
+    random 模式按 weight 加权选择；给定 group_id 时用 (群号, 时间段) 的稳定哈希代替随机数，
+    同一个群在 sticky_hours 内总是得到同一个人格 (0 表示每次重新抽)。
+    """
+    def __init__(self, config):
+        self.settings = as_store(config)
         self.default_prompt = "你是一个群聊话题总结助手。{{context}}"
-        
-    def _get_settings(self) -> dict:
-        return self.config.get("persona_settings", {})
+        self.default_persona = Persona("default", "Default", PromptTemplate(self.default_prompt))
+        self._conf_ref = None
+        self.personas: List[Persona] = [] # preset slot order
+        self.by_id: Dict[str, Persona] = {}
+        self._cumulative: List[float] = [] # running weight sums over self._pool
+        self._pool: List[Persona] = []
+
+    def reload(self):
+        """原始配置被修改后调用"""
+        self.settings.reload()
+
+    def _registry(self):
+        conf = self.settings.current.persona_settings
+        if conf is self._conf_ref:
+            return conf
+        self._conf_ref = conf
+        presets = conf.presets
+        personas, pool = [], []
+        for slot in fields(presets):
+            preset = getattr(presets, slot.name)
+            persona = Persona(preset.id or slot.name, preset.name or preset.id or slot.name,
+                              PromptTemplate(preset.prompt or self.default_prompt), max(0.0, preset.weight))
+            personas.append(persona)
+            # Random mode only draws presets that have their own prompt and a positive weight
+            if preset.prompt and persona.weight > 0:
+                pool.append(persona)
+        self.personas = personas
+        self.by_id = {}
+        for persona in personas:
+            self.by_id.setdefault(persona.id, persona) # first slot wins on duplicate ids
+        self._pool = pool
+        total = 0.0
+        self._cumulative = []
+        for persona in self._pool:
+            total += persona.weight
+            self._cumulative.append(total)
+        logger.debug(f"[BuzzRadar] 人格注册表已重建: {[p.id for p in personas]}")
+        return conf
 
-    def get_persona(self) -> Dict[str, str]:
+    def _draw(self, group_id: Optional[str], sticky_hours: float, now: float) -> Persona:
+        total = self._cumulative[-1]
+        if group_id is not None and sticky_hours > 0:
+            period = int(now // (sticky_hours * 3600))
+            digest = hashlib.blake2b(f"{group_id}:{period}".encode("utf-8"), digest_size=8).digest()
+            r = int.from_bytes(digest, "big") / 2.0 ** 64
+        else:
+            r = random.random()
+        index = bisect_right(self._cumulative, r * total)
+        return self._pool[min(index, len(self._pool) - 1)]
+
+    def get_persona(self, group_id: Optional[str] = None, now: Optional[float] = None) -> Persona:
         """
         Select a persona based on configuration (Manual vs Random).
-        Returns dict with 'id', 'name', 'prompt'.
+        Supports dict-style access to 'id', 'name', 'prompt'; .template is the compiled prompt.
         """
-        settings = self._get_settings()
-        mode = settings.get("selection_mode", "manual")
-        presets = settings.get("presets", {})
-        
-        selected_key = None
-        
-        if mode == "random":
-            # Filter out empty presets
-            valid_keys = [k for k, v in presets.items() if v.get("prompt")]
-            if valid_keys:
-                selected_key = random.choice(valid_keys)
-        else:
-            # Manual mode: find preset by ID match or directly by key??
-            # Schema uses "active_preset" which stores the ID (e.g. "gossip").
-            # But presets are keyed by "preset_1", "preset_2"... 
-            # We need to find which preset slot has that ID.
-            target_id = settings.get("active_preset", "gossip")
-            for k, v in presets.items():
-                if v.get("id") == target_id:
-                    selected_key = k
-                    break
-        
-        # Fallback to preset_1 if not found
-        if not selected_key:
-             selected_key = "preset_1"
-        
-        preset_data = presets.get(selected_key, {})
-        
-        return {
-            "id": preset_data.get("id", "default"),
-            "name": preset_data.get("name", "Default"),
-            "prompt": preset_data.get("prompt", self.default_prompt)
-        }
+        conf = self._registry()
+        if conf.selection_mode == "random" and self._pool:
+            return self._draw(group_id, conf.sticky_hours, time.time() if now is None else now)
+        persona = self.by_id.get(conf.active_preset)
+        if persona is None:
+            # Fallback to the first slot
+            persona = self.personas[0] if self.personas else self.default_persona
+        return persona
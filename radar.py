@@ -1,146 +1,132 @@
 import time
-import json
-import os
 import logging
 import asyncio
+from typing import Optional
 
-logger = logging.getLogger("astrbot")
-
-class GroupState:
-    def __init__(self, group_id: str, max_score_cap: int = 1000, trigger_threshold: int = 80):
-        self.group_id = group_id
-        self.current_score = 0
-        self.max_score_cap = max_score_cap
-        self.trigger_threshold = trigger_threshold
-        
-        # State
-        self.last_update_time = time.time()
-        self.last_trigger_time = 0
-        self.message_buffer = [] # Store short history for context: list of (sender, content)
-        
-        # Velocity Tracking
-        self.window_size = 60 # 1 minute windows
-        self.current_window_start = time.time()
-        self.current_window_score = 0
-        self.prev_window_score = 0
-
-    def add_score(self, score: int, timestamp: float = None):
-        now = timestamp or time.time()
-        
-        # Check window rotation
-        diff = now - self.current_window_start
-        # logger.debug(f"[DEBUG] Window Check: Now={now}, Start={self.current_window_start}, Diff={diff}, Size={self.window_size}")
-        if diff > self.window_size:
-            logger.debug(f"[BuzzRadar] Rotating Window! Diff={diff}")
-            self.prev_window_score = self.current_window_score
-            self.current_window_score = 0
-            self.current_window_start = now
-            
-        self.current_window_score += score
-        
-        self.decay(timestamp=now) # Update decay before adding to total
-        self.current_score += score
-        if self.current_score > self.max_score_cap:
-             self.current_score = self.max_score_cap
-        
-        logger.debug(f"[BuzzRadar] Group {self.group_id} Score: {self.current_score:.2f} (+{score}) | Window: {self.current_window_score} (Prev: {self.prev_window_score})")
-
-    def decay(self, rate_per_minute: int = 5, timestamp: float = None):
-        now = timestamp or time.time()
-        minutes_passed = (now - self.last_update_time) / 60.0
-        
-        if minutes_passed > 0:
-            decay_amount = minutes_passed * rate_per_minute
-            self.current_score = max(0, self.current_score - decay_amount)
-            self.last_update_time = now
-
-    def add_message(self, sender: str, content: str):
-        # Keep buffer small, e.g., last 20 messages for sampling
-        self.message_buffer.append(f"{sender}: {content}")
-        if len(self.message_buffer) > 20:
-            self.message_buffer.pop(0)
-
-class PersistenceLayer:
-    def __init__(self, filepath: str):
-        self.filepath = filepath
-        self.data = {}
-        self.load()
-        
-    def load(self):
-        if os.path.exists(self.filepath):
-            try:
-                with open(self.filepath, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
-            except Exception as e:
-                logger.error(f"[BuzzRadar] 加载持久化数据失败: {e}")
-                self.data = {}
-    
-    def save(self):
-        try:
-            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-            with open(self.filepath, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"[BuzzRadar] 保存持久化数据失败: {e}")
-
-    def update_trigger_time(self, group_id: str, timestamp: float):
-        self.data[group_id] = {"last_trigger_time": timestamp}
+try:
+    from .state import GroupState, ObjectGroupStore
+    from .columnar import ColumnarGroupStore
+    from .persistence import PersistenceLayer
+    from .topics import TopicSketch, extract_terms, merge_bigrams
+    from .contributors import ContributorTracker
+    from .velocity import VelocitySpec
+    from .settings import as_store
+except ImportError:
+    from state import GroupState, ObjectGroupStore
+    from columnar import ColumnarGroupStore
+    from persistence import PersistenceLayer
+    from topics import TopicSketch, extract_terms, merge_bigrams
+    from contributors import ContributorTracker
+    from velocity import VelocitySpec
+    from settings import as_store
 
+logger = logging.getLogger("astrbot")
 
 class RadarSystem:
-    def __init__(self, config: dict, persistence_path: str = "data/buzz_radar/persistence.json", start_loop=True):
-        self.config = config
-        self.groups = {} # group_id -> GroupState
-        self.persistence = PersistenceLayer(persistence_path)
-        
-        # Restore last trigger times if needed (logic to be refined)
-        
-        # Start periodic tasks
-        if start_loop:
-            # Note: In actual plugin, use scheduler or asyncio.create_task
-            pass
+    def __init__(self, config, persistence_path: str = "data/buzz_radar/persistence.json"):
+        # Typed, immutable config snapshot (settings.ConfigStore); hot paths read store.current attributes
+        self.settings = as_store(config)
+        settings = self.settings.current
+        storage_conf = settings.storage_settings
+        # group_id -> GroupState (object store) or GroupView (columnar store)
+        self.groups = ColumnarGroupStore() if storage_conf.backend == "columnar" else ObjectGroupStore()
+        self.velocity_spec = VelocitySpec.from_config(settings.trigger_settings)
+        self.persistence = PersistenceLayer(
+            persistence_path,
+            debounce=storage_conf.flush_debounce_seconds,
+            journal_limit=int(storage_conf.journal_limit_mb * 1024 * 1024),
+        )
+        self.persistence.attach(self._record_of, self._live_records)
+        # group_id -> TopicSketch: decayed hot terms, rebuilt from live traffic (not persisted)
+        self.topics = {}
+        # group_id -> ContributorTracker: per-user decayed contributions over the last minutes (not persisted)
+        self.contributors = {}
+        self._topic_conf = settings.topic_settings # the settings the sketches above were built with
+        # Reason of the most recent fired trigger ("velocity" / "adaptive" / "threshold"), for metrics
+        self.last_trigger_reason = ""
+        # Periodic sweeps / flushes are driven by the plugin's MaintenanceScheduler
 
     def get_group_state(self, group_id: str) -> GroupState:
-        if group_id not in self.groups:
-            trigger_settings = self.config.get("trigger_settings", {})
-            self.groups[group_id] = GroupState(
+        state = self.groups.get(group_id)
+        if state is None:
+            settings = self.settings.current
+            state = self.groups.create(
                 group_id, 
-                max_score_cap=trigger_settings.get("max_score_cap", 1000),
-                trigger_threshold=trigger_settings.get("trigger_threshold", 80)
+                max_score_cap=settings.trigger_settings.max_score_cap,
+                trigger_threshold=settings.trigger_settings.trigger_threshold,
+                history_size=settings.summary_settings.history_size,
+                velocity_spec=self.velocity_spec
             )
-            # Restore trigger time
-            if group_id in self.persistence.data:
-                 self.groups[group_id].last_trigger_time = self.persistence.data[group_id].get("last_trigger_time", 0)
-        return self.groups[group_id]
+            # Restore persisted state (score, velocity buckets, history) saved before the last restart
+            record = self.persistence.take(group_id)
+            if record is not None:
+                state.apply_record(record)
+        return state
+
+    def find_group_state(self, group_id: str) -> Optional[GroupState]:
+        """已知的群状态 (内存中或已持久化)；持久化但尚未载入的群在此载入，未知的群返回 None 而不创建"""
+        state = self.groups.get(group_id)
+        if state is None and self.persistence.has(group_id):
+            state = self.get_group_state(group_id)
+        return state
+
+    def _record_of(self, group_id: str):
+        state = self.groups.get(group_id)
+        return state.to_record() if state is not None else None
+
+    def _live_records(self):
+        groups = self.groups
+        for gid in list(groups):
+            yield gid, groups[gid].to_record()
 
     async def on_message(self, group_id: str, score: int, sender: str, content: str, timestamp: float = None):
         state = self.get_group_state(group_id)
+        trigger_conf = self.settings.current.trigger_settings
         
-        # 1. Update Score
+        # 1. Update Score (capped by the sender's share of the group's recent heat)
+        contributors = self._contributors(group_id, trigger_conf)
+        score = contributors.credit(sender, score, timestamp)
         state.add_score(score, timestamp=timestamp)
         state.add_message(sender, content)
+        self.persistence.mark_dirty(group_id) # coalesced into a debounced journal append
+        self._index_topics(group_id, content, timestamp)
         
         # 2. Check Trigger
-        trigger_conf = self.config.get("trigger_settings", {})
-        cooldown = trigger_conf.get("cooldown_minutes", 10) * 60
+        cooldown = trigger_conf.cooldown_minutes * 60
         now = timestamp or time.time()
         
         is_triggered = False
         trigger_reason = ""
         
         # A. Velocity Trigger (Acceleration)
-        velocity_threshold = trigger_conf.get("velocity_threshold", 2.0)
-        min_velocity_score = trigger_conf.get("min_velocity_score", 30)
+        velocity_threshold = trigger_conf.velocity_threshold
+        min_velocity_score = trigger_conf.min_velocity_score
         
-        # Ensure we have a previous window to compare against and enough volume
-        if state.prev_window_score > 0 and state.current_window_score > min_velocity_score:
-            current_velocity = state.current_window_score / state.prev_window_score
+        # Compare the last minute against the EWMA baseline, once a full minute has been observed.
+        # Rate-based triggers also need several distinct speakers: one person talking fast is not a buzz.
+        velocity = state.velocity
+        window_score = velocity.window_score()
+        crowded = contributors.active(now) >= trigger_conf.min_active_users
+        if crowded and velocity.warm and window_score > min_velocity_score:
+            current_velocity = velocity.acceleration()
             if current_velocity >= velocity_threshold:
-                 logger.info(f"[BuzzRadar] 🚀 Group {group_id} 加速触发! Velocity: {current_velocity:.2f}x (Curr: {state.current_window_score}, Prev: {state.prev_window_score})")
+                 logger.info(f"[BuzzRadar] 🚀 Group {group_id} 加速触发! Velocity: {current_velocity:.2f}x (1m: {window_score}, Baseline: {velocity.baseline.mean:.1f}/min)")
                  is_triggered = True
                  trigger_reason = "velocity"
 
-        # B. Standard Threshold Trigger
+        # B. Adaptive Trigger: the last minute is an outlier for *this* group's usual activity
+        if not is_triggered and crowded and trigger_conf.adaptive_trigger:
+            baseline = velocity.baseline
+            warmup = trigger_conf.adaptive_warmup_minutes * 60 / self.velocity_spec.bucket_seconds
+            rate = velocity.rates()[0]
+            if baseline.samples >= warmup and rate >= trigger_conf.adaptive_min_rate:
+                z = baseline.zscore(rate)
+                if z >= trigger_conf.z_threshold:
+                    logger.info(f"[BuzzRadar] 🚀 Group {group_id} 异常升温! z={z:.1f} (1m: {rate:.1f}/min, 基线 {baseline.mean:.1f}±{baseline.std():.1f})")
+                    is_triggered = True
+                    trigger_reason = "adaptive"
+
+        # C. Standard Threshold Trigger
         if not is_triggered and state.current_score >= state.trigger_threshold:
              is_triggered = True
              trigger_reason = "threshold"
@@ -151,36 +137,92 @@ class RadarSystem:
                 # TRIGGER!
                 logger.info(f"[BuzzRadar] 🚀 Group {group_id} 触发总结 ({trigger_reason})! Score: {state.current_score}")
                 state.last_trigger_time = now
-                self.persistence.update_trigger_time(group_id, now)
-                self.persistence.save() # Immediate save on trigger is okay (low freq)
-                return True, state.message_buffer
+                self.last_trigger_reason = trigger_reason
+                return True, state.history.format()
             else:
                  logger.debug(f"[BuzzRadar] Group {group_id} 冷却中... (Score: {state.current_score})")
 
         return False, None
+
+    def apply_settings(self):
+        """
+        配置快照更新后调用 (/radar reload): 已有群的发言者上限改用新值；
+        热词设置变化时丢弃现有热词统计 (它们本就由实时消息重建)。
+        """
+        settings = self.settings.current
+        trigger_conf = settings.trigger_settings
+        for tracker in self.contributors.values():
+            tracker.share_cap = trigger_conf.user_share_cap
+            tracker.allowance = trigger_conf.user_allowance
+            tracker.resize(trigger_conf.max_tracked_users)
+        if settings.topic_settings != self._topic_conf:
+            self.topics.clear()
+            self._topic_conf = settings.topic_settings
+
+    def _contributors(self, group_id: str, trigger_conf) -> ContributorTracker:
+        tracker = self.contributors.get(group_id)
+        if tracker is None:
+            window = self.velocity_spec.horizons[0]
+            tracker = self.contributors[group_id] = ContributorTracker(
+                half_life=window,
+                window=window,
+                share_cap=trigger_conf.user_share_cap,
+                allowance=trigger_conf.user_allowance,
+                max_users=trigger_conf.max_tracked_users,
+            )
+        return tracker
     
+    def _index_topics(self, group_id: str, content: str, timestamp: float = None):
+        conf = self.settings.current.topic_settings
+        if not conf.enable or not content:
+            return
+        sketch = self.topics.get(group_id)
+        if sketch is None:
+            sketch = self.topics[group_id] = TopicSketch(
+                capacity=conf.capacity,
+                half_life=conf.half_life_minutes * 60,
+                now=timestamp,
+            )
+        sketch.add(extract_terms(content), now=timestamp)
+
+    def hot_keywords(self, group_id: str, n: int = None, now: float = None) -> list:
+        """
+        当前群的热词 (按衰减后的出现次数排序)，无需调用 LLM。
+        """
+        sketch = self.topics.get(group_id)
+        if sketch is None:
+            return []
+        n = n or self.settings.current.topic_settings.top_n
+        # Over-fetch so merged bigrams ("发布" + "布会") still leave n keywords
+        return merge_bigrams([term for term, _ in sketch.top(n * 2, now=now)])[:n]
+
     def get_group_state_snapshot(self, group_id: str) -> dict:
         """
         Get a snapshot of the group state for admin display.
         """
-        if group_id not in self.groups:
+        state = self.find_group_state(group_id)
+        if state is None:
             return None
         
-        state = self.groups[group_id]
         state.decay() # Update decay for fresh view
         
-        trigger_conf = self.config.get("trigger_settings", {})
-        cooldown_minutes = trigger_conf.get("cooldown_minutes", 10)
+        cooldown_minutes = self.settings.current.trigger_settings.cooldown_minutes
         cooldown_seconds = cooldown_minutes * 60
         
         now = time.time()
+        contributors = self.contributors.get(group_id)
         time_since_last_trigger = now - state.last_trigger_time
         remaining_cooldown = max(0, cooldown_seconds - time_since_last_trigger)
         
         return {
             "score": round(state.current_score, 1),
-            "max_score": state.max_score_cap,
-            "threshold": state.trigger_threshold,
+            "rates": state.velocity.rates(now), # score/min over spec.horizons
+            "baseline": state.velocity.baseline.mean,
+            "zscore": state.velocity.baseline.zscore(state.velocity.rates()[0]),
+            "active_users": contributors.active(now) if contributors else 0,
+            "top_users": contributors.top(3, now) if contributors else [],
+            "max_score": int(state.max_score_cap),
+            "threshold": int(state.trigger_threshold),
             "remaining_cooldown": remaining_cooldown
         }
 
@@ -188,9 +230,11 @@ class RadarSystem:
         """
         Force reset group score and trigger time.
         """
-        if group_id in self.groups:
-            state = self.groups[group_id]
+        # Hydrates a persisted group first; the reset is then journaled over the old record
+        state = self.find_group_state(group_id)
+        if state is not None:
             state.current_score = 0
+            self.persistence.mark_dirty(group_id)
             # Optional: Reset trigger time or set to now to force cooldown? 
             # User requirement: "Force reset score". "Optional: Force cooldown".
             # Let's just reset score for "Calm". 
@@ -201,12 +245,45 @@ class RadarSystem:
         清理僵尸群状态 (Lazy Cleanup)
         """
         now = time.time()
-        limit = max_idle_days * 86400
-        zombies = []
-        for gid, state in self.groups.items():
-            if now - state.last_update_time > limit:
-                zombies.append(gid)
-        
+        zombies = self.groups.sweep_idle(now, max_idle_days * 86400)
         for gid in zombies:
-            del self.groups[gid]
+            self.persistence.mark_dirty(gid) # journaled as a deletion
+            self.topics.pop(gid, None)
+            self.contributors.pop(gid, None)
             logger.info(f"[BuzzRadar] 清理僵尸群状态: {gid}")
+        self.persistence.drop_idle(now, max_idle_days * 86400)
+        return zombies
+
+    async def sweep_zombies(self, max_idle_days: float = 7, chunk_size: int = 1000) -> int:
+        """
+        后台版僵尸清理: 分片执行，每片之间让出事件循环。
+        """
+        removed = 0
+        now = time.time()
+        for zombies in self.groups.sweep_chunks(now, max_idle_days * 86400, chunk_size):
+            removed += len(zombies)
+            for gid in zombies:
+                self.persistence.mark_dirty(gid) # journaled as a deletion
+                self.topics.pop(gid, None)
+                self.contributors.pop(gid, None)
+            await asyncio.sleep(0)
+        removed += self.persistence.drop_idle(now, max_idle_days * 86400)
+        if removed:
+            logger.info(f"[BuzzRadar] 清理僵尸群状态: {removed} 个")
+        return removed
+
+    async def predecay_idle(self, min_idle_seconds: float = 300, chunk_size: int = 1000) -> int:
+        """
+        对空闲群提前结算衰减，让排行与状态面板无需逐个结算。分片执行。
+        """
+        updated = 0
+        for n in self.groups.decay_chunks(time.time(), min_idle_seconds=min_idle_seconds, chunk_size=chunk_size):
+            updated += n
+            await asyncio.sleep(0)
+        return updated
+
+    def hottest_groups(self, n: int = 5) -> list:
+        """
+        当前最热的 n 个群 [(group_id, score), ...]
+        """
+        return self.groups.top_n(n, time.time())
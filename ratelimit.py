@@ -0,0 +1,134 @@
+import time
+import logging
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger("astrbot")
+
+class TokenBucket:
+    """
+    连续补充的令牌桶。rate 为每秒补充的令牌数，capacity 为桶容量 (允许的突发量)。
+    """
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float, n: float = 1) -> float:
+        """距离桶内有 n 个令牌还需等待的秒数 (0 表示现在即可取)。"""
+        self._refill(now)
+        deficit = n - self.tokens
+        if deficit <= 0:
+            return 0.0
+        return deficit / self.rate
+
+    def consume(self, n: float = 1):
+        self.tokens -= n
+
+class HierarchicalRateLimiter:
+    """
+    分层令牌桶限流: 全局 -> 每群 -> 每个 LLM 提供商。
+    一次 try_acquire 需要所有层级同时有令牌才会扣减，否则不扣减并返回最长等待时间。
+    每分钟限额 <= 0 表示该层不限流。
+    """
+    def __init__(self, global_per_minute: float = 5, global_burst: float = 5,
+                 group_per_minute: float = 2, group_burst: float = 2,
+                 provider_per_minute: float = 0, provider_burst: float = 0,
+                 max_groups: int = 4096, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.max_groups = max(1, int(max_groups))
+        self._group_spec = self._spec(group_per_minute, group_burst)
+        self._provider_spec = self._spec(provider_per_minute, provider_burst)
+
+        global_spec = self._spec(global_per_minute, global_burst)
+        self._global = TokenBucket(*global_spec, clock()) if global_spec else None
+        self._groups: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._providers = {}
+
+        # Stats
+        self.granted = 0
+        self.denied = 0
+
+    @staticmethod
+    def _spec(per_minute: float, burst: float) -> Optional[Tuple[float, float]]:
+        if not per_minute or per_minute <= 0:
+            return None
+        return per_minute / 60.0, max(1.0, float(burst or per_minute))
+
+    @classmethod
+    def from_config(cls, conf: dict, **kwargs) -> "HierarchicalRateLimiter":
+        return cls(
+            global_per_minute=conf.get("global_per_minute", 5),
+            global_burst=conf.get("global_burst", 5),
+            group_per_minute=conf.get("group_per_minute", 2),
+            group_burst=conf.get("group_burst", 2),
+            provider_per_minute=conf.get("provider_per_minute", 0),
+            provider_burst=conf.get("provider_burst", 0),
+            max_groups=conf.get("max_tracked_groups", 4096),
+            **kwargs
+        )
+
+    def _group_bucket(self, group_id: str, now: float) -> Optional[TokenBucket]:
+        if self._group_spec is None:
+            return None
+        bucket = self._groups.get(group_id)
+        if bucket is None:
+            bucket = TokenBucket(*self._group_spec, now)
+            self._groups[group_id] = bucket
+            if len(self._groups) > self.max_groups:
+                # LRU eviction: an evicted group simply starts again with a full bucket
+                self._groups.popitem(last=False)
+        else:
+            self._groups.move_to_end(group_id)
+        return bucket
+
+    def _provider_bucket(self, provider_id: Optional[str], now: float) -> Optional[TokenBucket]:
+        if self._provider_spec is None or not provider_id:
+            return None
+        bucket = self._providers.get(provider_id)
+        if bucket is None:
+            bucket = self._providers[provider_id] = TokenBucket(*self._provider_spec, now)
+        return bucket
+
+    def _buckets(self, group_id: str, provider_id: Optional[str], now: float):
+        return [b for b in (self._global, self._group_bucket(group_id, now), self._provider_bucket(provider_id, now)) if b]
+
+    def try_acquire(self, group_id: str, provider_id: Optional[str] = None) -> Tuple[bool, float]:
+        """
+        尝试为一次 LLM 调用取令牌 (O(1))。
+        返回 (是否成功, 失败时距离下一个可用令牌的秒数)。
+        """
+        now = self.clock()
+        buckets = self._buckets(group_id, provider_id, now)
+        wait = max((b.wait_time(now) for b in buckets), default=0.0)
+        if wait > 0:
+            self.denied += 1
+            return False, wait
+        for b in buckets:
+            b.consume()
+        self.granted += 1
+        return True, 0.0
+
+    def next_available(self, group_id: str, provider_id: Optional[str] = None) -> float:
+        """不扣减令牌，仅查询还需等待多少秒。"""
+        now = self.clock()
+        return max((b.wait_time(now) for b in self._buckets(group_id, provider_id, now)), default=0.0)
+
+    def stats(self) -> dict:
+        if self._global:
+            self._global._refill(self.clock())
+        return {
+            "granted": self.granted,
+            "denied": self.denied,
+            "global_tokens": round(self._global.tokens, 2) if self._global else None,
+            "tracked_groups": len(self._groups),
+        }
@@ -0,0 +1,98 @@
+import re
+import math
+import heapq
+from collections import Counter
+from typing import Callable, List, Optional
+
+try:
+    from .sampler import cjk_token_estimator
+    from .topics import extract_terms
+except ImportError:
+    from sampler import cjk_token_estimator
+    from topics import extract_terms
+
+# Text-level hints of a reply / quote / mention (the ring only keeps plain text)
+_REPLY_RE = re.compile(r"^\s*(?:@|回复|>|「|“|\[引用\]|\[回复\])")
+
+DEFAULT_WEIGHTS = {
+    "length": 1.0, # saturating token length: one-word replies score low
+    "keywords": 1.5, # share of the window's burst terms the message carries
+    "sender": 0.8, # rarity of the sender in the window (quiet members speaking up)
+    "reply": 0.7, # replies / quotes / mentions tie the conversation together
+}
+
+class SalienceRanker:
+    """
+    总结上下文的显著性排序: 不调用 LLM，只用长度、发言人分布、关键词爆发与回复/引用特征给每条消息打分，
+    然后在 token 预算内选出至多 top_k 条 (heapq.nlargest, O(n log k)) 并按时间顺序输出。
+    完全相同的内容 (例如刷屏的 "+1") 按重复次数降权；最近 keep_recent 条总是保留。
+    """
+    def __init__(self, estimator: Optional[Callable[[str], int]] = None, weights: Optional[dict] = None,
+                 top_k: int = 15, keep_recent: int = 2, saturation: int = 30):
+        self.estimator = estimator or cjk_token_estimator
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.top_k = max(1, int(top_k))
+        self.keep_recent = min(keep_recent, self.top_k)
+        self.saturation = saturation
+
+    def score(self, messages: List[str], costs: Optional[List[int]] = None) -> List[float]:
+        """返回与 messages 一一对应的显著性分数 (messages 为 "sender: content" 文本)"""
+        n = len(messages)
+        if costs is None:
+            costs = [self.estimator(m) for m in messages]
+        parts = [m.partition(": ") for m in messages]
+        senders = Counter(p[0] if p[1] else "" for p in parts)
+        contents = [p[2] if p[1] else p[0] for p in parts]
+        duplicates = Counter(contents)
+        terms = [extract_terms(c) for c in contents]
+        df = Counter()
+        for t in terms:
+            df.update(t)
+        # A burst term shows up in several messages, but not in (almost) all of them
+        ceiling = max(3, n // 2)
+        burst = {t: math.log2(c) for t, c in df.items() if 2 <= c <= ceiling}
+        top_burst = max(burst.values(), default=1.0)
+
+        w = self.weights
+        saturation = self.saturation
+        scores = []
+        for i in range(n):
+            sender, sep, _ = parts[i]
+            kw = sum(burst.get(t, 0.0) for t in terms[i]) / (top_burst * 3) if burst else 0.0
+            s = (
+                w["length"] * min(costs[i], saturation) / saturation
+                + w["keywords"] * min(kw, 1.0)
+                + w["sender"] / math.sqrt(senders[sender if sep else ""])
+                + w["reply"] * (1.0 if _REPLY_RE.match(contents[i]) else 0.0)
+            )
+            scores.append(s / duplicates[contents[i]])
+        return scores
+
+    def select(self, messages: List[str], budget: float, costs: Optional[List[int]] = None) -> List[str]:
+        """在 budget 内按显著性选取消息，保持时间顺序。"""
+        n = len(messages)
+        if n == 0:
+            return []
+        if costs is None:
+            costs = [self.estimator(m) for m in messages]
+        scores = self.score(messages, costs)
+
+        chosen = []
+        remaining = budget
+        recent = range(max(0, n - self.keep_recent), n)
+        for i in reversed(recent):
+            if costs[i] <= remaining or not chosen:
+                remaining -= costs[i]
+                chosen.append(i)
+        # Only the k best can fit: k from the average cost (with headroom for cheap messages), capped by top_k
+        avg = sum(costs) / n or 1
+        k = min(n, self.top_k * 2, int(budget / avg * 2) + 1)
+        candidates = heapq.nlargest(k, (i for i in range(n) if i not in recent), key=scores.__getitem__)
+        for i in candidates:
+            if remaining <= 0 or len(chosen) >= self.top_k:
+                break
+            if costs[i] <= remaining:
+                remaining -= costs[i]
+                chosen.append(i)
+        chosen.sort()
+        return [messages[i] for i in chosen]
@@ -1,38 +1,94 @@
-from typing import List, Tuple
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Callable, List, Optional
+
+SKIP_MARKER = "... (skipped) ..."
+
+def cjk_token_estimator(text: str) -> int:
+    """
+    CJK 感知的 token 估算: 汉字等宽字符约 1 token/字，ASCII 约 4 字符/token。
+    利用 UTF-8 编码长度统计多字节字符，避免逐字符循环。
+    """
+    wide = (len(text.encode("utf-8")) - len(text)) // 2
+    return wide + (len(text) - wide + 3) // 4
+
+def char_estimator(text: str) -> int:
+    """按字符数计 (旧行为)"""
+    return len(text)
 
 class ContentSampler:
-    def __init__(self, max_length: int = 1500):
-        self.max_length = max_length
+    """
+    在 token 预算内采样上下文: Head + Middle (Weighted) + Tail。
+
+    开头 (交代背景) 与结尾 (最新进展) 按比例分得预算，各用前缀和二分一次确定能放下多少条；
+    余下的预算 (含二者未用完的部分) 给中段: 中段切成等长区间，每个区间保留权重最高的一条。
+    全程 O(n)。不连续处插入 SKIP_MARKER。
+
+    传入 ranker (如 salience.SalienceRanker) 时改为按显著性选取 ranker.select(messages, budget, costs)；
+    此时即使未超预算，消息数超过 ranker.top_k 也会筛选。
+    """
+    def __init__(self, max_length: int = 1500, estimator: Optional[Callable[[str], int]] = None,
+                 head_ratio: float = 0.2, tail_ratio: float = 0.5,
+                 weight: Optional[Callable[[str, int], float]] = None, ranker=None):
+        self.max_length = max_length # token budget
+        self.estimator = estimator or cjk_token_estimator
+        self.head_ratio = head_ratio
+        self.tail_ratio = tail_ratio
+        # weight(message, tokens): preferred middle messages; by default the most substantive one per stride
+        self.weight = weight or (lambda message, tokens: tokens)
+        self.ranker = ranker
 
     def sample(self, messages: List[str]) -> List[str]:
         """
-        Intelligently sample messages to fit within token limits while preserving context.
+        Sample messages to fit within the token budget while preserving context.
         Strategy: Head + Middle (Weighted) + Tail
         """
-        total_msgs = len(messages)
-        if total_msgs <= 10:
-            return messages
-        
-        # Simple Logic for now:
-        # Keep first 3 (Context start)
-        # Keep last 15 (Recent context)
-        # Sample middle if space allows? 
-        # For Phase 2, let's implement a simple Head + Tail strategy.
-        
-        head = messages[:3]
-        tail = messages[-15:]
-        
-        # Check simple length constraints (approx chars)
-        result = head + ["... (skipped) ..."] + tail
-        
-        # Calculate roughly
-        current_len = sum(len(m) for m in result)
-        
-        if current_len > self.max_length:
-             # Truncate further from tail's start if needed
-             while current_len > self.max_length and len(tail) > 1:
-                 tail.pop(0)
-                 result = head + ["... (skipped) ..."] + tail
-                 current_len = sum(len(m) for m in result)
-                 
+        n = len(messages)
+        costs = [self.estimator(m) for m in messages]
+        prefix = list(accumulate(costs, initial=0)) # prefix[i] = tokens of messages[:i]
+        budget = self.max_length
+        ranker = self.ranker
+        if prefix[-1] <= budget and (ranker is None or n <= ranker.top_k):
+            return list(messages)
+        if ranker is not None:
+            return ranker.select(messages, budget, costs)
+        marker = self.estimator(SKIP_MARKER)
+
+        # Tail: smallest start whose suffix fits its share (always keep the latest message)
+        start = min(bisect_left(prefix, prefix[-1] - budget * self.tail_ratio), n - 1)
+        # Head: largest prefix within its share, never overlapping the tail
+        head = min(bisect_right(prefix, budget * self.head_ratio) - 1, start)
+
+        remaining = budget - prefix[head] - (prefix[-1] - prefix[start]) - marker
+        keep = list(range(head))
+        keep.extend(self._sample_middle(messages, costs, prefix, head, start, remaining, marker))
+        keep.extend(range(start, n))
+
+        result = []
+        prev = -1
+        for i in keep:
+            if i != prev + 1:
+                result.append(SKIP_MARKER)
+            result.append(messages[i])
+            prev = i
         return result
+
+    def _sample_middle(self, messages: List[str], costs: List[int], prefix: List[int],
+                       lo: int, hi: int, remaining: float, marker: int) -> List[int]:
+        """从 messages[lo:hi] 中按区间选取索引，每条按 (自身 + 一个标记) 计入剩余预算。"""
+        if hi <= lo or remaining <= 0:
+            return []
+        avg = (prefix[hi] - prefix[lo]) / (hi - lo) + marker
+        picks = int(remaining // avg)
+        if picks <= 0:
+            return []
+        stride = -(-(hi - lo) // picks)
+        weight = self.weight
+        chosen = []
+        for s in range(lo, hi, stride):
+            best = max(range(s, min(s + stride, hi)), key=lambda i: weight(messages[i], costs[i]))
+            extra = costs[best] + marker
+            if extra <= remaining:
+                remaining -= extra
+                chosen.append(best)
+        return chosen
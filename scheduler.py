@@ -0,0 +1,127 @@
+import time
+import random
+import asyncio
+import inspect
+import logging
+from typing import Awaitable, Callable, List, Optional, Union
+
+logger = logging.getLogger("astrbot")
+
+class ScheduledJob:
+    __slots__ = ("name", "func", "interval", "jitter", "next_run",
+                 "last_run", "last_duration", "max_duration", "runs", "failures")
+
+    def __init__(self, name: str, func: Callable[[], Union[None, Awaitable[None]]], interval: float, jitter: float):
+        self.name = name
+        self.func = func
+        self.interval = max(0.1, float(interval))
+        self.jitter = min(max(0.0, float(jitter)), 0.9)
+        self.next_run = 0.0
+        self.last_run = 0.0 # wall-clock timestamp of the last run
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.runs = 0
+        self.failures = 0
+
+    def schedule(self, now: float):
+        spread = self.interval * self.jitter
+        self.next_run = now + self.interval + random.uniform(-spread, spread)
+
+class MaintenanceScheduler:
+    """
+    插件后台维护调度器: 一个 asyncio 任务按各自的间隔 (带随机抖动，避免多个任务同时醒来) 依次执行周期任务，
+    并记录每个任务的上次运行时间与耗时。任务本身应分片执行并适时让出事件循环。
+    """
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.jobs: List[ScheduledJob] = []
+        self._task: Optional[asyncio.Task] = None
+        self._changed: Optional[asyncio.Event] = None # wakes the loop when the job table is replaced
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def add_job(self, name: str, func, interval: float, jitter: float = 0.1) -> ScheduledJob:
+        """注册周期任务。interval <= 0 表示禁用该任务。"""
+        if not interval or interval <= 0:
+            return None
+        job = ScheduledJob(name, func, interval, jitter)
+        job.schedule(self.clock())
+        self.jobs.append(job)
+        return job
+
+    def replace_jobs(self, jobs: List[ScheduledJob]):
+        """
+        换成新的任务表 (重新加载配置时用)，同名任务保留运行统计。
+        正在执行的任务不会被打断，运行循环按新的间隔重新排期。
+        """
+        old = {job.name: job for job in self.jobs}
+        for job in jobs:
+            prev = old.get(job.name)
+            if prev is not None:
+                job.runs, job.failures = prev.runs, prev.failures
+                job.last_run, job.last_duration, job.max_duration = prev.last_run, prev.last_duration, prev.max_duration
+        self.jobs = list(jobs)
+        if self._changed is not None:
+            self._changed.set()
+        if self.jobs and not self.running:
+            try:
+                self.start()
+            except RuntimeError:
+                pass # no running loop yet; started later like at load time
+
+    def start(self):
+        if self.running or not self.jobs:
+            return
+        self._changed = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"[BuzzRadar] 后台维护任务已启动: {[j.name for j in self.jobs]}")
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def run_job(self, job: ScheduledJob):
+        start = time.perf_counter()
+        try:
+            result = job.func()
+            if inspect.isawaitable(result):
+                await result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.failures += 1
+            logger.error(f"[BuzzRadar] 维护任务 {job.name} 执行失败: {e}")
+        finally:
+            job.last_duration = time.perf_counter() - start
+            job.max_duration = max(job.max_duration, job.last_duration)
+            job.last_run = time.time()
+            job.runs += 1
+            job.schedule(self.clock())
+
+    async def _run(self):
+        while self.jobs:
+            job = min(self.jobs, key=lambda j: j.next_run)
+            delay = job.next_run - self.clock()
+            if delay > 0:
+                self._changed.clear()
+                try:
+                    await asyncio.wait_for(self._changed.wait(), delay)
+                    continue # job table replaced: pick again
+                except asyncio.TimeoutError:
+                    pass
+            await self.run_job(job)
+
+    def stats(self) -> list:
+        return [{
+            "name": j.name,
+            "interval": j.interval,
+            "runs": j.runs,
+            "failures": j.failures,
+            "last_run": j.last_run,
+            "last_duration": j.last_duration,
+            "max_duration": j.max_duration,
+        } for j in self.jobs]
@@ -0,0 +1,137 @@
+import os
+import json
+import logging
+from collections.abc import Mapping
+from dataclasses import field, fields, make_dataclass
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger("astrbot")
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_conf_schema.json")
+
+_TRUE = {"true", "1", "yes", "on"}
+_FALSE = {"false", "0", "no", "off", ""}
+
+def _to_bool(value) -> bool:
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUE:
+            return True
+        if lowered in _FALSE:
+            return False
+        raise ValueError(f"not a bool: {value!r}")
+    return bool(value)
+
+def _to_int(value) -> int:
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"not an int: {value!r}")
+    return int(value)
+
+def _to_list(value) -> tuple:
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    raise ValueError(f"not a list: {value!r}")
+
+# schema type -> (python type, converter); lists become tuples so snapshots stay immutable
+_TYPES = {
+    "int": (int, _to_int),
+    "float": (float, float),
+    "bool": (bool, _to_bool),
+    "string": (str, str),
+    "text": (str, str),
+    "list": (tuple, _to_list),
+}
+
+class Section:
+    """
+    配置快照中一个分组的基类。字段为只读属性 (frozen + slots)；
+    get() 让只在初始化时读取配置的构造器 (如 from_config) 可以像读 dict 一样读取。
+    """
+    __slots__ = ()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def as_dict(self) -> dict:
+        return {f.name: (v.as_dict() if isinstance(v, Section) else v)
+                for f in fields(self) for v in (getattr(self, f.name),)}
+
+def _section_class(name: str, items: dict) -> type:
+    """按 schema 生成一个 frozen + slots 的 dataclass，字段类型与默认值取自 schema"""
+    spec = []
+    for key, item in items.items():
+        kind = item.get("type")
+        if kind == "object":
+            sub = _section_class(f"{name}_{key}", item.get("items", {}))
+            spec.append((key, sub, field(default=sub())))
+            continue
+        py_type, convert = _TYPES.get(kind, (object, lambda v: v))
+        default = item.get("default")
+        spec.append((key, py_type, field(default=convert(default) if default is not None else py_type())))
+    cls = make_dataclass(name, spec, bases=(Section,), frozen=True, slots=True)
+    cls._schema = items
+    return cls
+
+def _parse(cls: type, raw: Any, errors: List[str], path: str):
+    """按 schema 校验并转换 raw，无效或缺失的字段使用默认值 (无效时记录到 errors)"""
+    if not isinstance(raw, Mapping):
+        if raw is not None:
+            errors.append(f"{path or '<root>'}: 应为对象，实际为 {type(raw).__name__}")
+        raw = {}
+    values = {}
+    for key, item in cls._schema.items():
+        if key not in raw:
+            continue
+        value = raw[key]
+        where = f"{path}.{key}" if path else key
+        kind = item.get("type")
+        if kind == "object":
+            values[key] = _parse(cls.__dataclass_fields__[key].type, value, errors, where)
+            continue
+        try:
+            value = _TYPES[kind][1](value) if kind in _TYPES else value
+        except (TypeError, ValueError) as e:
+            errors.append(f"{where}: {e}")
+            continue
+        options = item.get("options")
+        if options and value not in options:
+            errors.append(f"{where}: {value!r} 不在可选值 {options} 中")
+            continue
+        values[key] = value
+    return cls(**values)
+
+def load_schema(path: str = SCHEMA_PATH) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+Settings = _section_class("Settings", load_schema())
+
+def build_settings(raw: Optional[Mapping]) -> Tuple["Settings", List[str]]:
+    """从原始配置 (AstrBotConfig / dict) 构建不可变快照，返回 (快照, 校验错误列表)"""
+    errors: List[str] = []
+    return _parse(Settings, raw, errors, ""), errors
+
+class ConfigStore:
+    """
+    持有当前配置快照。各组件在热路径上读取 store.current 的普通属性，
+    而不是逐层 dict.get；reload() 构建新快照后一次性替换引用 (原子切换，读者看到的要么是旧快照要么是新快照)。
+    """
+    def __init__(self, raw: Optional[Mapping] = None):
+        self.raw = raw if raw is not None else {}
+        self.version = 0
+        self.current: Settings = None
+        self.reload()
+
+    def reload(self, raw: Optional[Mapping] = None) -> "Settings":
+        if raw is not None:
+            self.raw = raw
+        snapshot, errors = build_settings(self.raw)
+        for error in errors:
+            logger.warning(f"[BuzzRadar] 配置项无效，已使用默认值: {error}")
+        self.current = snapshot
+        self.version += 1
+        return snapshot
+
+def as_store(config) -> ConfigStore:
+    """组件构造函数既接受共享的 ConfigStore，也接受原始配置 dict (独立使用 / 测试)"""
+    return config if isinstance(config, ConfigStore) else ConfigStore(config)
@@ -0,0 +1,145 @@
+import asyncio
+import time
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Iterable, Optional
+
+try:
+    from .dedup import content_hash
+except ImportError:
+    from dedup import content_hash
+
+logger = logging.getLogger("astrbot")
+
+class _Flight:
+    __slots__ = ("hashes", "future", "result", "expires")
+
+    def __init__(self, hashes: frozenset, future: Optional[asyncio.Future] = None):
+        self.hashes = hashes # content hashes of the context messages
+        self.future = future # set while the call is in flight
+        self.result = None
+        self.expires = 0.0
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    """两段上下文消息哈希集合的 Jaccard 相似度"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+class SingleFlight:
+    """
+    LLM 总结调用的合并与缓存，按 (scope, 上下文指纹) 作键，scope 通常是 (群号, 人格)。
+
+    - 同一个键已有调用在进行中时，后来者直接等待同一个结果 (single-flight)，不再发起新请求；
+    - 成功的结果进入一个小的 TTL + LRU 缓存；
+    - 近似重复: 同一 scope 下若已有 (进行中或缓存中的) 上下文与本次的消息集合相似度 >= min_similarity
+      (例如只多了最后一条消息)，也直接复用。
+    失败不缓存，异常会传给所有等待者。
+    """
+    def __init__(self, ttl: float = 300, max_entries: int = 128, min_similarity: float = 0.8,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = max(0.0, float(ttl))
+        self.max_entries = max(1, int(max_entries))
+        self.min_similarity = min_similarity
+        self.clock = clock
+        self._entries: "OrderedDict[tuple, _Flight]" = OrderedDict() # (scope, fingerprint) -> flight, LRU order
+        self._scopes = {} # scope -> {fingerprint, ...} for near-duplicate lookups
+
+        # Stats
+        self.calls = 0
+        self.hits = 0
+        self.near_hits = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, key: tuple):
+        self._entries.pop(key, None)
+        scope, fingerprint = key
+        members = self._scopes.get(scope)
+        if members is not None:
+            members.discard(fingerprint)
+            if not members:
+                del self._scopes[scope]
+
+    def _find(self, scope: Hashable, fingerprint: int, hashes: frozenset, now: float):
+        entry = self._entries.get((scope, fingerprint))
+        if entry is not None and (entry.future is not None or entry.expires > now):
+            return entry, False
+        if self.min_similarity >= 1.0:
+            return None, False
+        best, best_score = None, self.min_similarity
+        for other in list(self._scopes.get(scope, ())):
+            candidate = self._entries[(scope, other)]
+            if candidate.future is None and candidate.expires <= now:
+                self._drop((scope, other))
+                continue
+            score = similarity(hashes, candidate.hashes)
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best, best is not None
+
+    async def run(self, scope: Hashable, messages: Iterable[str], call: Callable[[], Awaitable]):
+        """返回 call() 的结果；相同或近似的上下文复用进行中的调用或缓存结果。"""
+        hashes = frozenset(content_hash(m) for m in messages)
+        fingerprint = hash(hashes)
+        now = self.clock()
+        entry, near = self._find(scope, fingerprint, hashes, now)
+        if entry is not None:
+            if entry.future is not None:
+                self.coalesced += 1
+                logger.debug(f"[BuzzRadar] 合并进行中的总结请求: {scope}")
+                return await asyncio.shield(entry.future)
+            if near:
+                self.near_hits += 1
+            else:
+                self.hits += 1
+            logger.debug(f"[BuzzRadar] 复用缓存的总结 ({'近似' if near else '相同'}上下文): {scope}")
+            return entry.result
+
+        key = (scope, fingerprint)
+        self._drop(key)
+        entry = _Flight(hashes, asyncio.get_running_loop().create_future())
+        self._entries[key] = entry
+        self._scopes.setdefault(scope, set()).add(fingerprint)
+        self.calls += 1
+        future = entry.future
+        try:
+            result = await call()
+        except BaseException as e:
+            if self._entries.get(key) is entry:
+                self._drop(key)
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception() # waiters re-raise it; avoid "never retrieved" warnings
+            raise
+        entry.future = None
+        future.set_result(result)
+        if self._entries.get(key) is not entry:
+            return result # evicted while in flight
+        if result and self.ttl:
+            entry.result = result
+            entry.expires = self.clock() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+        else:
+            self._drop(key)
+        return result
+
+    def invalidate(self, scope: Hashable = None):
+        """丢弃某个 scope (或全部) 的缓存结果，进行中的调用不受影响"""
+        for key in [k for k, e in self._entries.items() if e.future is None and (scope is None or k[0] == scope)]:
+            self._drop(key)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "calls": self.calls,
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,195 @@
+import time
+import heapq
+import logging
+
+try:
+    from .velocity import DEFAULT_SPEC, VelocitySpec, VelocityTracker
+except ImportError:
+    from velocity import DEFAULT_SPEC, VelocitySpec, VelocityTracker
+
+logger = logging.getLogger("astrbot")
+
+class MessageRing:
+    """
+    固定容量的消息环形缓冲区。sender / content 分开存放 (交错存于同一列表)，只有在生成总结时才拼接成文本。
+    列表在第一条消息到来时才分配并按需增长到 capacity，之后循环覆盖最旧的一条 (O(1))。
+    """
+    __slots__ = ("capacity", "items", "start")
+
+    def __init__(self, capacity: int = 20):
+        self.capacity = max(1, int(capacity))
+        self.items = None # [sender0, content0, sender1, content1, ...]
+        self.start = 0 # index of the oldest entry once the ring is full
+
+    def __len__(self):
+        return len(self.items) >> 1 if self.items else 0
+
+    def append(self, sender: str, content: str):
+        items = self.items
+        if items is None:
+            self.items = [sender, content]
+        elif len(items) < 2 * self.capacity:
+            items.append(sender)
+            items.append(content)
+        else:
+            i = 2 * self.start
+            items[i] = sender
+            items[i + 1] = content
+            self.start = (self.start + 1) % self.capacity
+
+    def entries(self) -> list:
+        """按时间顺序返回 [(sender, content), ...]"""
+        if not self.items:
+            return []
+        i = 2 * self.start
+        ordered = self.items[i:] + self.items[:i]
+        return list(zip(ordered[0::2], ordered[1::2]))
+
+    def format(self) -> list:
+        """按时间顺序返回 "sender: content" 文本列表"""
+        return [f"{sender}: {content}" for sender, content in self.entries()]
+
+    def flat(self) -> list:
+        """按时间顺序返回交错列表 [sender0, content0, ...] (用于持久化)"""
+        if not self.items:
+            return []
+        i = 2 * self.start
+        return self.items[i:] + self.items[:i]
+
+    def load_flat(self, items: list):
+        """从 flat() 的结果恢复，超出容量时只保留最新的部分"""
+        items = list(items[-2 * self.capacity:]) if items else None
+        if items and len(items) % 2:
+            items = items[1:]
+        self.items = items or None
+        self.start = 0
+
+    def clear(self):
+        self.items = None
+        self.start = 0
+
+class GroupLogic:
+    """
+    群状态的计分/衰减逻辑。只通过属性读写状态，因此既可用于 GroupState (对象存储)，
+    也可用于列式存储的 GroupView。
+    """
+    __slots__ = ()
+
+    @property
+    def message_buffer(self) -> list:
+        """Formatted history, oldest first"""
+        return self.history.format()
+
+    def add_score(self, score: int, timestamp: float = None):
+        now = timestamp or time.time()
+        self.velocity.add(score, now)
+        
+        self.decay(timestamp=now) # Update decay before adding to total
+        self.last_update_time = now
+        self.current_score += score
+        if self.current_score > self.max_score_cap:
+             self.current_score = self.max_score_cap
+        
+        logger.debug(f"[BuzzRadar] Group {self.group_id} Score: {self.current_score:.2f} (+{score}) | 1m: {self.velocity.window_score()} (Baseline: {self.velocity.baseline.mean:.1f}/min)")
+
+    def decay(self, rate_per_minute: int = 5, timestamp: float = None):
+        """结算到 timestamp 为止的衰减。只推进 last_decay_time，last_update_time (最后活动时间) 不变"""
+        now = timestamp or time.time()
+        minutes_passed = (now - self.last_decay_time) / 60.0
+        
+        if minutes_passed > 0:
+            decay_amount = minutes_passed * rate_per_minute
+            self.current_score = max(0, self.current_score - decay_amount)
+            self.last_decay_time = now
+
+    def add_message(self, sender: str, content: str):
+        self.history.append(sender, content)
+
+    def to_record(self) -> dict:
+        """完整状态的紧凑字典表示 (持久化用)"""
+        return {
+            "s": self.current_score,
+            "u": self.last_update_time,
+            "d": self.last_decay_time,
+            "t": self.last_trigger_time,
+            "v": self.velocity.to_record(),
+            "h": self.history.flat(),
+        }
+
+    def apply_record(self, record: dict):
+        """从 to_record() 的结果恢复状态；缺失的字段保持当前值"""
+        self.current_score = min(record.get("s", self.current_score), self.max_score_cap)
+        self.last_update_time = record.get("u", self.last_update_time)
+        self.last_decay_time = record.get("d", self.last_update_time)
+        self.last_trigger_time = record.get("t", self.last_trigger_time)
+        if "v" in record:
+            self.velocity.load_record(record["v"])
+        if "h" in record:
+            self.history.load_flat(record["h"])
+
+class GroupState(GroupLogic):
+    __slots__ = (
+        "group_id", "current_score", "max_score_cap", "trigger_threshold",
+        "last_update_time", "last_decay_time", "last_trigger_time", "history", "velocity",
+    )
+
+    def __init__(self, group_id: str, max_score_cap: int = 1000, trigger_threshold: int = 80, history_size: int = 20,
+                 velocity_spec: VelocitySpec = DEFAULT_SPEC):
+        self.group_id = group_id
+        self.current_score = 0
+        self.max_score_cap = max_score_cap
+        self.trigger_threshold = trigger_threshold
+        
+        # State
+        self.last_update_time = time.time() # last activity (zombie sweeps)
+        self.last_decay_time = self.last_update_time # score decay settled up to here
+        self.last_trigger_time = 0
+        self.history = MessageRing(history_size) # Short history for context sampling
+        
+        # Velocity Tracking: multi-horizon bucket ring + EWMA baseline
+        self.velocity = VelocityTracker(velocity_spec)
+
+class ObjectGroupStore(dict):
+    """
+    默认的群状态存储: group_id -> GroupState。
+    与 ColumnarGroupStore 提供相同的批量接口 (decay_all / sweep_idle / top_n 及其分片版本)。
+    """
+    def create(self, group_id: str, **kwargs) -> GroupState:
+        state = self[group_id] = GroupState(group_id, **kwargs)
+        return state
+
+    def decay_all(self, now: float, rate_per_minute: float = 5, min_idle_seconds: float = 0) -> int:
+        return sum(self.decay_chunks(now, rate_per_minute, min_idle_seconds, chunk_size=max(1, len(self))))
+
+    def decay_chunks(self, now: float, rate_per_minute: float = 5, min_idle_seconds: float = 0, chunk_size: int = 1000):
+        """分片衰减空闲超过 min_idle_seconds 的群，每片结束 yield 本片更新的群数量。"""
+        gids = list(self.keys())
+        for i in range(0, len(gids), chunk_size):
+            updated = 0
+            for gid in gids[i:i + chunk_size]:
+                state = self.get(gid)
+                if state is not None and now - state.last_decay_time > min_idle_seconds:
+                    state.decay(rate_per_minute, timestamp=now)
+                    updated += 1
+            yield updated
+
+    def sweep_idle(self, now: float, max_idle_seconds: float) -> list:
+        return [gid for chunk in self.sweep_chunks(now, max_idle_seconds, chunk_size=max(1, len(self))) for gid in chunk]
+
+    def sweep_chunks(self, now: float, max_idle_seconds: float, chunk_size: int = 1000):
+        """分片移除超过 max_idle_seconds 未活动的群，每片结束 yield 本片移除的 group_id 列表。"""
+        gids = list(self.keys())
+        for i in range(0, len(gids), chunk_size):
+            zombies = []
+            for gid in gids[i:i + chunk_size]:
+                state = self.get(gid)
+                if state is not None and now - state.last_update_time > max_idle_seconds:
+                    del self[gid]
+                    zombies.append(gid)
+            yield zombies
+
+    def top_n(self, n: int, now: float, rate_per_minute: float = 5) -> list:
+        def effective(state):
+            return max(0, state.current_score - max(0, now - state.last_decay_time) / 60.0 * rate_per_minute)
+        ranked = heapq.nlargest(n, self.values(), key=effective)
+        return [(state.group_id, effective(state)) for state in ranked]
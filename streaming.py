@@ -0,0 +1,185 @@
+import re
+import time
+import logging
+from bisect import bisect_left
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+logger = logging.getLogger("astrbot")
+
+# A chunk may end after a line break or sentence-final punctuation
+_BOUNDARY_RE = re.compile(r"[\n。！？!?；;…]")
+
+def supports_streaming(provider) -> bool:
+    return provider is not None and callable(getattr(provider, "text_chat_stream", None))
+
+async def iter_deltas(provider, prompt: str) -> AsyncIterator[str]:
+    """
+    逐段读取 provider.text_chat_stream() 的输出，产出新增文本。
+    AstrBot 的流式响应先给出若干 is_chunk=True 的增量，最后可能再给一个 is_chunk=False 的完整结果；
+    完整结果只补发尚未收到的尾部，不重复输出。
+    """
+    received = ""
+    async for response in provider.text_chat_stream(prompt=prompt):
+        text = getattr(response, "completion_text", None) or ""
+        if not text:
+            continue
+        if getattr(response, "is_chunk", True):
+            received += text
+            yield text
+        elif text.startswith(received):
+            tail = text[len(received):]
+            received = text
+            if tail:
+                yield tail
+
+class StreamChunker:
+    """
+    把流式增量攒成适合逐条发送的片段: 缓冲满 min_chars 后在最近的句末/换行处切开；
+    超过 max_chars 仍找不到断点时强制切开。
+    """
+    def __init__(self, min_chars: int = 120, max_chars: int = 600):
+        self.min_chars = max(1, int(min_chars))
+        self.max_chars = max(self.min_chars, int(max_chars))
+        self.buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        self.buffer += delta
+        out = []
+        while len(self.buffer) >= self.min_chars:
+            match = _BOUNDARY_RE.search(self.buffer, self.min_chars - 1)
+            cut = match.end() if match else None
+            if cut is None or cut > self.max_chars:
+                if len(self.buffer) < self.max_chars:
+                    break # wait for a boundary
+                cut = self.max_chars
+            out.append(self.buffer[:cut])
+            self.buffer = self.buffer[cut:]
+        return out
+
+    def flush(self) -> Optional[str]:
+        rest, self.buffer = self.buffer, ""
+        return rest if rest.strip() else None
+
+async def complete(provider, prompt: str, on_delta: Optional[Callable[[str], None]] = None,
+                   latency: Optional["LatencyStats"] = None, provider_id: str = None,
+                   clock: Callable[[], float] = time.monotonic) -> Optional[str]:
+    """
+    调用 provider 生成完整回复并返回文本。传入 on_delta 且 provider 支持流式时逐段读取，
+    每收到一段就回调 on_delta；否则退回一次性的 text_chat()。延迟记入 latency (按 provider_id)。
+    """
+    start = clock()
+    ttft = None
+    streamed = on_delta is not None and supports_streaming(provider)
+    try:
+        if streamed:
+            parts = []
+            async for delta in iter_deltas(provider, prompt):
+                if ttft is None:
+                    ttft = clock() - start
+                parts.append(delta)
+                on_delta(delta)
+            text = "".join(parts)
+        else:
+            response = await provider.text_chat(prompt=prompt)
+            text = response.completion_text if response else None
+    except Exception:
+        if latency is not None:
+            latency.record_failure(provider_id)
+        raise
+    if latency is not None:
+        latency.record(provider_id, ttft, clock() - start, streamed)
+    return text
+
+class LatencyHistogram:
+    """
+    对数分桶的延迟直方图 (相邻桶边界相差 25%，覆盖 50ms ~ 5min)，O(1) 记录、O(桶数) 求分位数。
+    样本数超过 max_samples 时所有计数减半，让分位数逐渐跟上 provider 近期的表现。
+    """
+    __slots__ = ("bounds", "counts", "total", "max_samples")
+
+    BOUNDS = tuple(0.05 * 1.25 ** i for i in range(40)) # upper bounds in seconds
+
+    def __init__(self, max_samples: int = 2000):
+        self.bounds = self.BOUNDS
+        self.counts = [0] * (len(self.bounds) + 1) # last bucket: overflow
+        self.total = 0
+        self.max_samples = max_samples
+
+    def add(self, seconds: float):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.total += 1
+        if self.total > self.max_samples:
+            self.counts = [c // 2 for c in self.counts]
+            self.total = sum(self.counts)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """q 分位数 (所在桶的上界)，无样本时返回 None"""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[i] if i < len(self.bounds) else float("inf")
+        return float("inf")
+
+class LatencyStats:
+    """
+    每个 provider 的 LLM 调用延迟: 首 token 时间 (TTFT) 与总耗时 (另有总耗时直方图，供对冲请求判断 p95)。
+    非流式调用的 TTFT 即总耗时。
+    """
+    def __init__(self):
+        self._providers: Dict[str, dict] = {}
+
+    def _entry(self, provider_id: str) -> dict:
+        entry = self._providers.get(provider_id)
+        if entry is None:
+            entry = self._providers[provider_id] = {
+                "calls": 0, "streamed": 0, "failures": 0,
+                "ttft_total": 0.0, "ttft_max": 0.0, "latency_total": 0.0, "latency_max": 0.0,
+                "last_ttft": 0.0, "last_latency": 0.0, "histogram": LatencyHistogram(),
+            }
+        return entry
+
+    def record(self, provider_id: str, ttft: Optional[float], latency: float, streamed: bool = False):
+        entry = self._entry(provider_id or "default")
+        ttft = latency if ttft is None else ttft
+        entry["calls"] += 1
+        entry["streamed"] += int(streamed)
+        entry["ttft_total"] += ttft
+        entry["ttft_max"] = max(entry["ttft_max"], ttft)
+        entry["latency_total"] += latency
+        entry["latency_max"] = max(entry["latency_max"], latency)
+        entry["last_ttft"] = ttft
+        entry["last_latency"] = latency
+        entry["histogram"].add(latency)
+
+    def record_failure(self, provider_id: str):
+        self._entry(provider_id or "default")["failures"] += 1
+
+    def quantile(self, provider_id: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """provider 总耗时的 q 分位数；样本不足 min_samples 时返回 None"""
+        entry = self._providers.get(provider_id or "default")
+        if entry is None or entry["histogram"].total < max(1, min_samples):
+            return None
+        return entry["histogram"].quantile(q)
+
+    def stats(self) -> List[dict]:
+        result = []
+        for provider_id, e in self._providers.items():
+            calls = e["calls"]
+            result.append({
+                "provider": provider_id,
+                "calls": calls,
+                "streamed": e["streamed"],
+                "failures": e["failures"],
+                "avg_ttft": e["ttft_total"] / calls if calls else 0.0,
+                "max_ttft": e["ttft_max"],
+                "avg_latency": e["latency_total"] / calls if calls else 0.0,
+                "max_latency": e["latency_max"],
+                "last_ttft": e["last_ttft"],
+                "last_latency": e["last_latency"],
+                "p95_latency": e["histogram"].quantile(0.95) or 0.0,
+            })
+        return result
@@ -0,0 +1,195 @@
+import asyncio
+import random
+import time
+import logging
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+logger = logging.getLogger("astrbot")
+
+@dataclass(frozen=True)
+class SummaryJob:
+    """
+    一次待执行的总结任务。context 为触发时刻的消息快照 (不可变)，keywords 为同一时刻的群热词。
+    created_at 为首次入队时间，被限流延后的任务据此计算总等待时长。
+    """
+    group_id: str
+    umo: str
+    context: Tuple[str, ...]
+    reason: str = ""
+    keywords: Tuple[str, ...] = ()
+    created_at: float = 0.0
+
+class SummaryQueue:
+    """
+    有界总结任务队列 + 固定 worker 池。
+    handle_message 只负责投递任务并立即返回，拟人化延迟、LLM 调用与主动发送都在 worker 中完成。
+    gate (可选) 在执行前询问是否放行，返回 (ok, retry_after)；未放行的任务会在 retry_after 秒后
+    重新入队，不占用 worker。累计等待超过 max_defer 秒的任务才会被放弃。
+    detach=True 时 worker 放行后立即把 handler 作为独立任务启动、不等待其完成，也不做拟人化延迟
+    (由 handler 自己处理)；用于批量总结，让同时触发的多个群能在同一个批次窗口内汇合。
+    """
+    def __init__(self, handler: Callable[[SummaryJob], Awaitable[None]], max_size: int = 32,
+                 workers: int = 2, delay_range: Tuple[float, float] = (5, 15),
+                 gate: Optional[Callable[[SummaryJob], Awaitable[Tuple[bool, float]]]] = None,
+                 max_defer: float = 120, detach: bool = False):
+        self.handler = handler
+        self.gate = gate
+        self.max_size = max(1, int(max_size))
+        self.worker_count = max(1, int(workers))
+        self.reconfigure(delay_range, max_defer, detach)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._timers = set()
+        self._detached = set() # handler tasks started in detach mode
+
+        # Stats
+        self.enqueued = 0
+        self.started = 0
+        self.completed = 0
+        self.dropped = 0
+        self.deferred = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def reconfigure(self, delay_range: Tuple[float, float], max_defer: float, detach: bool):
+        """更新延迟区间 / 最长等待 / detach 模式，对之后取出的任务生效 (容量与 worker 数需重启)。"""
+        low, high = delay_range
+        self.delay_range = (max(0.0, float(low)), max(0.0, float(low), float(high)))
+        self.max_defer = max(0.0, float(max_defer))
+        self.detach = detach
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers) and not all(w.done() for w in self._workers)
+
+    def start(self):
+        """启动 worker 池 (需在事件循环中调用，重复调用无副作用)。"""
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._workers = [loop.create_task(self._worker(i)) for i in range(self.worker_count)]
+        logger.info(f"[BuzzRadar] 总结队列已启动: {self.worker_count} workers, 容量 {self.max_size}")
+
+    async def stop(self):
+        """取消所有 worker，丢弃尚未执行的任务。"""
+        workers, self._workers = self._workers, []
+        for handle in self._timers:
+            handle.cancel()
+        self._timers.clear()
+        detached, self._detached = self._detached, set()
+        for task in list(workers) + list(detached):
+            task.cancel()
+        if workers or detached:
+            await asyncio.gather(*workers, *detached, return_exceptions=True)
+
+    def submit(self, job: SummaryJob) -> bool:
+        """
+        非阻塞投递。队列已满时丢弃并返回 False。
+        被限流延后的任务 (created_at 已设置) 重新入队时不再计入 enqueued；此时队列已满记为 rate_limited。
+        """
+        self.start()
+        first = not job.created_at
+        if first:
+            job = replace(job, created_at=time.monotonic())
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            if first:
+                self.dropped += 1
+                logger.warning(f"[BuzzRadar] 总结队列已满 ({self.max_size})，丢弃 Group {job.group_id} 的总结任务。")
+            else:
+                self.rate_limited += 1
+                logger.warning(f"[BuzzRadar] 限流: Group {job.group_id} 的总结延后后队列已满，放弃。")
+            return False
+        if first:
+            self.enqueued += 1
+        return True
+
+    def _defer(self, job: SummaryJob, retry_after: float):
+        waited = time.monotonic() - job.created_at
+        if waited + retry_after > self.max_defer:
+            self.rate_limited += 1
+            logger.warning(f"[BuzzRadar] 限流: Group {job.group_id} 的总结已等待 {waited:.0f}s，放弃。")
+            return
+        self.deferred += 1
+        logger.info(f"[BuzzRadar] 限流: Group {job.group_id} 的总结延后 {retry_after:.1f}s")
+        handle = asyncio.get_running_loop().call_later(retry_after, lambda: self._requeue(job, handle))
+        self._timers.add(handle)
+
+    def _requeue(self, job: SummaryJob, handle):
+        self._timers.discard(handle)
+        if self.running:
+            self.submit(job)
+
+    async def _worker(self, idx: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                if self.gate is not None:
+                    ok, retry_after = await self.gate(job)
+                    if not ok:
+                        self._defer(job, retry_after)
+                        continue
+
+                # Counted once per job, including any time spent deferred by the gate
+                wait = time.monotonic() - job.created_at
+                self.started += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+
+                if self.detach:
+                    self._spawn(job)
+                    continue
+
+                # Random Delay (Debounce/Humanization)
+                delay = random.uniform(*self.delay_range)
+                logger.info(f"[BuzzRadar] 拟人化延迟: {delay:.1f}s (Group {job.group_id}, worker {idx})")
+                await asyncio.sleep(delay)
+
+                await self.handler(job)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"[BuzzRadar] 总结任务执行失败 (Group {job.group_id}): {e}")
+            finally:
+                self._queue.task_done()
+
+    def _spawn(self, job: SummaryJob):
+        task = asyncio.get_running_loop().create_task(self.handler(job))
+        self._detached.add(task)
+        task.add_done_callback(lambda t: self._finish(job, t))
+
+    def _finish(self, job: SummaryJob, task: asyncio.Task):
+        self._detached.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.failed += 1
+            logger.error(f"[BuzzRadar] 总结任务执行失败 (Group {job.group_id}): {task.exception()}")
+        else:
+            self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "depth": self._queue.qsize() if self._queue else 0,
+            "capacity": self.max_size,
+            "workers": self.worker_count if self.running else 0,
+            "detached": len(self._detached),
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "deferred": self.deferred,
+            "deferred_pending": len(self._timers),
+            "rate_limited": self.rate_limited,
+            "avg_wait": self.total_wait / self.started if self.started else 0.0,
+            "max_wait": self.max_wait,
+        }
@@ -0,0 +1,72 @@
+"""
+配置读取微基准: 对比每条消息逐层 dict.get (旧版) 与读取不可变配置快照属性 (settings.ConfigStore) 的开销。
+覆盖热路径上每条消息都会读的配置项: 过滤流水线检查、打分权重、触发条件。
+
+用法: python tests/bench_config.py [迭代次数]   (默认 200000)
+"""
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from settings import ConfigStore, load_schema
+
+def make_raw_config() -> dict:
+    """Schema defaults as a plain nested dict, like the AstrBotConfig the plugin receives"""
+    def defaults(items):
+        return {key: defaults(item.get("items", {})) if item.get("type") == "object" else item.get("default")
+                for key, item in items.items()}
+    return defaults(load_schema())
+
+def legacy_reads(config: dict):
+    """Replica of the per-message lookups before the snapshot: filter + score + trigger"""
+    cleaning_conf = config.get("cleaning_settings") or {}
+    cleaning_conf.get("deduplicate_threshold", 3)
+    score_conf = config.get("score_weights", {})
+    score = score_conf.get("base_score", 1)
+    score = max(score, score_conf.get("image_score", 2))
+    score += score_conf.get("long_text_bonus", 1)
+    trigger_conf = config.get("trigger_settings", {})
+    cooldown = trigger_conf.get("cooldown_minutes", 10) * 60
+    trigger_conf.get("velocity_threshold", 2.0)
+    trigger_conf.get("min_velocity_score", 30)
+    if trigger_conf.get("adaptive_trigger", True):
+        trigger_conf.get("adaptive_warmup_minutes", 30)
+        trigger_conf.get("adaptive_min_rate", 5)
+        trigger_conf.get("z_threshold", 3.0)
+    topic_conf = config.get("topic_settings", {})
+    topic_conf.get("enable", True)
+    return score, cooldown
+
+def snapshot_reads(store: ConfigStore):
+    """Same values, read as attributes of the current snapshot"""
+    settings = store.current
+    settings.cleaning_settings
+    score_conf = settings.score_weights
+    score = score_conf.base_score
+    score = max(score, score_conf.image_score)
+    score += score_conf.long_text_bonus
+    trigger_conf = store.current.trigger_settings
+    cooldown = trigger_conf.cooldown_minutes * 60
+    trigger_conf.velocity_threshold
+    trigger_conf.min_velocity_score
+    if trigger_conf.adaptive_trigger:
+        trigger_conf.adaptive_warmup_minutes
+        trigger_conf.adaptive_min_rate
+        trigger_conf.z_threshold
+    store.current.topic_settings.enable
+    return score, cooldown
+
+def bench(number: int):
+    raw = make_raw_config()
+    store = ConfigStore(raw)
+    assert legacy_reads(raw) == snapshot_reads(store)
+    print(f"{number} 条消息:")
+    for name, func in [("dict.get", lambda: legacy_reads(raw)), ("snapshot", lambda: snapshot_reads(store))]:
+        per_call = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print(f"  {name:<10} {per_call * 1e9:8.1f} ns/条")
+    reload = min(timeit.repeat(store.reload, number=100, repeat=3)) / 100
+    print(f"  reload     {reload * 1e6:8.1f} µs/次 (构建并替换快照)")
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,74 @@
+"""
+GroupState 内存基准: 对比旧版 (普通对象 + 格式化字符串列表) 与当前 slotted GroupState + MessageRing 的每群内存占用。
+
+用法: python tests/bench_memory.py [群数量 ...]   (默认 10000 100000)
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from radar import GroupState
+
+HISTORY = 20
+
+class LegacyGroupState:
+    """Replica of the pre-slots GroupState layout, kept here only for comparison."""
+    def __init__(self, group_id: str, max_score_cap: int = 1000, trigger_threshold: int = 80):
+        self.group_id = group_id
+        self.current_score = 0
+        self.max_score_cap = max_score_cap
+        self.trigger_threshold = trigger_threshold
+        self.last_update_time = time.time()
+        self.last_trigger_time = 0
+        self.message_buffer = []
+        self.window_size = 60
+        self.current_window_start = time.time()
+        self.current_window_score = 0
+        self.prev_window_score = 0
+
+    def add_message(self, sender: str, content: str):
+        self.message_buffer.append(f"{sender}: {content}")
+        if len(self.message_buffer) > 20:
+            self.message_buffer.pop(0)
+
+# Shared pools mimic real traffic, where sender ids and message texts are already-allocated strings
+SENDERS = [f"user_{i}" for i in range(200)]
+CONTENTS = [f"这是第 {i} 条比较普通的群聊消息内容" for i in range(500)]
+
+def measure(factory, groups: int, messages: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    states = {}
+    for g in range(groups):
+        gid = f"group_{g}"
+        state = factory(gid)
+        for m in range(messages):
+            state.add_message(SENDERS[(g + m) % len(SENDERS)], CONTENTS[(g * 7 + m) % len(CONTENTS)])
+        states[gid] = state
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del states
+    gc.collect()
+    return used / groups
+
+def main(sizes):
+    factories = {
+        "legacy": lambda gid: LegacyGroupState(gid),
+        "slotted": lambda gid: GroupState(gid, history_size=HISTORY),
+    }
+    print(f"{'groups':>8} {'msgs/group':>10} {'layout':>8} {'bytes/group':>12}")
+    for groups in sizes:
+        for messages in (0, 5, HISTORY * 2):
+            row = {}
+            for name, factory in factories.items():
+                row[name] = measure(factory, groups, messages)
+                print(f"{groups:>8} {messages:>10} {name:>8} {row[name]:>12.0f}")
+            print(f"{'':>8} {'':>10} {'saving':>8} {1 - row['slotted'] / row['legacy']:>11.0%}")
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1:]] or [10_000, 100_000]
+    main(sizes)
@@ -0,0 +1,61 @@
+"""
+持久化冷启动基准: 生成 N 个带完整状态 (热度、窗口、20 条最近消息) 的群，写成快照 + journal 尾部，
+然后测量重启时加载 (mmap 快照与索引 + 重放 journal) 与首次访问 (按需 hydrate) 的耗时。
+加载耗时应基本不随群数量增长。
+
+用法: python tests/bench_persistence.py [群数量 ...]   (默认 10000 100000)
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from radar import RadarSystem
+
+HISTORY = 20
+JOURNAL_GROUPS = 1000 # groups changed after the last compaction (the journal is bounded by journal_limit_mb)
+SENDERS = [f"user_{i}" for i in range(200)]
+CONTENTS = [f"这是第 {i} 条比较普通的群聊消息内容" for i in range(500)]
+
+def populate(radar: RadarSystem, n: int, now: float):
+    for i in range(n):
+        state = radar.get_group_state(f"group_{i}")
+        state.current_score = i % 100
+        state.last_update_time = now
+        for j in range(HISTORY):
+            state.add_message(SENDERS[(i + j) % len(SENDERS)], CONTENTS[(i * 7 + j) % len(CONTENTS)])
+
+def bench(n: int):
+    config = {"summary_settings": {"history_size": HISTORY}, "storage_settings": {"journal_limit_mb": 1024}}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "persistence.json")
+        now = time.time()
+        radar = RadarSystem(config, persistence_path=path)
+        populate(radar, n, now)
+        radar.persistence.compact()
+        for i in range(min(JOURNAL_GROUPS, n)):
+            gid = f"group_{i * (n // JOURNAL_GROUPS or 1) % n}"
+            radar.groups[gid].add_message("late", "after snapshot")
+            radar.persistence.mark_dirty(gid)
+        radar.persistence.flush()
+        stats = radar.persistence.stats()
+
+        start = time.perf_counter()
+        restarted = RadarSystem(config, persistence_path=path)
+        load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(n):
+            restarted.get_group_state(f"group_{i}")
+        hydrate = time.perf_counter() - start
+
+        assert restarted.groups["group_0"].history.entries()[-1] == ("late", "after snapshot")
+        print(
+            f"{n:>7} 群 | 快照 {stats['snapshot_bytes'] / 1e6:7.1f} MB | journal {stats['journal_bytes'] / 1e6:6.1f} MB | "
+            f"加载 {load * 1000:8.1f} ms | 全部 hydrate {hydrate * 1000:8.1f} ms"
+        )
+
+if __name__ == "__main__":
+    for n in [int(arg) for arg in sys.argv[1:]] or [10000, 100000]:
+        bench(n)
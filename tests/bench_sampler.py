@@ -0,0 +1,42 @@
+"""
+ContentSampler 微基准: 在 10k 条消息上对比旧版 (逐条 pop + 每次重新求和) 与当前前缀和实现。
+
+用法: python tests/bench_sampler.py [消息数量 ...]   (默认 10000)
+"""
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sampler import ContentSampler, char_estimator
+
+def legacy_sample(messages, max_length=1500, tail_size=None):
+    """Replica of the pre-prefix-sum sampler; tail_size=None keeps every message as tail candidate (worst case)"""
+    if len(messages) <= 10:
+        return messages
+    head = messages[:3]
+    tail = messages[-tail_size:] if tail_size else messages[3:]
+    result = head + ["... (skipped) ..."] + tail
+    current_len = sum(len(m) for m in result)
+    while current_len > max_length and len(tail) > 1:
+        tail.pop(0)
+        result = head + ["... (skipped) ..."] + tail
+        current_len = sum(len(m) for m in result)
+    return result
+
+def bench(n: int):
+    messages = [f"user_{i % 300}: 第 {i} 条消息 {'哈' * (i % 40)} some english words {i}" for i in range(n)]
+    cases = [
+        ("legacy tail=15", lambda: legacy_sample(list(messages), tail_size=15), 20),
+        ("legacy worst 2k", lambda: legacy_sample(list(messages[:2000])), 1),
+        ("sampler chars", lambda: ContentSampler(estimator=char_estimator).sample(messages), 20),
+        ("sampler cjk", lambda: ContentSampler().sample(messages), 20),
+    ]
+    print(f"{n} 条消息:")
+    for name, func, number in cases:
+        per_call = timeit.timeit(func, number=number) / number
+        print(f"  {name:<15} {per_call * 1000:9.2f} ms/次")
+
+if __name__ == "__main__":
+    for n in [int(arg) for arg in sys.argv[1:]] or [10000]:
+        bench(n)
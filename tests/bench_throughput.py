@@ -0,0 +1,229 @@
+"""
+吞吐基准: 用合成流量 (N 个群 × 每群 M 条/秒) 驱动完整的 BuzzRadarPlugin.handle_message，
+报告 msgs/sec、单条 handle_message 延迟 p50/p99、各阶段耗时、峰值 RSS 与触发次数。
+
+流量模型对应 开发测试等规划.md 中的三个测试日志 (按 M 缩放):
+  normal         日常闲聊: 每群稳定 M 条/秒，发言人与内容分散
+  breaking_news  突发新闻: 前 5/6 时间每群 M/10 条/秒，最后 1/6 时间骤增到 5M 条/秒，话题集中
+  spam           复读刷屏: 大部分是少数几个人重复同一个表情/口令
+
+与 scenario_runner 不同，这里不 patch time.time: 事件自带虚拟时间戳 (event.timestamp)，
+去重与限流使用注入的虚拟时钟，流量按虚拟时间生成、按真实耗时计时；计时之外才让出事件循环
+(总结 worker 使用本地 FakeProvider，不访问网络)。结果以 JSON 追加写入 --output (每次运行一行)，
+便于跨版本比较。
+
+用法: python tests/bench_throughput.py [--groups 50] [--rate 1] [--duration 300]
+                                       [--profile all|normal|breaking_news|spam] [--output bench_throughput.jsonl]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import tests.scenario_runner as scenario # installs the AstrBot stand-in modules
+from tests.bench_config import make_raw_config
+from tests.fake_provider import FakeProvider
+from tests.mock_event import MockContext, MockEvent
+from main import BuzzRadarPlugin
+from metrics import STAGES
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+logging.getLogger().setLevel(logging.WARNING) # scenario_runner logs at DEBUG
+
+PROFILES = ("normal", "breaking_news", "spam")
+TOPICS = ["新版本", "发布会", "服务器", "更新公告", "活动", "抽卡", "bug", "维护"]
+WORDS = ["今天", "大家", "感觉", "真的", "有点", "好像", "明天", "刚才", "看到", "听说", "还是", "应该"]
+STICKERS = ["[表情]", "666", "哈哈哈哈", "+1"]
+
+class VirtualClock:
+    """单调前进的虚拟时钟 (秒)，注入去重与限流"""
+    def __init__(self, start: float):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+class BenchContext(MockContext):
+    """MockContext + 本地 FakeProvider (旧版 get_using_provider 路径) + 记录主动发送"""
+    def __init__(self):
+        super().__init__()
+        self.provider = FakeProvider("大家在聊新版本的发布会。")
+        self.sent = 0
+
+    def get_using_provider(self, umo=None):
+        return self.provider
+
+    async def send_message(self, umo, result):
+        self.sent += 1
+
+def chat_line(rng: random.Random, topic: str = None) -> str:
+    words = rng.sample(WORDS, rng.randint(2, 5))
+    if topic:
+        words.insert(rng.randrange(len(words) + 1), topic)
+    return "".join(words) + rng.choice(["", "。", "？", "！", "吧"])
+
+def generate(profile: str, groups: int, rate: float, duration: float, start: float, seed: int) -> list:
+    """按 profile 生成 (时间戳, 群号, 用户, 内容)，按时间排序"""
+    rng = random.Random(seed)
+    events = []
+    for g in range(groups):
+        group_id = f"bench_{g}"
+        topic = rng.choice(TOPICS)
+        t = 0.0
+        while True:
+            if profile == "breaking_news":
+                burst = t >= duration * 5 / 6
+                t += rng.expovariate(rate * 5 if burst else rate / 10)
+            else:
+                burst = False
+                t += rng.expovariate(rate)
+            if t >= duration:
+                break
+            if profile == "spam" and rng.random() < 0.8:
+                user, content = f"u{rng.randrange(3)}", STICKERS[g % len(STICKERS)]
+            elif burst:
+                user, content = f"u{rng.randrange(60)}", chat_line(rng, topic)
+            else:
+                user, content = f"u{rng.randrange(30)}", chat_line(rng)
+            events.append((start + t, group_id, user, content))
+    events.sort(key=lambda e: e[0])
+    return events
+
+def default_config() -> dict:
+    config = make_raw_config()
+    # Summaries run on the local fake provider right away; the bench measures message handling
+    config["summary_settings"].update(min_delay_seconds=0, max_delay_seconds=0, queue_size=1024, stream=False)
+    config["metrics_settings"]["prometheus_file"] = ""
+    return config
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024 # bytes on macOS, KiB elsewhere
+
+async def run_profile(profile: str, args) -> dict:
+    start = 1_700_000_000.0
+    traffic = generate(profile, args.groups, args.rate, args.duration, start, args.seed)
+    clock = VirtualClock(start)
+    with tempfile.TemporaryDirectory() as data_dir:
+        scenario.mock_astrbot.api.star.StarTools.get_data_dir.return_value = data_dir
+        context = BenchContext()
+        plugin = BuzzRadarPlugin(context, default_config())
+        plugin.msg_filter.dedup.clock = clock
+        plugin.rate_limiter.clock = clock
+
+        # Build every event up front so only handle_message is timed
+        events = []
+        for ts, group_id, user, content in traffic:
+            event = MockEvent(content, user, group_id)
+            event.timestamp = ts
+            events.append(event)
+
+        latencies = []
+        next_yield = start + 1
+        began = time.perf_counter()
+        for event in events:
+            if event.timestamp >= next_yield:
+                clock.now = event.timestamp
+                next_yield = event.timestamp + 1
+                await asyncio.sleep(0) # once per virtual second: let summary workers / scheduler run
+            t0 = time.perf_counter_ns()
+            await plugin.handle_message(event)
+            latencies.append(time.perf_counter_ns() - t0)
+        busy = sum(latencies) / 1e9
+        wall = time.perf_counter() - began
+
+        try:
+            # Let the summaries queued by the last triggers finish (rate-limited ones are dropped by terminate)
+            await asyncio.wait_for(plugin.summary_queue._queue.join(), 5)
+        except (asyncio.TimeoutError, AttributeError):
+            pass
+        counters = plugin.metrics.counter_values()
+        queue = plugin.summary_queue.stats()
+        stages = {}
+        for stage in STAGES:
+            h = plugin.metrics.stages[stage]
+            if h.total:
+                stages[stage] = {"samples": h.total, "p50_us": h.quantile(0.5) / 1000, "p99_us": h.quantile(0.99) / 1000}
+        await plugin.terminate()
+
+    latencies.sort()
+    return {
+        "profile": profile,
+        "messages": len(events),
+        "virtual_seconds": args.duration,
+        "wall_seconds": round(wall, 3),
+        "msgs_per_sec": round(len(events) / busy, 1) if busy else None,
+        "p50_us": round(percentile(latencies, 0.50) / 1000, 2),
+        "p99_us": round(percentile(latencies, 0.99) / 1000, 2),
+        "max_us": round(latencies[-1] / 1000, 2) if latencies else 0.0,
+        "stages": stages,
+        "triggers": sum(counters.get("triggers_total", {}).values()),
+        "triggers_by_reason": counters.get("triggers_total", {}),
+        "filtered": sum(counters.get("filtered_total", {}).values()),
+        "summary_messages_sent": context.sent, # header + summary per completed job
+        "summaries_dropped": queue["dropped"] + queue["rate_limited"],
+        "peak_rss_mb": round(peak_rss_mb(), 1) if resource is not None else None, # process peak so far
+    }
+
+def git_revision():
+    try:
+        root = os.path.join(os.path.dirname(__file__), "..")
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+async def main(args):
+    profiles = PROFILES if args.profile == "all" else (args.profile,)
+    results = []
+    print(f"{args.groups} 个群 × {args.rate} 条/秒 × {args.duration}s (虚拟时间):")
+    for profile in profiles:
+        r = await run_profile(profile, args)
+        results.append(r)
+        print(
+            f"  {profile:<14} {r['messages']:>7} 条 | {r['msgs_per_sec']:>9} msgs/s | "
+            f"p50 {r['p50_us']:>7.1f}µs p99 {r['p99_us']:>8.1f}µs | 触发 {r['triggers']:>4} "
+            f"(过滤 {r['filtered']}) | 峰值 RSS {r['peak_rss_mb']} MB"
+        )
+
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"groups": args.groups, "rate": args.rate, "duration": args.duration, "seed": args.seed},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"结果已追加到 {args.output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BuzzRadar handle_message 吞吐基准")
+    parser.add_argument("--groups", type=int, default=50, help="群数量 N")
+    parser.add_argument("--rate", type=float, default=1.0, help="每群平均消息速率 M (条/秒)")
+    parser.add_argument("--duration", type=float, default=300.0, help="虚拟时长 (秒)")
+    parser.add_argument("--profile", choices=("all",) + PROFILES, default="all")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_throughput.jsonl", help="JSON Lines 结果文件 (追加)，留空则不写")
+    asyncio.run(main(parser.parse_args()))
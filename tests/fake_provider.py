@@ -0,0 +1,78 @@
+import asyncio
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+@dataclass
+class FakeResponse:
+    completion_text: str
+    is_chunk: bool = False
+    role: str = "assistant"
+
+class FakeProvider:
+    """
+    Local stand-in for an AstrBot chat provider: text_chat() returns `text` after `latency` seconds.
+    """
+    def __init__(self, text: str = "大家在聊新版本的发布会。", latency: float = 0.0,
+                 provider_id: str = "fake", error: Optional[Exception] = None):
+        self.text = text
+        self.latency = latency
+        self.provider_id = provider_id
+        self.error = error
+        self.prompts: List[str] = []
+
+    async def text_chat(self, prompt: str = None, **kwargs):
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+        return FakeResponse(self.text)
+
+class FakeStreamingProvider(FakeProvider):
+    """
+    Streams `text` in `chunk_size`-character deltas (is_chunk=True), `first_token` seconds before the
+    first one and `interval` seconds between the rest, then a final full response (is_chunk=False)
+    like AstrBot's text_chat_stream().
+    """
+    def __init__(self, text: str = "大家在聊新版本的发布会。", chunk_size: int = 4, first_token: float = 0.0,
+                 interval: float = 0.0, final: bool = True, **kwargs):
+        super().__init__(text, **kwargs)
+        self.chunk_size = chunk_size
+        self.first_token = first_token
+        self.interval = interval
+        self.final = final
+
+    async def text_chat_stream(self, prompt: str = None, **kwargs):
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.first_token)
+        for i in range(0, len(self.text), self.chunk_size):
+            if i:
+                await asyncio.sleep(self.interval)
+            if self.error is not None and i >= len(self.text) // 2:
+                raise self.error
+            yield FakeResponse(self.text[i:i + self.chunk_size], is_chunk=True)
+        if self.final:
+            yield FakeResponse(self.text)
+
+class FakeBatchProvider(FakeProvider):
+    """
+    Answers batched prompts section by section: for every "[[Gn]]" chat-log block it writes
+    "[[Gn]]\n<prefix><first line of the block>". `drop` lists section numbers to leave out; prompts
+    without sections get `text`.
+    """
+    def __init__(self, prefix: str = "总结: ", drop=(), **kwargs):
+        super().__init__(**kwargs)
+        self.prefix = prefix
+        self.drop = set(drop)
+
+    async def text_chat(self, prompt: str = None, **kwargs):
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+        blocks = re.findall(r"^\[\[G(\d+)\]\]\n(?!\(群)(.*)$", prompt or "", re.M)
+        if not blocks:
+            return FakeResponse(self.text)
+        return FakeResponse("\n".join(
+            f"[[G{n}]]\n{self.prefix}{line}" for n, line in blocks if int(n) not in self.drop
+        ))
@@ -1,5 +1,5 @@
 import time
-from typing import List, Any
+from typing import Any
 from dataclasses import dataclass, field
 
 # Mock AstrBot Components
@@ -44,6 +44,7 @@ class MockEvent:
             group_id=group_id,
             sender=self.sender
         )
+        self.unified_msg_origin = f"mock:GroupMessage:{group_id}"
         # Construct a simple message chain with one Plain component
         self.message_chain = [MockPlain(text=message_str)]
         
@@ -122,9 +122,10 @@ class ScenarioRunner:
                 event = MockEvent(content, user_id, group_id)
                 print(f"[Time {offset:.1f}s] Group:{group_id} User:{user_id} -> {content}")
                 
-                async for result in self.plugin.handle_message(event):
-                    print(f"   >>> BOT RESPONSE: {result}")
+                await self.plugin.handle_message(event)
 
+        print(f"[Runner] Summary queue: {self.plugin.summary_queue.stats()}")
+        await self.plugin.terminate()
         print("[Runner] Scenario completed.")
 
 if __name__ == "__main__":
@@ -0,0 +1,67 @@
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from baseline import RateBaseline
+from radar import RadarSystem
+
+class TestRateBaseline(unittest.TestCase):
+    def test_tracks_mean_and_variance(self):
+        rng = random.Random(7)
+        b = RateBaseline()
+        for _ in range(5000):
+            b.update(rng.gauss(20, 4), alpha=0.01)
+        self.assertAlmostEqual(b.mean, 20, delta=1.5)
+        self.assertAlmostEqual(b.std(), 4, delta=1.0)
+        self.assertGreater(b.zscore(40), 3)
+        self.assertLess(abs(b.zscore(20)), 1)
+
+    def test_closed_form_decay_matches_iteration(self):
+        stepped, closed = RateBaseline(10.0, 9.0, 5), RateBaseline(10.0, 9.0, 5)
+        for _ in range(37):
+            stepped.update(0.0, alpha=0.05)
+        closed.decay(37, alpha=0.05)
+        self.assertAlmostEqual(stepped.mean, closed.mean)
+        self.assertAlmostEqual(stepped.var, closed.var)
+        self.assertEqual(stepped.samples, closed.samples)
+
+class TestAdaptiveTrigger(unittest.TestCase):
+    def run_group(self, radar, group_id, per_minute, minutes, start):
+        """Feed `per_minute` one-point messages per minute from five rotating speakers; return the trigger times"""
+        reasons = []
+        for m in range(minutes):
+            for i in range(per_minute):
+                t = start + m * 60 + i * 60 / per_minute
+                triggered, _ = asyncio.run(radar.on_message(group_id, 1, f"u{i % 5}", "hi", timestamp=t))
+                if triggered:
+                    reasons.append(t)
+        return reasons
+
+    def test_threshold_scales_with_group_size(self):
+        config = {"trigger_settings": {"trigger_threshold": 10**6, "velocity_threshold": 100,
+                                       "adaptive_min_rate": 3, "adaptive_warmup_minutes": 20}}
+        with tempfile.TemporaryDirectory() as tmp:
+            radar = RadarSystem(config, persistence_path=os.path.join(tmp, "p.json"))
+            start = 1_000_000.0
+            # A big group chatting at its usual 40/min never triggers, a small one at 2/min neither
+            self.assertEqual(self.run_group(radar, "big", 40, 40, start), [])
+            self.assertEqual(self.run_group(radar, "small", 2, 40, start), [])
+            # 12/min is nothing for the big group's baseline, but an outlier for the small one
+            later = start + 40 * 60
+            self.assertTrue(self.run_group(radar, "small", 12, 1, later))
+            self.assertFalse(self.run_group(radar, "big", 12, 1, later))
+            self.assertGreater(radar.get_group_state("big").velocity.baseline.mean, 30)
+
+            # The baseline survives a restart
+            radar.persistence.flush()
+            restarted = RadarSystem(config, persistence_path=radar.persistence.filepath)
+            before = radar.groups["big"].velocity.baseline
+            after = restarted.get_group_state("big").velocity.baseline
+            self.assertAlmostEqual(after.mean, before.mean, places=3)
+            self.assertEqual(after.samples, before.samples)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from batcher import BATCH_INSTRUCTIONS, SummaryBatcher, split_sections
+from sampler import cjk_token_estimator
+from summary_queue import SummaryJob, SummaryQueue
+from tests.fake_provider import FakeBatchProvider
+
+PERSONA = "你是一个吃瓜群众，用一句话总结下面的聊天。\n{body}"
+
+class TestSplitSections(unittest.TestCase):
+    def test_split_tolerates_decoration(self):
+        text = "好的，以下是总结：\n**[[G1]]**\n第一群在聊游戏。\n\n### [[G2]]:\n第二群在聊天气。\n[[G3]]\n"
+        self.assertEqual(split_sections(text, 3), ["第一群在聊游戏。", "第二群在聊天气。", None])
+        self.assertEqual(split_sections("没有标记", 2), [None, None])
+
+class TestSummaryBatcher(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.provider = FakeBatchProvider(text="单独的总结", latency=0.01)
+
+    def make(self, **kwargs):
+        async def call(umo, prompt):
+            return (await self.provider.text_chat(prompt=prompt)).completion_text
+        return SummaryBatcher(call, **kwargs)
+
+    def submit(self, batcher, group_id, key="persona"):
+        return batcher.submit(key, group_id, f"umo:{group_id}", f"{PERSONA.format(body='')}{group_id} 的聊天",
+                              f"{group_id} 的聊天\nu1: hi", lambda body: PERSONA.format(body=body))
+
+    async def test_groups_in_window_share_one_call(self):
+        batcher = self.make(window=0.02, max_groups=10)
+        results = await asyncio.gather(*[self.submit(batcher, f"g{i}") for i in range(4)])
+        self.assertEqual(results, [f"总结: g{i} 的聊天" for i in range(4)])
+        self.assertEqual(len(self.provider.prompts), 1)
+        self.assertEqual(self.provider.prompts[0].count("你是一个吃瓜群众"), 1) # persona prompt sent once
+        stats = batcher.stats()
+        self.assertEqual((stats["batches"], stats["batched_groups"], stats["saved_calls"]), (1, 4, 3))
+
+    async def test_max_groups_and_token_budget_split_batches(self):
+        batcher = self.make(window=0.02, max_groups=2)
+        await asyncio.gather(*[self.submit(batcher, f"g{i}") for i in range(5)])
+        self.assertEqual(len(self.provider.prompts), 3) # 2 + 2 + a lone group with its own prompt
+        self.assertEqual(batcher.stats()["singles"], 1)
+
+        self.provider.prompts.clear()
+        # Budget for the persona prompt plus exactly two groups
+        base = cjk_token_estimator(PERSONA.format(body=BATCH_INSTRUCTIONS.format(count=0, markers="")))
+        per_group = batcher._marker_cost + cjk_token_estimator("g0 的聊天\nu1: hi")
+        tight = self.make(window=0.02, max_groups=10, max_tokens=base + 2 * per_group)
+        await asyncio.gather(*[self.submit(tight, f"g{i}") for i in range(4)])
+        self.assertEqual(len(self.provider.prompts), 2)
+        self.assertTrue(all(p.count("的聊天\nu1: hi") == 2 for p in self.provider.prompts))
+
+    async def test_keys_are_batched_separately(self):
+        batcher = self.make(window=0.02)
+        results = await asyncio.gather(self.submit(batcher, "g1", "a"), self.submit(batcher, "g2", "b"))
+        self.assertEqual(results, ["单独的总结", "单独的总结"])
+        self.assertEqual(batcher.stats()["singles"], 2)
+
+    async def test_missing_sections_fall_back_to_single_calls(self):
+        self.provider.drop = {2}
+        batcher = self.make(window=0.02)
+        results = await asyncio.gather(*[self.submit(batcher, f"g{i}") for i in range(3)])
+        self.assertEqual(results, ["总结: g0 的聊天", "单独的总结", "总结: g2 的聊天"])
+        self.assertEqual(len(self.provider.prompts), 2)
+        self.assertEqual(batcher.stats()["fallbacks"], 1)
+
+    async def test_failure_reaches_every_group(self):
+        self.provider.error = RuntimeError("provider down")
+        batcher = self.make(window=0.02)
+        results = await asyncio.gather(*[self.submit(batcher, f"g{i}") for i in range(3)], return_exceptions=True)
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertEqual(len(self.provider.prompts), 1)
+
+    async def test_through_summary_queue_with_default_workers(self):
+        batcher = self.make(window=0.05, max_groups=5)
+        results = {}
+
+        async def handler(job):
+            results[job.group_id] = await self.submit(batcher, job.group_id)
+
+        # Default worker count: detached jobs must not hold a worker while their batch fills up
+        queue = SummaryQueue(handler, delay_range=(0, 0), detach=True)
+        self.assertEqual(queue.worker_count, 2)
+        for i in range(5):
+            queue.submit(SummaryJob(f"g{i}", f"umo:g{i}", ("u1: hi",)))
+        for _ in range(50):
+            if len(results) == 5:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+        self.assertEqual(results, {f"g{i}": f"总结: g{i} 的聊天" for i in range(5)})
+        self.assertEqual(len(self.provider.prompts), 1)
+        self.assertEqual(batcher.stats()["batched_groups"], 5)
+        self.assertEqual(queue.stats()["completed"], 5)
+
+if __name__ == '__main__':
+    unittest.main()
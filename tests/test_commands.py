@@ -56,9 +56,7 @@ async def test_dashboard():
     
     # 1. Simulate some activity
     msg_event = MockEvent("test msg", "u1", "g1")
-    await list(plugin.handle_message(msg_event))[0] if hasattr(plugin.handle_message, '__iter__') else None
-    # Wait, handle_message is async generator
-    async for _ in plugin.handle_message(msg_event): pass
+    await plugin.handle_message(msg_event)
     
     # Manually pump score
     plugin.radar.groups["g1"].current_score = 50
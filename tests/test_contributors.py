@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from contributors import ContributorTracker
+from radar import RadarSystem
+
+class TestContributorTracker(unittest.TestCase):
+    def test_single_spammer_is_capped(self):
+        tracker = ContributorTracker(half_life=60, share_cap=0.5, allowance=10)
+        credited = sum(tracker.credit("spam", 1, now=1000 + i * 0.1) for i in range(200))
+        # Only the allowance plus whatever decayed away during the 20 s burst
+        self.assertLess(credited, 13)
+        self.assertLess(tracker.credit("spam", 1, now=1020), 0.2)
+        self.assertEqual(tracker.active(now=1020), 1)
+
+    def test_many_speakers_are_not_capped(self):
+        tracker = ContributorTracker(half_life=60, share_cap=0.5, allowance=10)
+        credited = sum(tracker.credit(f"u{i % 20}", 1, now=1000 + i * 0.1) for i in range(200))
+        self.assertEqual(credited, 200)
+        self.assertEqual(tracker.active(now=1020), 20)
+
+    def test_allowance_recovers_after_decay(self):
+        tracker = ContributorTracker(half_life=60, allowance=10)
+        for i in range(30):
+            tracker.credit("u", 1, now=1000)
+        self.assertEqual(tracker.credit("u", 1, now=1000), 0)
+        # Two half-lives later the user's decayed contribution is ~2.5, so there is room again
+        self.assertEqual(tracker.credit("u", 1, now=1120), 1)
+
+    def test_bounded_memory_and_active_window(self):
+        tracker = ContributorTracker(window=60, max_users=8)
+        for i in range(100):
+            tracker.credit(f"u{i}", 1, now=1000 + i)
+        self.assertEqual(len(tracker.users), 8)
+        self.assertLessEqual(len(tracker.recent), 8)
+        self.assertEqual([u for u, _ in tracker.top(2, now=1100)], ["u99", "u98"])
+        self.assertEqual(tracker.active(now=2000), 0)
+
+class TestRadarContributors(unittest.TestCase):
+    def test_velocity_needs_distinct_speakers(self):
+        config = {"trigger_settings": {"trigger_threshold": 10**6, "velocity_threshold": 2.0,
+                                       "min_velocity_score": 5, "adaptive_trigger": False}}
+        with tempfile.TemporaryDirectory() as tmp:
+            radar = RadarSystem(config, persistence_path=os.path.join(tmp, "p.json"))
+            start = 1_000_000.0
+
+            def burst(group_id, speakers):
+                # Calm minutes, then 30 messages in ten seconds
+                for m in range(3):
+                    asyncio.run(radar.on_message(group_id, 1, "u0", "hi", timestamp=start + m * 60))
+                return any([asyncio.run(radar.on_message(group_id, 1, f"u{i % speakers}", "hi", timestamp=start + 200 + i / 3))[0]
+                            for i in range(30)])
+
+            self.assertFalse(burst("solo", 1))
+            self.assertTrue(burst("crowd", 6))
+            self.assertLess(radar.groups["solo"].current_score, radar.groups["crowd"].current_score)
+            self.assertEqual(radar.get_group_state_snapshot("crowd")["active_users"], 0) # wall clock is far past the burst
+
+    def test_user_limit_comes_from_config(self):
+        raw = {"trigger_settings": {"max_tracked_users": 4}}
+        with tempfile.TemporaryDirectory() as tmp:
+            radar = RadarSystem(raw, persistence_path=os.path.join(tmp, "p.json"))
+            for i in range(10):
+                asyncio.run(radar.on_message("g1", 1, f"u{i}", "hi", timestamp=1000 + i))
+            self.assertEqual(len(radar.contributors["g1"].users), 4)
+
+            raw["trigger_settings"]["max_tracked_users"] = 2
+            radar.settings.reload()
+            radar.apply_settings()
+            tracker = radar.contributors["g1"]
+            self.assertEqual(tracker.max_users, 2)
+            self.assertEqual(list(tracker.users), ["u8", "u9"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from logic import MessageFilter, ScoreEngine
+from filter_pipeline import AhoCorasick, FilterStage
+from dedup import DedupStore
+from tests.mock_event import MockEvent, MockPlain
+
+class TestAhoCorasick(unittest.TestCase):
+    def test_search(self):
+        ac = AhoCorasick(["he", "she", "his", "hers", "广告"])
+        self.assertTrue(ac.search("ushers"))
+        self.assertTrue(ac.search("加群看广告了"))
+        self.assertTrue(ac.search("SHE said"))
+        self.assertFalse(ac.search("hi"))
+        self.assertFalse(ac.search("正常聊天"))
+
+    def test_failure_links(self):
+        ac = AhoCorasick(["abcd", "bce"])
+        self.assertTrue(ac.search("abce"))
+        self.assertFalse(ac.search("abc"))
+
+class TestFilterStage(unittest.TestCase):
+    def test_check_must_be_overridden(self):
+        class NoCheck(FilterStage):
+            name = "nocheck"
+
+        with self.assertRaises(TypeError):
+            NoCheck()
+
+class TestMessageFilter(unittest.TestCase):
+    def setUp(self):
+        self.config = {
+            "cleaning_settings": {
+                "min_text_length": 2,
+                "ignore_regex": "^[#/!]",
+                "ignore_patterns": ["^\\[CQ:", "http[s]?://"],
+                "keyword_blocklist": ["代刷", "加微信"],
+                "deduplicate_threshold": 3
+            }
+        }
+        self.filter = MessageFilter(self.config)
+
+    def test_stages(self):
+        self.assertTrue(self.filter.is_noise("嗯", "g1"))
+        self.assertTrue(self.filter.is_noise("/help", "g1"))
+        self.assertTrue(self.filter.is_noise("看这个 https://example.com", "g1"))
+        self.assertTrue(self.filter.is_noise("专业代刷，加微信", "g1"))
+        self.assertFalse(self.filter.is_noise("今天天气不错", "g1"))
+
+        hits = {s["stage"]: s["hits"] for s in self.filter.stats()}
+        self.assertEqual(hits, {"length": 1, "regex": 2, "keyword": 1, "dedup": 0})
+
+    def test_dedup(self):
+        results = [self.filter.is_noise("666", "g1") for _ in range(10)]
+        self.assertEqual(results.count(False), 2)
+        # Other groups are independent
+        self.assertFalse(self.filter.is_noise("666", "g2"))
+
+    def test_rebuild_on_config_change(self):
+        pipeline = self.filter.pipeline
+        self.filter.is_noise("hello", "g1")
+        self.assertIs(self.filter.pipeline, pipeline)
+
+        # Unchanged section after a reload keeps the compiled pipeline
+        self.filter.reload()
+        self.assertIs(self.filter.pipeline, pipeline)
+
+        # Edits to the raw config take effect on reload (snapshot swap)
+        self.config["cleaning_settings"] = dict(self.config["cleaning_settings"], keyword_blocklist=["hello"])
+        self.assertFalse(self.filter.is_noise("hello there", "g1"))
+        self.filter.reload()
+        self.assertTrue(self.filter.is_noise("hello world", "g1"))
+        self.assertIsNot(self.filter.pipeline, pipeline)
+
+# Stand-ins named like AstrBot's message components; ScoreEngine dispatches on the class name
+class Image: pass
+class Reply: pass
+class At: pass
+class Video: pass
+class CustomImage(Image): pass
+
+class TestScoreEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = ScoreEngine({"score_weights": {"base_score": 1, "image_score": 2, "video_score": 3,
+                                                     "reply_bonus": 2, "at_bonus": 1, "repeat_decay": 0.5}})
+
+    def score(self, *components, text="hi"):
+        event = MockEvent(text, "u1", "g1")
+        event.message_chain = [MockPlain(text), *components]
+        return self.engine.calculate_score(event)
+
+    def test_plain_and_long_text(self):
+        self.assertEqual(self.score(), 1)
+        self.assertEqual(self.score(text="这是一条认真输出的长消息，超过了十五个字的长度"), 2)
+
+    def test_weighted_components(self):
+        self.assertEqual(self.score(Image()), 2) # media replaces the base score
+        self.assertEqual(self.score(Reply()), 3)
+        self.assertEqual(self.score(Reply(), At(), Video()), 6)
+        self.assertEqual(self.score(CustomImage()), 2) # resolved through the MRO
+
+    def test_diminishing_returns(self):
+        self.assertEqual(self.score(*[Image() for _ in range(4)]), 2 + 1 + 0.5 + 0.25)
+        self.assertEqual(self.score(At(), At()), 1 + 1 + 0.5)
+
+    def test_register_and_dispatch_cache(self):
+        class Poke: pass
+        self.engine.settings.reload({"score_weights": {"poke_bonus": 4}})
+        self.engine.register("Poke", "poke_bonus") # unknown keys read as 0 until the schema has them
+        self.assertEqual(self.score(Poke()), 1)
+        self.engine.register("Poke", "reply_bonus")
+        self.assertEqual(self.score(Poke()), 3)
+        self.assertIn(Poke, self.engine._dispatch)
+
+class TestDedupStore(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.clock = lambda: self.now
+
+    def test_windowed_alternating_spam(self):
+        store = DedupStore(window=6, clock=self.clock)
+        seq = ["666", "777", "666", "777", "666", "777"]
+        results = [store.is_repeat("g1", m, 3) for m in seq]
+        self.assertEqual(results, [False, False, False, False, True, True])
+
+        consecutive_only = DedupStore(window=0, clock=self.clock)
+        self.assertFalse(any(consecutive_only.is_repeat("g1", m, 3) for m in seq))
+
+    def test_low_threshold_only_flags_actual_repeats(self):
+        for window in (0, 6):
+            for threshold in (0, 1):
+                store = DedupStore(window=window, clock=self.clock)
+                results = [store.is_repeat("g1", m, threshold) for m in ["a", "b", "b", "c", "a"]]
+                expected = [False, False, True, False, bool(window)]
+                self.assertEqual(results, expected, (window, threshold))
+
+    def test_lru_bound(self):
+        store = DedupStore(max_groups=100, clock=self.clock)
+        for i in range(1000):
+            store.is_repeat(f"g{i}", "hello", 3)
+        self.assertEqual(len(store), 100)
+        self.assertEqual(store.stats()["evicted"], 900)
+
+    def test_ttl_expiry(self):
+        store = DedupStore(ttl=60, clock=self.clock)
+        store.is_repeat("g1", "hi", 2)
+        self.now = 30
+        store.is_repeat("g2", "hi", 2)
+        self.now = 70
+        self.assertEqual(store.purge(), 1)
+        self.assertEqual(len(store), 1)
+        # g1 expired, so the same content starts a fresh run
+        self.assertFalse(store.is_repeat("g1", "hi", 2))
+
+if __name__ == '__main__':
+    unittest.main()
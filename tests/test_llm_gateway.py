@@ -0,0 +1,106 @@
+import asyncio
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from llm_gateway import LLMGateway
+from streaming import LatencyHistogram, LatencyStats
+from tests.fake_provider import FakeProvider, FakeStreamingProvider
+
+class FakeContext:
+    """get_current_chat_provider_id / get_provider_by_id / llm_generate over a dict of fake providers"""
+    def __init__(self, providers, current="primary"):
+        self.providers = providers
+        self.current = current
+        self.lookups = 0
+
+    async def get_current_chat_provider_id(self, umo):
+        self.lookups += 1
+        return self.current
+
+    def get_provider_by_id(self, provider_id):
+        return self.providers.get(provider_id)
+
+    async def llm_generate(self, chat_provider_id=None, prompt=None):
+        return await self.providers[chat_provider_id].text_chat(prompt=prompt)
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_quantile_and_decay(self):
+        hist = LatencyHistogram(max_samples=100)
+        self.assertIsNone(hist.quantile(0.95))
+        for i in range(90):
+            hist.add(1.0)
+        for i in range(10):
+            hist.add(10.0)
+        self.assertTrue(1.0 <= hist.quantile(0.5) < 1.25)
+        self.assertTrue(10.0 <= hist.quantile(0.95) < 12.5)
+        hist.add(1.0)
+        self.assertLessEqual(hist.total, 100)
+
+    def test_min_samples(self):
+        stats = LatencyStats()
+        stats.record("p", None, 0.5)
+        self.assertIsNone(stats.quantile("p", 0.95, min_samples=2))
+        self.assertIsNotNone(stats.quantile("p", 0.95))
+
+class TestLLMGateway(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.primary = FakeProvider("主模型的总结", provider_id="primary")
+        self.backup = FakeProvider("备用模型的总结", provider_id="backup")
+        self.context = FakeContext({"primary": self.primary, "backup": self.backup})
+
+    async def test_resolution_is_cached_until_invalidated(self):
+        gateway = LLMGateway(self.context)
+        for _ in range(3):
+            self.assertEqual(await gateway.call("g1", "p"), "主模型的总结")
+        self.assertEqual(self.context.lookups, 1)
+        self.context.current = "backup"
+        gateway.invalidate("g1")
+        self.assertEqual(await gateway.call("g1", "p"), "备用模型的总结")
+        self.assertEqual(gateway.stats()["cache_hits"], 2)
+
+    async def test_timeout_then_retry(self):
+        gateway = LLMGateway(self.context, timeout=0.05, retries=1, backoff=0)
+        stalled = self.primary.text_chat
+
+        async def stall_once(prompt=None, **kwargs):
+            self.primary.text_chat = stalled # the retry goes through
+            await asyncio.sleep(1)
+        self.primary.text_chat = stall_once
+
+        self.assertEqual(await gateway.call("g1", "p"), "主模型的总结")
+        stats = gateway.stats()
+        self.assertEqual((stats["timeouts"], stats["retried"], stats["resolutions"]), (1, 1, 2))
+
+        self.primary.latency = 0.2
+        with self.assertRaises(TimeoutError):
+            await gateway.call("g1", "p")
+
+    async def test_hedges_to_backup_past_p95(self):
+        latency = LatencyStats()
+        for _ in range(20):
+            latency.record("primary", None, 0.05)
+        gateway = LLMGateway(self.context, latency=latency, hedge_provider_id="backup", hedge_min_samples=20)
+        self.primary.latency = 0.5
+        self.backup.latency = 0.01
+        self.assertEqual(await gateway.call("g1", "p"), "备用模型的总结")
+        self.assertEqual((gateway.stats()["hedged"], gateway.stats()["hedge_wins"]), (1, 1))
+
+        # Primary within its usual latency: no hedge
+        self.primary.latency = 0.0
+        self.assertEqual(await gateway.call("g1", "p"), "主模型的总结")
+        self.assertEqual(gateway.stats()["hedged"], 1)
+
+    async def test_no_retry_once_streaming_started(self):
+        streaming = FakeStreamingProvider("abcdefgh", chunk_size=2, error=RuntimeError("reset"))
+        self.context.providers["primary"] = streaming
+        gateway = LLMGateway(self.context, retries=3, backoff=0)
+        seen = []
+        with self.assertRaises(RuntimeError):
+            await gateway.call("g1", "p", on_delta=seen.append)
+        self.assertEqual(seen, ["ab", "cd"])
+        self.assertEqual(gateway.stats()["retried"], 0)
+        self.assertEqual(len(streaming.prompts), 1)
+
+if __name__ == '__main__':
+    unittest.main()
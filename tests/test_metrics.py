@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from metrics import NULL_SPAN, Histogram, Metrics
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+class TestHistogram(unittest.TestCase):
+    def test_quantiles(self):
+        h = Histogram()
+        self.assertIsNone(h.quantile(0.5))
+        for _ in range(98):
+            h.observe(1500)
+        h.observe(40_000)
+        h.observe(3_000_000)
+        self.assertEqual(h.quantile(0.5), 2000)
+        self.assertEqual(h.quantile(0.99), 50_000)
+        self.assertEqual(h.quantile(1.0), 5_000_000)
+        self.assertEqual(h.sum, 98 * 1500 + 40_000 + 3_000_000)
+
+class TestMetrics(unittest.TestCase):
+    def test_sampling(self):
+        metrics = Metrics(sample_every=4)
+        spans = [metrics.span() for _ in range(8)]
+        self.assertEqual(sum(span is not NULL_SPAN for span in spans), 2)
+        off = Metrics(sample_every=0)
+        self.assertTrue(all(off.span() is NULL_SPAN for _ in range(8)))
+
+    def test_span_marks_stages(self):
+        clock = FakeClock()
+        metrics = Metrics(sample_every=1, clock=clock)
+        span = metrics.span()
+        clock.now += 800
+        span.mark("filter")
+        clock.now += 3000
+        span.mark("score")
+        span.end()
+        self.assertEqual(metrics.stages["filter"].sum, 800)
+        self.assertEqual(metrics.stages["score"].sum, 3000)
+        self.assertEqual(metrics.stages["total"].sum, 3800)
+        self.assertEqual(metrics.stages["radar"].total, 0)
+
+    def test_counters_and_collectors(self):
+        metrics = Metrics()
+        metrics.inc("messages_total")
+        metrics.inc("filtered_total", "dedup")
+        metrics.inc("filtered_total", "dedup")
+        metrics.inc("triggers_total", "velocity")
+        metrics.add_collector(lambda: {"breaker_total": {"queue_full": 3}})
+        values = metrics.counter_values()
+        self.assertEqual(values["filtered_total"], {"dedup": 2})
+        self.assertEqual(values["breaker_total"], {"queue_full": 3})
+        self.assertIn("filtered_total: 2 (dedup 2)", metrics.report())
+
+    def test_summary_histogram_is_separate(self):
+        metrics = Metrics(sample_every=0)
+        metrics.record("summary_seconds", 2_500_000_000)
+        self.assertEqual(set(metrics.stages), {"filter", "score", "radar", "dispatch", "total"})
+        text = metrics.prometheus()
+        self.assertIn('buzz_radar_summary_seconds_bucket{le="5"} 1', text)
+        self.assertIn("buzz_radar_summary_seconds_sum 2.500000000", text)
+        self.assertNotIn('stage="summary"', text)
+        self.assertTrue(any(line.startswith("summary_seconds: n=1") for line in metrics.report()))
+
+    def test_prometheus_dump(self):
+        metrics = Metrics(sample_every=1)
+        metrics.inc("triggers_total", "threshold")
+        metrics.observe("radar", 1500)
+        text = metrics.prometheus()
+        self.assertIn('buzz_radar_triggers_total{reason="threshold"} 1', text)
+        self.assertIn("buzz_radar_llm_errors_total 0", text)
+        self.assertIn('buzz_radar_stage_seconds_bucket{stage="radar",le="1e-06"} 0', text)
+        self.assertIn('buzz_radar_stage_seconds_bucket{stage="radar",le="2e-06"} 1', text)
+        self.assertIn('buzz_radar_stage_seconds_count{stage="radar"} 1', text)
+        self.assertNotIn("summary_seconds_bucket{stage", text)
+        self.assertIn("# HELP buzz_radar_summary_seconds 总结任务耗时", text)
+        self.assertIn("buzz_radar_summary_seconds_count 0", text)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "buzz_radar.prom")
+            metrics.dump(path)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), text)
+            self.assertFalse(os.path.exists(path + ".tmp"))
+
+if __name__ == '__main__':
+    unittest.main()
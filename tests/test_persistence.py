@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from persistence import PersistenceLayer
+
+class TestPersistenceLayer(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "sub", "persistence.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_layer(self, path=None, **kw):
+        layer = PersistenceLayer(path or self.path, **kw)
+        live = {}
+        layer.attach(live.get, lambda: live.items())
+        return layer, live
+
+    async def test_debounced_writes_are_coalesced(self):
+        layer, live = self.make_layer(debounce=0.05)
+        for i in range(20):
+            live[f"g{i}"] = {"s": i, "t": 1000.0 + i}
+            layer.mark_dirty(f"g{i}")
+            layer.mark_dirty(f"g{i}")
+        self.assertFalse(os.path.exists(layer.journal_path))
+
+        await asyncio.sleep(0.2)
+        self.assertEqual(layer.stats()["flushes"], 1)
+        self.assertFalse(layer.dirty)
+        with open(layer.journal_path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 20)
+        self.assertEqual(layer.stats()["journal_bytes"], os.path.getsize(layer.journal_path))
+
+        reloaded = PersistenceLayer(self.path)
+        self.assertEqual(reloaded.take("g3"), {"s": 3, "t": 1003.0})
+        self.assertIsNone(reloaded.take("g3"))
+
+    async def test_compaction_and_replay(self):
+        layer, live = self.make_layer(debounce=60, journal_limit=1)
+        live.update(a={"s": 1}, b={"s": 2})
+        layer.mark_dirty("a")
+        layer.mark_dirty("b")
+        self.assertTrue(await layer.flush_async())
+        self.assertEqual(layer.stats()["compactions"], 1)
+        self.assertEqual(os.path.getsize(layer.journal_path), 0)
+
+        # Journal tail after the snapshot: an update, a deletion and a torn last line
+        layer.journal_limit = 0
+        live["a"] = {"s": 10}
+        del live["b"]
+        layer.mark_dirty("a")
+        layer.mark_dirty("b")
+        await layer.close()
+        with open(layer.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"q": 99, "g": "c", "r"')
+
+        reloaded = PersistenceLayer(self.path)
+        self.assertEqual(reloaded.indexed, 2)
+        self.assertEqual(reloaded.take("a"), {"s": 10})
+        self.assertIsNone(reloaded.take("b"))
+        self.assertIsNone(reloaded.take("c"))
+        self.assertEqual(reloaded.seq, layer.seq)
+
+    async def test_appends_after_torn_tail_survive_restart(self):
+        layer, live = self.make_layer(debounce=60)
+        live["a"] = {"s": 1}
+        layer.mark_dirty("a")
+        await layer.close()
+        with open(layer.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"q":2,"g":"b","r":{"s"') # crash mid-write
+
+        restarted, live = self.make_layer(debounce=60)
+        self.assertEqual(restarted.take("a"), {"s": 1})
+        live["a"], live["c"] = {"s": 2}, {"s": 3}
+        restarted.mark_dirty("a")
+        restarted.mark_dirty("c")
+        await restarted.close()
+
+        again = PersistenceLayer(self.path)
+        self.assertEqual(again.take("a"), {"s": 2})
+        self.assertEqual(again.take("c"), {"s": 3})
+        self.assertIsNone(again.take("b"))
+        self.assertEqual(again.seq, 3)
+        self.assertEqual(again.journal_bytes, os.path.getsize(again.journal_path))
+
+    async def test_legacy_file_is_migrated(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"g1": {"last_trigger_time": 5.0}}, f)
+        layer, _ = self.make_layer(debounce=60)
+        self.assertEqual(layer.data["g1"], {"t": 5.0})
+        await layer.close()
+        self.assertTrue(os.path.exists(layer.snapshot_path))
+        self.assertEqual(PersistenceLayer(self.path).take("g1"), {"t": 5.0})
+
+    async def test_lazy_lookup_and_index_rebuild(self):
+        layer, live = self.make_layer(debounce=60)
+        for i in range(500):
+            live[f"g{i}"] = {"s": i, "u": 100.0 + i}
+        layer.compact()
+        await layer.close()
+        self.assertEqual(layer.data, {})
+
+        # Startup only maps the files; records are parsed on demand
+        reloaded = PersistenceLayer(self.path)
+        self.assertEqual(reloaded.indexed, 500)
+        self.assertEqual(reloaded.data, {})
+        self.assertEqual(reloaded.take("g123"), {"s": 123, "u": 223.0})
+        self.assertIsNone(reloaded.take("missing"))
+        reloaded.drop_idle(now=500.0, max_idle_seconds=100) # expires u < 400
+        self.assertIsNone(reloaded.take("g10"))
+        self.assertEqual(reloaded.take("g450")["s"], 450)
+        await reloaded.close()
+
+        os.remove(layer.index_path)
+        rebuilt = PersistenceLayer(self.path)
+        self.assertEqual(rebuilt.take("g7"), {"s": 7, "u": 107.0})
+        await rebuilt.close()
+
+    async def test_close_flushes_pending_changes(self):
+        layer, live = self.make_layer(debounce=60)
+        live["g1"] = {"t": 1.0}
+        layer.mark_dirty("g1")
+        await layer.close()
+        self.assertTrue(os.path.exists(layer.journal_path))
+        self.assertEqual(layer.stats()["pending"], 0)
+        self.assertFalse(await layer.flush_async())
+
+    async def test_failed_write_keeps_changes_dirty(self):
+        blocker = os.path.join(self.tmp.name, "file")
+        open(blocker, "w").close()
+        layer, live = self.make_layer(os.path.join(blocker, "persistence.json"), debounce=60)
+        live["g1"] = {"t": 1.0}
+        layer.mark_dirty("g1")
+        self.assertFalse(await layer.flush_async())
+        self.assertTrue(layer.dirty)
+        self.assertEqual(layer.stats()["failures"], 1)
+        await layer.close()
+
+if __name__ == '__main__':
+    unittest.main()
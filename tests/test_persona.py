@@ -2,7 +2,7 @@ import unittest
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from persona import PersonaManager
+from persona import PersonaManager, PromptTemplate
 
 class TestPersonaManager(unittest.TestCase):
     def setUp(self):
@@ -11,8 +11,9 @@ class TestPersonaManager(unittest.TestCase):
                 "selection_mode": "manual",
                 "active_preset": "test_id",
                 "presets": {
-                    "p1": {"id": "test_id", "name": "Test Persona", "prompt": "Prompt A"},
-                    "p2": {"id": "other_id", "name": "Other Persona", "prompt": "Prompt B"}
+                    "preset_1": {"id": "test_id", "name": "Test Persona", "prompt": "Prompt A"},
+                    "preset_2": {"id": "other_id", "name": "Other Persona", "prompt": "Prompt B"},
+                    "preset_3": {"id": "off_id", "prompt": ""}
                 }
             }
         }
@@ -26,6 +27,7 @@ class TestPersonaManager(unittest.TestCase):
 
     def test_random_selection(self):
         self.mock_config["persona_settings"]["selection_mode"] = "random"
+        self.manager.reload()
         # Monkey patch random
         import random
         random.seed(42) # Should resolve consistently if choice is deterministic-ish with seed
@@ -44,8 +46,41 @@ class TestPersonaManager(unittest.TestCase):
         self.mock_config["persona_settings"]["presets"] = {
              "preset_1": {"id": "default", "name": "Default", "prompt": "Default Prompt"}
         }
+        self.manager.reload()
         persona = self.manager.get_persona()
         self.assertEqual(persona['prompt'], "Default Prompt")
 
+    def test_registry_is_built_once_per_snapshot(self):
+        self.manager.get_persona()
+        index = self.manager.by_id
+        self.manager.get_persona()
+        self.assertIs(self.manager.by_id, index)
+        self.mock_config["persona_settings"]["active_preset"] = "other_id"
+        self.assertEqual(self.manager.get_persona()['id'], "test_id") # raw edits need a reload
+        self.manager.reload()
+        self.assertEqual(self.manager.get_persona()['id'], "other_id")
+
+    def test_weighted_sticky_selection(self):
+        settings = self.mock_config["persona_settings"]
+        settings["selection_mode"] = "random"
+        settings["presets"]["preset_1"]["weight"] = 3
+        self.manager.reload()
+        # The same group keeps its persona within the sticky period
+        picks = {self.manager.get_persona("g1", now=1000 + i)['id'] for i in range(50)}
+        self.assertEqual(len(picks), 1)
+        # Across groups, picks follow the weights; presets without a prompt never win
+        counts = {}
+        for g in range(4000):
+            pid = self.manager.get_persona(f"g{g}", now=1000)['id']
+            counts[pid] = counts.get(pid, 0) + 1
+        self.assertNotIn("off_id", counts)
+        self.assertAlmostEqual(counts["test_id"] / 4000, 0.75, delta=0.04)
+
+    def test_template_rendering(self):
+        template = PromptTemplate("[{{group}} @ {{ time }}] {{keywords}}\n{{context}} {{unknown}}")
+        self.assertEqual(template.fields, {"group", "time", "keywords", "context", "unknown"})
+        text = template.render(group="g1", time="12:00", keywords="发布会", context="a: hi")
+        self.assertEqual(text, "[g1 @ 12:00] 发布会\na: hi {{unknown}}")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from radar import RadarSystem
+from state import GroupState, MessageRing, ObjectGroupStore
+import columnar
+from columnar import ColumnarGroupStore
+
+class TestMessageRing(unittest.TestCase):
+    def test_wraps_in_order(self):
+        ring = MessageRing(3)
+        self.assertEqual(ring.format(), [])
+        for i in range(5):
+            ring.append(f"u{i}", f"m{i}")
+        self.assertEqual(len(ring), 3)
+        self.assertEqual(ring.entries(), [("u2", "m2"), ("u3", "m3"), ("u4", "m4")])
+        self.assertEqual(ring.format(), ["u2: m2", "u3: m3", "u4: m4"])
+
+    def test_group_state_is_slotted(self):
+        state = GroupState("g1", history_size=5)
+        self.assertFalse(hasattr(state, "__dict__"))
+        for i in range(8):
+            state.add_message("u", str(i))
+        self.assertEqual(state.message_buffer, [f"u: {i}" for i in range(3, 8)])
+
+class TestRadarSystem(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config = {
+            "trigger_settings": {"trigger_threshold": 5, "cooldown_minutes": 10},
+            "summary_settings": {"history_size": 4},
+        }
+        self.radar = RadarSystem(self.config, persistence_path=os.path.join(self.tmp.name, "persistence.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_threshold_trigger_returns_history(self):
+        now = 1_000_000.0
+        results = []
+        for i in range(6):
+            results.append(asyncio.run(self.radar.on_message("g1", 1, f"u{i}", f"msg {i}", timestamp=now + i)))
+        triggered = [r for r in results if r[0]]
+        self.assertEqual(len(triggered), 1)
+        self.assertEqual(triggered[0][1], ["u1: msg 1", "u2: msg 2", "u3: msg 3", "u4: msg 4"])
+
+    def test_state_survives_restart(self):
+        now = time.time()
+        for i in range(3):
+            asyncio.run(self.radar.on_message("g1", 2, f"u{i}", f"msg {i}", timestamp=now + i))
+        self.radar.persistence.flush()
+        before = self.radar.groups["g1"].to_record()
+
+        for backend in ("object", "columnar"):
+            self.config["storage_settings"] = {"backend": backend}
+            restarted = RadarSystem(self.config, persistence_path=self.radar.persistence.filepath)
+            state = restarted.get_group_state("g1")
+            self.assertEqual(state.to_record(), before)
+            self.assertEqual(state.message_buffer, ["u0: msg 0", "u1: msg 1", "u2: msg 2"])
+
+    def test_status_and_reset_reach_unloaded_groups(self):
+        now = time.time()
+        for i in range(3):
+            asyncio.run(self.radar.on_message("g1", 1, f"u{i}", f"msg {i}", timestamp=now + i))
+        self.radar.persistence.flush()
+        path = self.radar.persistence.filepath
+
+        restarted = RadarSystem(self.config, persistence_path=path)
+        self.assertNotIn("g1", restarted.groups)
+        self.assertGreater(restarted.get_group_state_snapshot("g1")["score"], 0)
+        self.assertIsNone(restarted.get_group_state_snapshot("unknown"))
+        self.assertNotIn("unknown", restarted.groups)
+
+        calmed = RadarSystem(self.config, persistence_path=path)
+        calmed.force_reset("g1")
+        self.assertEqual(calmed.groups["g1"].current_score, 0)
+        calmed.persistence.flush()
+        # The old score must not come back after another restart
+        again = RadarSystem(self.config, persistence_path=path)
+        self.assertEqual(again.get_group_state("g1").current_score, 0)
+
+    def test_columnar_backend_behaves_the_same(self):
+        self.config["storage_settings"] = {"backend": "columnar"}
+        radar = RadarSystem(self.config, persistence_path=os.path.join(self.tmp.name, "columnar.json"))
+        self.assertIsInstance(radar.groups, ColumnarGroupStore)
+        now = 1_000_000.0
+        triggered = [asyncio.run(radar.on_message("g1", 1, "u", f"m{i}", timestamp=now + i))[0] for i in range(6)]
+        self.assertEqual(triggered.count(True), 1)
+        snapshot = radar.get_group_state_snapshot("g1")
+        self.assertEqual(snapshot["threshold"], 5)
+        radar.force_reset("g1")
+        self.assertEqual(radar.groups["g1"].current_score, 0)
+
+class StoreContract:
+    """Shared checks run against every store implementation."""
+    def make_store(self):
+        raise NotImplementedError
+
+    def test_create_and_mutate(self):
+        store = self.make_store()
+        state = store.create("g1", trigger_threshold=50, history_size=3)
+        state.current_score = 12
+        state.add_message("u", "hi")
+        self.assertEqual(store["g1"].current_score, 12)
+        self.assertEqual(store["g1"].trigger_threshold, 50)
+        self.assertEqual(store["g1"].message_buffer, ["u: hi"])
+        self.assertIn("g1", store)
+        self.assertEqual(len(store), 1)
+
+    def test_decay_sweep_and_top_n(self):
+        store = self.make_store()
+        now = time.time()
+        for i in range(10):
+            state = store.create(f"g{i}")
+            state.current_score = i * 10
+            state.last_update_time = state.last_decay_time = now - (86400 * 30 if i < 3 else 60)
+
+        zombies = store.sweep_idle(now, 7 * 86400)
+        self.assertEqual(sorted(zombies), ["g0", "g1", "g2"])
+        self.assertEqual(len(store), 7)
+
+        top = store.top_n(3, now)
+        self.assertEqual([gid for gid, _ in top], ["g9", "g8", "g7"])
+        self.assertAlmostEqual(top[0][1], 85.0)
+
+        self.assertEqual(store.decay_all(now), 7)
+        self.assertAlmostEqual(store["g9"].current_score, 85.0)
+        self.assertEqual(store["g3"].last_decay_time, now)
+        self.assertEqual(store["g3"].last_update_time, now - 60) # activity time is left alone
+
+    def test_predecay_does_not_keep_idle_groups_alive(self):
+        store = self.make_store()
+        now = time.time()
+        state = store.create("idle")
+        state.current_score = 50
+        state.last_update_time = state.last_decay_time = now - 8 * 86400
+        self.assertEqual(store.decay_all(now, min_idle_seconds=300), 1)
+        self.assertEqual(store["idle"].current_score, 0)
+        self.assertEqual(store.sweep_idle(now, 7 * 86400), ["idle"])
+
+class TestObjectStore(StoreContract, unittest.TestCase):
+    def make_store(self):
+        return ObjectGroupStore()
+
+class TestColumnarStore(StoreContract, unittest.TestCase):
+    def make_store(self):
+        return ColumnarGroupStore()
+
+    def test_slots_are_recycled(self):
+        store = self.make_store()
+        store.create("a")
+        store.create("b")
+        del store["a"]
+        store.create("c")
+        self.assertEqual(len(store.ids), 2)
+        self.assertEqual(store["c"].current_score, 0)
+        self.assertEqual(sorted(store), ["b", "c"])
+
+class TestColumnarStoreWithoutNumpy(TestColumnarStore):
+    def setUp(self):
+        self._np = columnar.np
+        columnar.np = None
+
+    def tearDown(self):
+        columnar.np = self._np
+
+if __name__ == '__main__':
+    unittest.main()
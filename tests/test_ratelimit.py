@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ratelimit import HierarchicalRateLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestHierarchicalRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_group_isolation(self):
+        limiter = HierarchicalRateLimiter(global_per_minute=10, global_burst=10,
+                                          group_per_minute=1, group_burst=1, clock=self.clock)
+        self.assertTrue(limiter.try_acquire("hot")[0])
+        ok, wait = limiter.try_acquire("hot")
+        self.assertFalse(ok)
+        self.assertAlmostEqual(wait, 60.0)
+        # A hot group must not block the others
+        self.assertTrue(limiter.try_acquire("quiet")[0])
+
+    def test_continuous_refill(self):
+        limiter = HierarchicalRateLimiter(global_per_minute=6, global_burst=1,
+                                          group_per_minute=0, clock=self.clock)
+        self.assertTrue(limiter.try_acquire("g")[0])
+        ok, wait = limiter.try_acquire("g")
+        self.assertFalse(ok)
+        self.assertAlmostEqual(wait, 10.0)
+        self.clock.now += 5
+        self.assertAlmostEqual(limiter.next_available("g"), 5.0)
+        self.clock.now += 5
+        self.assertTrue(limiter.try_acquire("g")[0])
+
+    def test_denied_acquire_consumes_nothing(self):
+        limiter = HierarchicalRateLimiter(global_per_minute=60, global_burst=5,
+                                          group_per_minute=0, provider_per_minute=1,
+                                          provider_burst=1, clock=self.clock)
+        self.assertTrue(limiter.try_acquire("g", "p1")[0])
+        self.assertFalse(limiter.try_acquire("g", "p1")[0])
+        self.assertTrue(limiter.try_acquire("g", "p2")[0])
+        self.assertEqual(limiter.stats()["global_tokens"], 3)
+
+    def test_group_buckets_are_bounded(self):
+        limiter = HierarchicalRateLimiter(global_per_minute=0, group_per_minute=1,
+                                          max_groups=3, clock=self.clock)
+        for i in range(10):
+            limiter.try_acquire(f"g{i}")
+        self.assertEqual(limiter.stats()["tracked_groups"], 3)
+
+if __name__ == '__main__':
+    unittest.main()
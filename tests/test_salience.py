@@ -0,0 +1,47 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from salience import SalienceRanker
+from sampler import ContentSampler
+
+CHAT = [
+    "alice: 今晚的发布会有人看吗",
+    "bob: +1",
+    "carol: +1",
+    "dave: +1",
+    "bob: [表情]",
+    "erin: 发布会说新手机下个月上市，价格比去年便宜",
+    "alice: 哈哈",
+    "frank: 回复 erin: 新手机的价格真的便宜了吗",
+    "bob: +1",
+    "gina: 发布会还说了新手机的续航提升",
+    "bob: 哈哈",
+    "carol: 晚安",
+]
+
+class TestSalienceRanker(unittest.TestCase):
+    def test_noise_scores_lower_than_content(self):
+        scores = SalienceRanker().score(CHAT)
+        self.assertLess(scores[1], scores[5]) # "+1" vs. the actual news
+        self.assertLess(scores[4], scores[9])
+        self.assertGreater(scores[7], scores[6]) # a reply carrying burst terms vs. "哈哈"
+
+    def test_select_keeps_order_recent_and_limits(self):
+        selected = SalienceRanker(top_k=5).select(CHAT, budget=10_000)
+        self.assertEqual(len(selected), 5)
+        self.assertEqual(selected, [m for m in CHAT if m in selected]) # chronological
+        self.assertEqual(selected[-2:], CHAT[-2:]) # most recent always kept
+        self.assertIn(CHAT[5], selected)
+        self.assertNotIn("bob: +1", selected)
+
+    def test_sampler_uses_ranker_for_long_windows(self):
+        sampler = ContentSampler(max_length=40, ranker=SalienceRanker(top_k=20))
+        result = sampler.sample(CHAT)
+        self.assertLessEqual(sum(map(sampler.estimator, result)), 40)
+        self.assertEqual(result[-1], CHAT[-1])
+        short = CHAT[:3]
+        self.assertEqual(ContentSampler(ranker=SalienceRanker()).sample(short), short)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sampler import ContentSampler, SKIP_MARKER, char_estimator, cjk_token_estimator
+
+class TestContentSampler(unittest.TestCase):
+    def test_estimator(self):
+        self.assertEqual(cjk_token_estimator("你好世界"), 4)
+        self.assertEqual(cjk_token_estimator("hello world!"), 3)
+        self.assertEqual(cjk_token_estimator("ok 好"), 2)
+
+    def test_small_input_is_untouched(self):
+        msgs = [f"u: m{i}" for i in range(30)]
+        self.assertEqual(ContentSampler(max_length=10_000).sample(msgs), msgs)
+        self.assertEqual(ContentSampler().sample([]), [])
+
+    def test_budget_head_middle_tail(self):
+        msgs = [f"u{i:05d}: {'x' * 32}" for i in range(10_000)] # 10 tokens each
+        sampler = ContentSampler(max_length=500)
+        result = sampler.sample(msgs)
+        kept = [m for m in result if m != SKIP_MARKER]
+        self.assertLessEqual(sum(map(cjk_token_estimator, result)), 500)
+        self.assertEqual(result[:10], msgs[:10]) # head share: 100 tokens
+        self.assertEqual(result[-25:], msgs[-25:]) # tail share: 250 tokens
+        middle = kept[10:-25]
+        self.assertGreater(len(middle), 5)
+        positions = [int(m[1:6]) for m in middle]
+        self.assertEqual(positions, sorted(positions))
+        self.assertGreater(positions[-1] - positions[0], 5000) # spread over the whole middle
+        self.assertIn(SKIP_MARKER, result)
+
+    def test_weighted_middle_and_oversized_message(self):
+        msgs = ["a"] * 50 + ["LONG" * 10] + ["a"] * 50
+        result = ContentSampler(max_length=40, estimator=char_estimator, head_ratio=0, tail_ratio=0.2).sample(msgs)
+        self.assertLessEqual(sum(map(len, result)), 40 + len(SKIP_MARKER))
+        self.assertEqual(result[-1], "a")
+        # A single message over budget still leaves the latest message
+        self.assertEqual(ContentSampler(max_length=1).sample(["x" * 100])[-1], "x" * 100)
+
+if __name__ == '__main__':
+    unittest.main()
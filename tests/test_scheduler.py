@@ -0,0 +1,124 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scheduler import MaintenanceScheduler
+from radar import RadarSystem
+
+class TestMaintenanceScheduler(unittest.IsolatedAsyncioTestCase):
+    async def test_runs_jobs_and_records_stats(self):
+        calls = []
+
+        async def ping():
+            calls.append(time.monotonic())
+
+        def boom():
+            raise RuntimeError("boom")
+
+        scheduler = MaintenanceScheduler()
+        scheduler.add_job("ping", ping, interval=0.1, jitter=0)
+        scheduler.add_job("boom", boom, interval=0.1, jitter=0)
+        self.assertIsNone(scheduler.add_job("disabled", ping, interval=0))
+
+        scheduler.start()
+        await asyncio.sleep(0.35)
+        await scheduler.stop()
+        self.assertFalse(scheduler.running)
+
+        stats = {s["name"]: s for s in scheduler.stats()}
+        self.assertGreaterEqual(len(calls), 2)
+        self.assertEqual(stats["ping"]["runs"], len(calls))
+        self.assertGreater(stats["ping"]["last_run"], 0)
+        self.assertEqual(stats["boom"]["failures"], stats["boom"]["runs"])
+        self.assertNotIn("disabled", stats)
+
+    async def test_replace_jobs_reschedules_and_keeps_stats(self):
+        calls = []
+
+        async def ping():
+            calls.append(time.monotonic())
+
+        scheduler = MaintenanceScheduler()
+        scheduler.add_job("ping", ping, interval=60, jitter=0)
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        self.assertEqual(calls, [])
+
+        # A shorter interval takes effect without waiting out the old one
+        fresh = MaintenanceScheduler()
+        fresh.add_job("ping", ping, interval=0.1, jitter=0)
+        scheduler.jobs[0].runs = 3
+        scheduler.replace_jobs(fresh.jobs)
+        await asyncio.sleep(0.35)
+        await scheduler.stop()
+        self.assertGreaterEqual(len(calls), 2)
+        self.assertEqual(scheduler.stats()[0]["runs"], 3 + len(calls))
+
+class TestRadarMaintenance(unittest.IsolatedAsyncioTestCase):
+    async def test_chunked_sweep_and_flush(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "persistence.json")
+            radar = RadarSystem({"trigger_settings": {"trigger_threshold": 1}}, persistence_path=path)
+            now = time.time()
+            for i in range(25):
+                radar.get_group_state(f"g{i}").last_update_time = now - (30 * 86400 if i % 2 else 0)
+
+            removed = await radar.sweep_zombies(max_idle_days=7, chunk_size=4)
+            self.assertEqual(removed, 12)
+            self.assertEqual(len(radar.groups), 13)
+
+            # Changes are only marked dirty; the flush job writes them in one batch
+            await radar.on_message("g0", 5, "u", "hello", timestamp=now)
+            journal = radar.persistence.journal_path
+            self.assertFalse(os.path.exists(journal))
+            self.assertTrue(radar.persistence.flush())
+            self.assertTrue(os.path.exists(journal))
+            self.assertFalse(radar.persistence.flush())
+            await radar.persistence.close()
+
+    async def test_sweep_without_and_with_one_idle_group(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            radar = RadarSystem({}, persistence_path=os.path.join(tmp, "persistence.json"))
+            radar.get_group_state("g1")
+            self.assertEqual(await radar.sweep_zombies(7, 1000), 0)
+            self.assertEqual(len(radar.groups), 1)
+
+            radar.get_group_state("g1").last_update_time = time.time() - 30 * 86400
+            radar._contributors("g1", radar.settings.current.trigger_settings)
+            self.assertEqual(await radar.sweep_zombies(7, 1000), 1)
+            self.assertEqual(len(radar.groups), 0)
+            self.assertNotIn("g1", radar.contributors)
+            await radar.persistence.close()
+
+    async def test_predecay_then_sweep_evicts_idle_group(self):
+        for backend in ("object", "columnar"):
+            with self.subTest(backend=backend), tempfile.TemporaryDirectory() as tmp:
+                radar = RadarSystem({"storage_settings": {"backend": backend}},
+                                    persistence_path=os.path.join(tmp, "persistence.json"))
+                state = radar.get_group_state("g1")
+                state.last_update_time = state.last_decay_time = time.time() - 8 * 86400
+                self.assertEqual(await radar.predecay_idle(min_idle_seconds=300), 1)
+                self.assertEqual(await radar.sweep_zombies(7, 1000), 1)
+                self.assertNotIn("g1", radar.groups)
+                await radar.persistence.close()
+
+    async def test_apply_settings_updates_existing_groups(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            raw = {"trigger_settings": {"user_share_cap": 0.5}, "topic_settings": {"top_n": 5}}
+            radar = RadarSystem(raw, persistence_path=os.path.join(tmp, "persistence.json"))
+            await radar.on_message("g1", 5, "u", "新版本 发布会", timestamp=time.time())
+            self.assertTrue(radar.topics)
+
+            raw["trigger_settings"]["user_share_cap"] = 0.2
+            raw["topic_settings"]["top_n"] = 3
+            radar.settings.reload()
+            radar.apply_settings()
+            self.assertEqual(radar.contributors["g1"].share_cap, 0.2)
+            self.assertFalse(radar.topics)
+            await radar.persistence.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import dataclasses
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from settings import ConfigStore, Settings, build_settings, load_schema
+
+class TestSettings(unittest.TestCase):
+    def test_defaults_follow_schema(self):
+        settings, errors = build_settings({})
+        self.assertEqual(errors, [])
+        schema = load_schema()
+        trigger = schema["trigger_settings"]["items"]
+        self.assertEqual(settings.trigger_settings.trigger_threshold, trigger["trigger_threshold"]["default"])
+        self.assertEqual(settings.enable_plugin, schema["enable_plugin"]["default"])
+        self.assertIsInstance(settings.cleaning_settings.keyword_blocklist, tuple)
+
+    def test_coercion_and_invalid_values(self):
+        settings, errors = build_settings({
+            "enable_plugin": "false",
+            "trigger_settings": {"trigger_threshold": "120", "cooldown_minutes": "soon"},
+            "summary_settings": {"context_strategy": "bogus"},
+            "storage_settings": "not-a-dict",
+        })
+        self.assertFalse(settings.enable_plugin)
+        self.assertEqual(settings.trigger_settings.trigger_threshold, 120)
+        # Invalid values fall back to the schema default and are reported
+        self.assertEqual(settings.trigger_settings.cooldown_minutes, Settings().trigger_settings.cooldown_minutes)
+        self.assertEqual(settings.summary_settings.context_strategy, "salience")
+        self.assertEqual(settings.storage_settings, Settings().storage_settings)
+        self.assertEqual(len(errors), 3)
+
+    def test_snapshot_is_immutable(self):
+        settings = Settings()
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            settings.trigger_settings.trigger_threshold = 1
+        self.assertFalse(hasattr(settings.trigger_settings, "__dict__"))
+        self.assertEqual(settings.score_weights.get("missing", 7), 7)
+
+    def test_reload_swaps_snapshot(self):
+        raw = {"trigger_settings": {"trigger_threshold": 50}}
+        store = ConfigStore(raw)
+        before = store.current
+        raw["trigger_settings"]["trigger_threshold"] = 90
+        # Raw edits are invisible until reload
+        self.assertEqual(store.current.trigger_settings.trigger_threshold, 50)
+        store.reload()
+        self.assertIsNot(store.current, before)
+        self.assertEqual(before.trigger_settings.trigger_threshold, 50)
+        self.assertEqual(store.current.trigger_settings.trigger_threshold, 90)
+        self.assertEqual(store.version, 2)
+
+if __name__ == '__main__':
+    unittest.main()
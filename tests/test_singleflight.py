@@ -0,0 +1,67 @@
+import asyncio
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from singleflight import SingleFlight
+
+CONTEXT = [f"u{i}: message {i}" for i in range(15)]
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.flight = SingleFlight(ttl=300, min_similarity=0.8, clock=lambda: self.now)
+        self.calls = 0
+
+    async def summarize(self, delay=0.0, result="summary"):
+        self.calls += 1
+        await asyncio.sleep(delay)
+        return f"{result} #{self.calls}"
+
+    async def test_concurrent_requests_share_one_call(self):
+        results = await asyncio.gather(*[
+            self.flight.run(("g1", "gossip"), CONTEXT, lambda: self.summarize(0.01)) for _ in range(5)
+        ])
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(set(results), {"summary #1"})
+        self.assertEqual(self.flight.stats()["coalesced"], 4)
+
+    async def test_cache_ttl_and_near_duplicates(self):
+        scope = ("g1", "gossip")
+        await self.flight.run(scope, CONTEXT, self.summarize)
+        # Same context, and one differing only in the last message, reuse the result
+        self.assertEqual(await self.flight.run(scope, CONTEXT, self.summarize), "summary #1")
+        self.assertEqual(await self.flight.run(scope, CONTEXT[:-1] + ["u9: new"], self.summarize), "summary #1")
+        stats = self.flight.stats()
+        self.assertEqual((stats["hits"], stats["near_hits"]), (1, 1))
+        # A different conversation, another persona or an expired entry all call again
+        self.assertEqual(await self.flight.run(scope, CONTEXT[:5], self.summarize), "summary #2")
+        self.assertEqual(await self.flight.run(("g1", "analyst"), CONTEXT, self.summarize), "summary #3")
+        self.now += 301
+        self.assertEqual(await self.flight.run(scope, CONTEXT, self.summarize), "summary #4")
+
+    async def test_failures_and_empty_results_are_not_cached(self):
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("provider down")
+
+        tasks = [asyncio.create_task(self.flight.run("g1", CONTEXT, boom)) for _ in range(3)]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertEqual(len(self.flight), 0)
+
+        self.assertIsNone(await self.flight.run("g1", CONTEXT, self._none))
+        self.assertEqual(await self.flight.run("g1", CONTEXT, self.summarize), "summary #1")
+
+    async def _none(self):
+        return None
+
+    async def test_bounded_entries(self):
+        flight = SingleFlight(ttl=300, max_entries=4)
+        for g in range(10):
+            await flight.run(f"g{g}", CONTEXT, self.summarize)
+        self.assertEqual(len(flight), 4)
+        self.assertEqual(len(flight._scopes), 4)
+
+if __name__ == '__main__':
+    unittest.main()
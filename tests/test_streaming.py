@@ -0,0 +1,66 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from streaming import LatencyStats, StreamChunker, complete, iter_deltas, supports_streaming
+from tests.fake_provider import FakeProvider, FakeStreamingProvider
+
+class TestStreamChunker(unittest.TestCase):
+    def test_cuts_at_sentence_boundaries(self):
+        chunker = StreamChunker(min_chars=10, max_chars=40)
+        out = []
+        text = "第一句话比较短。第二句话稍微长一点点，然后结束！最后一句没有结尾"
+        for i in range(0, len(text), 3):
+            out.extend(chunker.feed(text[i:i + 3]))
+        out.append(chunker.flush())
+        self.assertEqual("".join(out), text)
+        self.assertTrue(all(piece[-1] in "。！" for piece in out[:-1]))
+        self.assertTrue(all(len(piece) >= 10 for piece in out[:-1]))
+
+    def test_forces_a_cut_without_boundary(self):
+        chunker = StreamChunker(min_chars=5, max_chars=8)
+        self.assertEqual(chunker.feed("a" * 20), ["a" * 8, "a" * 8])
+        self.assertEqual(chunker.flush(), "aaaa")
+        self.assertIsNone(chunker.flush())
+
+class TestComplete(unittest.IsolatedAsyncioTestCase):
+    async def test_deltas_skip_the_final_full_response(self):
+        provider = FakeStreamingProvider("abcdefghij", chunk_size=3)
+        deltas = [d async for d in iter_deltas(provider, "p")]
+        self.assertEqual(deltas, ["abc", "def", "ghi", "j"])
+
+    async def test_streaming_records_time_to_first_token(self):
+        provider = FakeStreamingProvider("流式输出的总结内容。" * 3, chunk_size=5, first_token=0.02, interval=0.01)
+        latency = LatencyStats()
+        seen = []
+        text = await complete(provider, "p", seen.append, latency, "fake")
+        self.assertEqual(text, provider.text)
+        self.assertEqual("".join(seen), provider.text)
+        stat = latency.stats()[0]
+        self.assertEqual((stat["provider"], stat["calls"], stat["streamed"]), ("fake", 1, 1))
+        self.assertGreaterEqual(stat["last_ttft"], 0.015)
+        self.assertGreater(stat["last_latency"], stat["last_ttft"] + 0.03)
+
+    async def test_falls_back_without_streaming(self):
+        latency = LatencyStats()
+        provider = FakeProvider("一次性回复", latency=0.01)
+        self.assertFalse(supports_streaming(provider))
+        seen = []
+        self.assertEqual(await complete(provider, "p", seen.append, latency, "plain"), "一次性回复")
+        self.assertEqual(seen, [])
+        stat = latency.stats()[0]
+        self.assertEqual(stat["streamed"], 0)
+        self.assertEqual(stat["last_ttft"], stat["last_latency"])
+
+    async def test_failures_are_counted(self):
+        latency = LatencyStats()
+        provider = FakeStreamingProvider("abcdefgh", chunk_size=2, error=RuntimeError("reset"))
+        seen = []
+        with self.assertRaises(RuntimeError):
+            await complete(provider, "p", seen.append, latency, "fake")
+        self.assertEqual(seen, ["ab", "cd"])
+        self.assertEqual(latency.stats()[0]["failures"], 1)
+        self.assertEqual(latency.stats()[0]["calls"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import asyncio
+import unittest
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from summary_queue import SummaryQueue, SummaryJob
+
+class TestSummaryQueue(unittest.IsolatedAsyncioTestCase):
+    async def test_worker_runs_job(self):
+        done = asyncio.Event()
+        seen = []
+
+        async def handler(job):
+            seen.append(job)
+            done.set()
+
+        queue = SummaryQueue(handler, max_size=4, workers=1, delay_range=(0, 0))
+        self.assertTrue(queue.submit(SummaryJob("g1", "umo:g1", ("a: hi",))))
+        await asyncio.wait_for(done.wait(), timeout=1)
+        await queue.stop()
+
+        self.assertEqual(seen[0].group_id, "g1")
+        self.assertEqual(seen[0].context, ("a: hi",))
+        stats = queue.stats()
+        self.assertEqual(stats["completed"], 1)
+        self.assertEqual(stats["dropped"], 0)
+
+    async def test_reconfigure_applies_to_later_jobs(self):
+        done = asyncio.Event()
+
+        async def handler(job):
+            done.set()
+
+        queue = SummaryQueue(handler, max_size=4, workers=1, delay_range=(30, 60))
+        queue.reconfigure((0, -1), max_defer=5, detach=False)
+        self.assertEqual(queue.delay_range, (0.0, 0.0))
+        queue.submit(SummaryJob("g1", "umo:g1", ("a: hi",)))
+        await asyncio.wait_for(done.wait(), timeout=1)
+        await queue.stop()
+        self.assertEqual(queue.max_defer, 5.0)
+
+    async def test_overflow_is_dropped(self):
+        release = asyncio.Event()
+
+        async def handler(job):
+            await release.wait()
+
+        queue = SummaryQueue(handler, max_size=1, workers=1, delay_range=(0, 0))
+        queue.submit(SummaryJob("g1", "u", ()))
+        await asyncio.sleep(0)  # worker picks up the first job
+        self.assertTrue(queue.submit(SummaryJob("g2", "u", ())))
+        self.assertFalse(queue.submit(SummaryJob("g3", "u", ())))
+        self.assertEqual(queue.stats()["dropped"], 1)
+        self.assertEqual(queue.stats()["depth"], 1)
+        release.set()
+        await queue.stop()
+
+    async def test_handler_error_is_counted(self):
+        async def handler(job):
+            raise RuntimeError("boom")
+
+        queue = SummaryQueue(handler, max_size=2, workers=1, delay_range=(0, 0))
+        queue.submit(SummaryJob("g1", "u", ()))
+        await asyncio.sleep(0.05)
+        await queue.stop()
+        self.assertEqual(queue.stats()["failed"], 1)
+
+    async def test_gate_defers_instead_of_dropping(self):
+        done = asyncio.Event()
+        decisions = [(False, 0.05), (True, 0.0)]
+
+        async def gate(job):
+            return decisions.pop(0)
+
+        async def handler(job):
+            done.set()
+
+        queue = SummaryQueue(handler, max_size=2, workers=1, delay_range=(0, 0), gate=gate, max_defer=5)
+        queue.submit(SummaryJob("g1", "u", ()))
+        await asyncio.wait_for(done.wait(), timeout=1)
+        await queue.stop()
+        stats = queue.stats()
+        self.assertEqual(stats["deferred"], 1)
+        self.assertEqual(stats["rate_limited"], 0)
+        self.assertEqual(stats["completed"], 1)
+        # The requeue is not a new submission; the wait runs from the first one
+        self.assertEqual(stats["enqueued"], 1)
+        self.assertGreaterEqual(stats["avg_wait"], 0.05)
+
+    async def test_requeue_into_full_queue_is_rate_limited(self):
+        release = asyncio.Event()
+        decisions = [(False, 0.02)]
+
+        async def gate(job):
+            return decisions.pop(0) if decisions else (True, 0.0)
+
+        async def handler(job):
+            await release.wait()
+
+        queue = SummaryQueue(handler, max_size=1, workers=1, delay_range=(0, 0), gate=gate, max_defer=5)
+        queue.submit(SummaryJob("g1", "u", ()))
+        await asyncio.sleep(0.005)
+        queue.submit(SummaryJob("g2", "u", ())) # occupies the worker
+        await asyncio.sleep(0.005)
+        queue.submit(SummaryJob("g3", "u", ())) # fills the queue
+        await asyncio.sleep(0.05) # g1 comes back to a full queue
+        release.set()
+        await queue.stop()
+        stats = queue.stats()
+        self.assertEqual(stats["enqueued"], 3)
+        self.assertEqual(stats["dropped"], 0)
+        self.assertEqual(stats["rate_limited"], 1)
+
+    async def test_gate_gives_up_after_max_defer(self):
+        async def gate(job):
+            return False, 30.0
+
+        async def handler(job):
+            self.fail("handler must not run")
+
+        queue = SummaryQueue(handler, max_size=2, workers=1, delay_range=(0, 0), gate=gate, max_defer=10)
+        queue.submit(SummaryJob("g1", "u", ()))
+        await asyncio.sleep(0.01)
+        await queue.stop()
+        self.assertEqual(queue.stats()["rate_limited"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
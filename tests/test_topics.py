@@ -0,0 +1,76 @@
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from topics import TopicSketch, extract_terms, merge_bigrams
+from radar import RadarSystem
+
+class TestTopicSketch(unittest.TestCase):
+    def test_extract_terms(self):
+        self.assertEqual(extract_terms("新手机 iPhone 好"), {"新手", "手机", "iphone"})
+
+    def test_top_terms_and_decay(self):
+        sketch = TopicSketch(capacity=8, half_life=60, now=0)
+        for i in range(5):
+            sketch.add({"手机", "发布"}, now=i)
+            sketch.add({f"noise{i}a", f"noise{i}b"}, now=i)
+        self.assertLessEqual(len(sketch), 8)
+        top = sketch.top(2, now=5)
+        self.assertEqual({term for term, _ in top}, {"手机", "发布"})
+        self.assertAlmostEqual(top[0][1], 5 * 2 ** (-3 / 60), places=1)
+        # Ten half-lives later nothing is hot any more
+        self.assertEqual(sketch.top(5, now=600), [])
+
+    def test_renormalization_keeps_ranking(self):
+        sketch = TopicSketch(capacity=4, half_life=1, now=0)
+        sketch.add({"a"}, now=0)
+        for t in (100.0, 100.5):
+            sketch.add({"b"}, now=t)
+        self.assertLess(sketch.base, 101)
+        self.assertGreater(sketch.base, 0)
+        self.assertEqual([term for term, _ in sketch.top(3, now=100.5)], ["b"])
+
+    def test_eviction_matches_linear_scan(self):
+        rng = random.Random(7)
+        sketch = TopicSketch(capacity=16, half_life=30, now=0)
+        counts, errors = {}, {}
+        for t in range(400):
+            terms = sorted({f"w{rng.randrange(40)}" for _ in range(3)})
+            sketch.add(terms, now=t / 4)
+            # Reference: the same Space-Saving update with an O(capacity) min scan
+            weight = 2.0 ** ((t / 4) / 30)
+            for term in terms:
+                if term in counts:
+                    counts[term] += weight
+                elif len(counts) < 16:
+                    counts[term] = weight
+                else:
+                    victim = min(counts, key=lambda k: (counts[k], k))
+                    floor = counts.pop(victim)
+                    errors.pop(victim, None)
+                    counts[term] = floor + weight
+                    errors[term] = floor
+        self.assertEqual(set(sketch.counts), set(counts))
+        self.assertLessEqual(len(sketch.heap), 4 * 16 + 3)
+
+    def test_merge_bigrams(self):
+        self.assertEqual(merge_bigrams(["发布", "布会", "手机", "ai"]), ["发布会", "手机", "ai"])
+        self.assertEqual(merge_bigrams(["布会", "发布"]), ["发布会"])
+
+class TestRadarKeywords(unittest.TestCase):
+    def test_hot_keywords(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            radar = RadarSystem({}, persistence_path=os.path.join(tmp, "p.json"))
+            for i, text in enumerate(["发布会好看吗", "发布会上的新手机", "哈哈哈哈", "新手机多少钱"]):
+                asyncio.run(radar.on_message("g1", 1, f"u{i}", text, timestamp=1000.0 + i))
+            keywords = radar.hot_keywords("g1", now=1004.0)
+            self.assertIn("发布会", keywords)
+            self.assertIn("新手机", keywords)
+            self.assertNotIn("哈哈", keywords)
+            self.assertEqual(radar.hot_keywords("nope"), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from velocity import VelocitySpec, VelocityTracker
+
+class TestVelocityTracker(unittest.TestCase):
+    def setUp(self):
+        self.spec = VelocitySpec(bucket_seconds=10, horizons=(60, 300, 900), baseline_half_life=600, baseline_floor=1)
+
+    def test_rolling_rates_per_horizon(self):
+        v = VelocityTracker(self.spec)
+        for t in range(0, 600, 10): # 1 point every 10 s for 10 minutes
+            v.add(1, t)
+        one, five, fifteen = v.rates(599)
+        self.assertAlmostEqual(one, 6.0)
+        self.assertAlmostEqual(five, 6.0)
+        self.assertAlmostEqual(fifteen, 60 / 15)
+        self.assertTrue(v.warm)
+
+    def test_idle_gap_empties_windows_and_decays_baseline(self):
+        v = VelocityTracker(self.spec)
+        for t in range(0, 300, 5):
+            v.add(2, t)
+        baseline = v.baseline.mean
+        self.assertGreater(baseline, 0)
+        # Two minutes of silence: the 1-minute window is empty, not a stale "previous window"
+        self.assertEqual(v.window_score(420), 0)
+        self.assertGreater(v.rates(420)[1], 0)
+        self.assertLess(v.baseline.mean, baseline)
+        # After the longest horizon the ring is released and the baseline keeps decaying
+        v.rates(300 + 5000)
+        self.assertIsNone(v.buckets)
+        self.assertLess(v.baseline.mean, baseline / 100)
+
+    def test_acceleration_against_baseline(self):
+        v = VelocityTracker(self.spec)
+        for t in range(0, 900, 20): # steady 3 points per minute
+            v.add(1, t)
+        self.assertLess(v.acceleration(900), 1.5)
+        for i in range(30): # burst
+            v.add(1, 900 + i)
+        self.assertGreater(v.acceleration(930), 4)
+
+    def test_record_round_trip(self):
+        v = VelocityTracker(self.spec)
+        for t in (0, 15, 200, 205):
+            v.add(3, t)
+        restored = VelocityTracker(self.spec)
+        restored.load_record(v.to_record())
+        self.assertEqual(restored.rates(210), v.rates(210))
+        self.assertEqual(restored.to_record(), v.to_record())
+
+if __name__ == '__main__':
+    unittest.main()
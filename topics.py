@@ -0,0 +1,125 @@
+import re
+import time
+import heapq
+from typing import Iterable, List, Optional, Tuple
+
+_WORD_RE = re.compile(r"[a-z0-9]{2,}")
+_CJK_RE = re.compile(r"[\u4e00-\u9fff]{2,}")
+
+# Filler terms that are frequent in any chat and say nothing about the topic
+STOP_TERMS = frozenset(
+    "哈哈 呵呵 嘿嘿 什么 怎么 这个 那个 就是 我们 你们 他们 不是 没有 可以 一个 真的 还是 但是 所以 因为 现在 知道 "
+    "觉得 感觉 然后 如果 已经 这样 那样 这么 那么 自己 的话 一下 好的 是的 不要 不会 出来 起来 时候 东西 "
+    "the and for you are but not this that with have was just lol".split()
+)
+
+def extract_terms(content: str) -> set:
+    """英文单词 + 中文二元组 (同一条消息内去重)"""
+    lowered = content.lower()
+    terms = set(_WORD_RE.findall(lowered))
+    for run in _CJK_RE.findall(lowered):
+        terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+class TopicSketch:
+    """
+    单个群的热词索引: 带指数衰减的 Space-Saving Top-K。
+
+    最多跟踪 capacity 个词 (内存有界)；新词在满员时顶替当前计数最小的词并继承其计数 (记为误差上界)。
+    最小计数由惰性删除的最小堆给出 (过期条目在出堆时跳过，堆过大时重建)，顶替为均摊 O(log capacity)。
+    衰减采用 forward decay: 到达时刻 t 的一次出现记为 2^((t - base) / half_life)，查询时统一除以 2^((now - base) / half_life)，
+    因此更新时无需遍历全部计数；指数过大时整体归一化一次。
+    """
+    __slots__ = ("capacity", "half_life", "base", "counts", "errors", "heap")
+
+    RENORMALIZE_AT = 32.0 # exponent (in half-lives) after which counts are rescaled
+
+    def __init__(self, capacity: int = 64, half_life: float = 600.0, now: Optional[float] = None):
+        self.capacity = max(1, int(capacity))
+        self.half_life = max(1.0, float(half_life))
+        self.base = time.time() if now is None else now
+        self.counts = {} # term -> forward-decayed count
+        self.errors = {} # term -> over-estimate inherited on eviction
+        self.heap = [] # (count, term); an entry is stale once counts[term] has moved on
+
+    def __len__(self):
+        return len(self.counts)
+
+    def _weight(self, now: float) -> float:
+        exponent = (now - self.base) / self.half_life
+        if exponent > self.RENORMALIZE_AT:
+            scale = 2.0 ** -exponent
+            self.counts = {t: c * scale for t, c in self.counts.items()}
+            self.errors = {t: e * scale for t, e in self.errors.items()}
+            self.base = now
+            self._rebuild_heap()
+            exponent = 0.0
+        return 2.0 ** exponent
+
+    def _rebuild_heap(self):
+        self.heap = [(count, term) for term, count in self.counts.items()]
+        heapq.heapify(self.heap)
+
+    def _pop_min(self) -> Tuple[str, float]:
+        """移除并返回当前计数最小的词"""
+        counts, heap = self.counts, self.heap
+        while True:
+            count, term = heapq.heappop(heap)
+            if counts.get(term) == count:
+                del counts[term]
+                return term, count
+
+    def add(self, terms: Iterable[str], now: Optional[float] = None):
+        now = time.time() if now is None else now
+        weight = self._weight(now)
+        counts, heap = self.counts, self.heap
+        for term in terms:
+            if term in STOP_TERMS:
+                continue
+            if term in counts:
+                count = counts[term] = counts[term] + weight
+            elif len(counts) < self.capacity:
+                count = counts[term] = weight
+            else:
+                victim, floor = self._pop_min()
+                self.errors.pop(victim, None)
+                count = counts[term] = floor + weight
+                self.errors[term] = floor
+            heapq.heappush(heap, (count, term))
+        if len(heap) > 4 * self.capacity:
+            self._rebuild_heap() # drop stale entries; amortized O(1) per push
+
+    def top(self, n: int = 5, now: Optional[float] = None, min_count: float = 1.5) -> List[Tuple[str, float]]:
+        """
+        返回衰减后计数最高的 n 个词 [(term, count), ...]。
+        计数扣除误差上界后仍低于 min_count 的词 (只出现过一次或刚顶替进来) 不返回。
+        """
+        now = time.time() if now is None else now
+        scale = 2.0 ** -((now - self.base) / self.half_life)
+        errors = self.errors
+        ranked = sorted(self.counts.items(), key=lambda item: item[1] - errors.get(item[0], 0.0), reverse=True)
+        result = []
+        for term, count in ranked:
+            guaranteed = (count - errors.get(term, 0.0)) * scale
+            if guaranteed < min_count:
+                break
+            result.append((term, round(count * scale, 2)))
+            if len(result) >= n:
+                break
+        return result
+
+def merge_bigrams(terms: List[str]) -> List[str]:
+    """把排名相邻且首尾相接的中文二元组合并为更长的词 ("发布" + "布会" -> "发布会")，保持原有排名顺序"""
+    merged = []
+    for term in terms:
+        if merged and len(term) == 2 and _CJK_RE.fullmatch(term):
+            last = merged[-1]
+            if _CJK_RE.fullmatch(last):
+                if last[-1] == term[0]:
+                    merged[-1] = last + term[1]
+                    continue
+                if term[1] == last[0]:
+                    merged[-1] = term[0] + last
+                    continue
+        merged.append(term)
+    return merged
@@ -0,0 +1,143 @@
+from array import array
+from typing import Optional, Tuple
+
+try:
+    from .baseline import RateBaseline
+except ImportError:
+    from baseline import RateBaseline
+
+class VelocitySpec:
+    """
+    速度检测的共享参数 (所有群共用一份，群内只保存一个引用)。
+    horizons 为统计窗口 (秒)，必须是 bucket_seconds 的整数倍；最大的窗口决定环形缓冲区长度。
+    """
+    __slots__ = ("bucket_seconds", "horizons", "spans", "size", "alpha", "floor")
+
+    def __init__(self, bucket_seconds: float = 10, horizons: Tuple[float, ...] = (60, 300, 900),
+                 baseline_half_life: float = 600, baseline_floor: float = 5):
+        self.bucket_seconds = max(1.0, float(bucket_seconds))
+        self.horizons = tuple(sorted(horizons))
+        self.spans = tuple(max(1, round(h / self.bucket_seconds)) for h in self.horizons) # horizon in buckets
+        self.size = self.spans[-1]
+        # EWMA weight per closed bucket, so that the baseline forgets with the given half-life
+        self.alpha = 1.0 - 0.5 ** (self.bucket_seconds / max(1.0, float(baseline_half_life)))
+        self.floor = max(1e-6, float(baseline_floor)) # min baseline (score/min) for acceleration
+
+    @classmethod
+    def from_config(cls, trigger_conf: dict) -> "VelocitySpec":
+        return cls(
+            bucket_seconds=trigger_conf.get("velocity_bucket_seconds", 10),
+            baseline_half_life=trigger_conf.get("velocity_baseline_minutes", 10) * 60,
+            baseline_floor=trigger_conf.get("velocity_baseline_floor", 5),
+        )
+
+DEFAULT_SPEC = VelocitySpec()
+
+class VelocityTracker:
+    """
+    多分辨率滑动窗口速度检测: 固定时长桶组成的环形缓冲区 + 每个窗口一个滚动和。
+
+    - add(): 先把时间推进到当前桶 (逐桶扣除滑出各窗口的旧桶并清零)，再把分数计入当前桶与各窗口和，均摊 O(1)。
+    - 空闲期的空桶会被如实推进: 窗口和随之归零，不会把很久以前的窗口当作"上一窗口"。
+    - 每关闭一个桶，用当时的 1 分钟速率更新 EWMA 基线 (均值与方差，见 baseline.RateBaseline)；
+      acceleration() = 1 分钟速率 / max(基线均值, floor)。
+    - 缓冲区在首条消息时才分配，所有窗口清空后即释放，空闲群不占用桶内存。
+    """
+    __slots__ = ("spec", "buckets", "sums", "head", "baseline")
+
+    def __init__(self, spec: VelocitySpec = DEFAULT_SPEC):
+        self.spec = spec
+        self.buckets: Optional[array] = None
+        self.sums: Optional[list] = None
+        self.head = 0 # absolute index of the newest bucket
+        self.baseline = RateBaseline() # EWMA mean/variance of the 1-minute rate (score/min); samples = closed buckets
+
+    def _advance(self, now: float):
+        spec = self.spec
+        target = int(now // spec.bucket_seconds)
+        baseline = self.baseline
+        if self.buckets is None:
+            steps = target - self.head if baseline.samples else 0
+            if steps > 0:
+                baseline.decay(steps, spec.alpha)
+            self.head = max(self.head, target)
+            return
+        steps = target - self.head
+        if steps <= 0:
+            return # same bucket (late timestamps are counted into the newest bucket)
+        size = spec.size
+        buckets, sums, spans = self.buckets, self.sums, spec.spans
+        alpha = spec.alpha
+        minute = spec.horizons[0] / 60.0
+        for _ in range(min(steps, size)):
+            baseline.update(sums[0] / minute, alpha)
+            self.head += 1
+            head = self.head
+            for k, span in enumerate(spans):
+                sums[k] = max(0.0, sums[k] - buckets[(head - span) % size])
+            buckets[head % size] = 0.0
+        rest = steps - min(steps, size)
+        if rest:
+            baseline.decay(rest, alpha) # every further bucket closes with a zero rate
+            self.head += rest
+        if not sums[-1]:
+            self.buckets = self.sums = None # idle: release the ring
+
+    def add(self, score: float, now: float):
+        self._advance(now)
+        if self.buckets is None:
+            self.buckets = array("d", bytes(8 * self.spec.size))
+            self.sums = [0.0] * len(self.spec.spans)
+            self.head = max(self.head, int(now // self.spec.bucket_seconds))
+        self.buckets[self.head % self.spec.size] += score
+        sums = self.sums
+        for k in range(len(sums)):
+            sums[k] += score
+
+    def rates(self, now: Optional[float] = None) -> Tuple[float, ...]:
+        """各窗口的速率 (分/分钟)，按 spec.horizons 顺序"""
+        if now is not None:
+            self._advance(now)
+        if self.sums is None:
+            return (0.0,) * len(self.spec.horizons)
+        return tuple(s * 60.0 / h for s, h in zip(self.sums, self.spec.horizons))
+
+    def window_score(self, now: Optional[float] = None) -> float:
+        """最短窗口 (默认 1 分钟) 内的分数和"""
+        if now is not None:
+            self._advance(now)
+        return self.sums[0] if self.sums is not None else 0.0
+
+    @property
+    def warm(self) -> bool:
+        """至少观察满一个最短窗口后，基线才有意义"""
+        return self.baseline.samples >= self.spec.spans[0]
+
+    def acceleration(self, now: Optional[float] = None) -> float:
+        return self.rates(now)[0] / max(self.baseline.mean, self.spec.floor)
+
+    # --- Persistence ---
+    def to_record(self) -> dict:
+        record = {"h": self.head, "e": self.baseline.to_record()}
+        if self.buckets is not None:
+            size = self.spec.size
+            # Only non-empty buckets, as [age_in_buckets, score]
+            record["b"] = [[age, v] for age in range(size) if (v := self.buckets[(self.head - age) % size])]
+        return record
+
+    def load_record(self, record: dict):
+        self.head = record.get("h", self.head)
+        if "e" in record:
+            self.baseline.load_record(record["e"])
+        self.buckets = self.sums = None
+        spec = self.spec
+        for age, value in record.get("b", ()):
+            if age >= spec.size:
+                continue
+            if self.buckets is None:
+                self.buckets = array("d", bytes(8 * spec.size))
+                self.sums = [0.0] * len(spec.spans)
+            self.buckets[(self.head - age) % spec.size] = value
+            for k, span in enumerate(spec.spans):
+                if age < span:
+                    self.sums[k] += value